@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+from datetime import datetime
+import pytest
+
+# Les benchmarks importent les modules comme l'application (src/ dans le chemin)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Tailles de lots: 1M uniquement avec BENCH_FULL=1 (plusieurs minutes)
+BATCH_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+def batch_sizes():
+    full = os.getenv('BENCH_FULL') == '1'
+    return [
+        pytest.param(size, marks=pytest.mark.skipif(
+            size > 100_000 and not full, reason="BENCH_FULL=1 pour les lots d'un million"))
+        for size in BATCH_SIZES
+    ]
+
+# Aller-retour simulé vers une base locale, par connexion et par requête (secondes)
+DB_ROUNDTRIP = float(os.getenv('BENCH_DB_ROUNDTRIP', '0.0002'))
+# Historique renvoyé par produit pour les lectures
+HISTORY_ROWS = 30
+HISTORY_TIMESTAMP = datetime(2024, 1, 1)
+
+class FakeCursor:
+    """Curseur psycopg2 minimal: reproduit le coût côté client sans serveur."""
+
+    def __init__(self, db: 'FakeDatabase'):
+        self.db = db
+        self.connection = db
+        self._pending = []
+        self._result = []
+
+    def mogrify(self, template, args):
+        self._pending.append(args)
+        return repr(args).encode('utf-8')
+
+    def execute(self, sql, params=None):
+        if isinstance(sql, bytes):
+            sql = sql.decode('utf-8')
+        rows, self._pending = self._pending or [params], []
+        self.db.statements += 1
+        time.sleep(DB_ROUNDTRIP)
+        # Seul l'en-tête de la requête importe, pas la liste VALUES
+        returning = 'RETURNING id, url' in sql[-200:]
+        many = 'ANY(%s)' in sql
+        sql = sql[:200]
+
+        if 'SELECT id FROM products' in sql:
+            product_id = self.db.product_ids.get(params[0])
+            self._result = [(product_id,)] if product_id else []
+        elif 'INSERT INTO products' in sql:
+            self._result = []
+            for row in rows:
+                url = row[1]
+                product_id = self.db.product_ids.setdefault(url, len(self.db.product_ids) + 1)
+                self._result.append((product_id, url) if returning else (product_id,))
+        elif 'INSERT INTO price_history' in sql:
+            self.db.price_rows += len(rows)
+            self._result = []
+        elif 'INSERT INTO alerts' in sql:
+            self.db.alert_rows += len(rows)
+            self._result = []
+        elif 'FROM price_history' in sql:
+            urls = params[0] if many else [params[0]]
+            self._result = [
+                {'url': url, 'price': 10.0, 'timestamp': HISTORY_TIMESTAMP}
+                for url in urls if url in self.db.product_ids
+                for _ in range(HISTORY_ROWS)
+            ]
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+class FakeDatabase:
+    """Remplaçant en mémoire de PostgreSQL pour les benchmarks de DatabaseManager."""
+    encoding = 'UTF8'
+
+    def __init__(self):
+        self.product_ids = {}
+        self.price_rows = 0
+        self.alert_rows = 0
+        self.statements = 0
+        self.connections = 0
+
+    def connect(self, **kwargs):
+        self.connections += 1
+        time.sleep(DB_ROUNDTRIP)
+        return self
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+@pytest.fixture
+def db_manager(monkeypatch):
+    """DatabaseManager sur une vraie base (BENCH_DATABASE=1 et variables DB_*) ou sur le remplaçant."""
+    import psycopg2
+    from database.db_manager import DatabaseManager
+
+    if os.getenv('BENCH_DATABASE') != '1':
+        monkeypatch.setattr(psycopg2, 'connect', FakeDatabase().connect)
+    return DatabaseManager()
+
+@pytest.fixture(scope='session')
+def search_page_html():
+    with open(os.path.join(FIXTURES_DIR, 'search_page.html'), encoding='utf-8') as page:
+        return page.read()
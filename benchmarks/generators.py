@@ -0,0 +1,68 @@
+import random
+from datetime import datetime
+from typing import List
+from scraper.scraper import Product
+from scraper.product import ProductBatch
+
+SITES = ['amazon', 'cdiscount', 'fnac']
+# Catégorie -> (mot-clé présent dans le nom, fourchette de prix)
+CATEGORIES = {
+    'Électronique': ('Smartphone', 80.0, 900.0),
+    'Mode': ('Chaussures', 15.0, 250.0),
+    'Maison': ('Meuble', 20.0, 600.0),
+    'Sports': ('Vélo', 10.0, 1200.0),
+    'Autre': ('Article', 5.0, 100.0)
+}
+
+def _rows(count: int, seed: int, anomaly_rate: float, offset: int = 0):
+    """Produit des lignes (nom, prix, prix original, url, site, catégorie) déterministes."""
+    rng = random.Random(seed)
+    categories = list(CATEGORIES)
+    for i in range(offset, offset + count):
+        category = categories[i % len(categories)]
+        keyword, low, high = CATEGORIES[category]
+        price = round(rng.uniform(low, high), 2)
+        original_price = round(price * rng.uniform(1.0, 1.4), 2) if rng.random() < 0.6 else None
+        if rng.random() < anomaly_rate:
+            # Erreur de prix simulée: prix divisé par 10
+            original_price = original_price or price
+            price = round(price / 10, 2)
+        site = SITES[i % len(SITES)]
+        yield (f"{keyword} modèle {i} édition {rng.randint(1, 99)}", price, original_price,
+               f"https://www.{site}.fr/p/{i}", site, category)
+
+def make_products(count: int, seed: int = 42, anomaly_rate: float = 0.01) -> List[Product]:
+    """Génère une liste de Product synthétiques."""
+    timestamp = datetime(2024, 1, 1)
+    return [
+        Product(name=name, price=price, original_price=original_price, url=url,
+                site=site, category=category, timestamp=timestamp)
+        for name, price, original_price, url, site, category in _rows(count, seed, anomaly_rate)
+    ]
+
+def make_batch(count: int, seed: int = 42, anomaly_rate: float = 0.01) -> ProductBatch:
+    """Génère directement un lot colonnaire, sans objet Product intermédiaire."""
+    batch = ProductBatch(datetime(2024, 1, 1))
+    for row in _rows(count, seed, anomaly_rate):
+        batch.append(*row)
+    return batch
+
+def make_search_page(count: int, seed: int = 42, offset: int = 0, anomaly_rate: float = 0.0) -> str:
+    """Génère une page de résultats conforme aux sélecteurs 'amazon' de Scraper.sites_config.
+
+    offset décale les identifiants produits: des pages d'offsets disjoints n'ont aucune URL commune.
+    """
+    items = []
+    for name, price, original_price, url, site, category in _rows(count, seed, anomaly_rate, offset):
+        original = (f'<span class="a-price a-text-price"><span>{original_price:.2f}€</span></span>'
+                    if original_price else '')
+        items.append(
+            f'<div class="s-result-item" data-component-type="s-search-result">'
+            f'<h2><a class="a-link-normal" href="/dp/{url.rsplit("/", 1)[1]}">'
+            f'<span class="a-size-medium a-text-normal">{name}</span></a></h2>'
+            f'<span class="a-price"><span class="a-price-whole">{int(price)},</span>'
+            f'<span class="a-price-fraction">{int(round(price % 1 * 100)):02d}</span></span>'
+            f'{original}</div>'
+        )
+    return ('<html><head><title>Résultats</title></head><body>'
+            '<div class="s-main-slot">' + '\n'.join(items) + '</div></body></html>')
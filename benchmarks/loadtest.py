@@ -0,0 +1,137 @@
+# Test de charge du scraper, de bout en bout, contre le site factice (stub_site.py):
+#
+#     python benchmarks/loadtest.py --queries 100 --concurrency 16 --latency 0.05 --error-rate 0.01
+#
+# Le site factice est lancé dans un processus séparé, sauf si --url désigne un site déjà lancé.
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from scraper.frontier import CrawlFrontier
+from scraper.scraper import Scraper
+from stub_site import StubSite, add_config_arguments, config_from_args
+
+class TimedScraper(Scraper):
+    """Scraper qui mesure la durée de chaque page (téléchargement et parsing)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_seconds: List[float] = []
+
+    async def _fetch_products(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super()._fetch_products(*args, **kwargs)
+        finally:
+            self.page_seconds.append(time.perf_counter() - start)
+
+def stub_scraper(base_url: str) -> TimedScraper:
+    """Scraper configuré pour le site factice (mêmes sélecteurs que 'amazon')."""
+    scraper = TimedScraper()
+    scraper.sites_config = {
+        'stub': {
+            'base_url': base_url,
+            'search_url': base_url + '/s?k={query}',
+            'page_url': base_url + '/s?k={query}&page={page}',
+            'selectors': scraper.sites_config['amazon']['selectors']
+        }
+    }
+    return scraper
+
+async def run_load_test(base_url: str, queries: int = 20, pages: int = 5,
+                        concurrency: int = 8, prefetch: int = 3, stream: bool = False) -> Dict:
+    """Parcourt `queries` requêtes de `pages` pages, `concurrency` à la fois; renvoie les mesures.
+
+    Avec stream=True, les produits sont consommés lot par lot via Scraper.stream.
+    """
+    scraper = stub_scraper(base_url)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Frontière partagée par les requêtes du test, comme un cycle de collecte
+    frontier = CrawlFrontier()
+
+    async def crawl(i: int) -> int:
+        async with semaphore:
+            products = await scraper.crawl_site('stub', f"requete{i}", max_pages=pages, prefetch=prefetch,
+                                                frontier=frontier)
+            return len(products)
+
+    async def consume() -> List[int]:
+        requests = (('stub', f"requete{i}") for i in range(queries))
+        return [len(batch) async for batch in scraper.stream(
+            requests, max_pages=pages, concurrency=concurrency, cache=False)]
+
+    start = time.perf_counter()
+    counts = await consume() if stream else await asyncio.gather(*(crawl(i) for i in range(queries)))
+    elapsed = time.perf_counter() - start
+
+    async with httpx.AsyncClient() as client:
+        statuses = (await client.get(base_url + '/_stats')).json()
+
+    latencies = sorted(scraper.page_seconds)
+    return {
+        'pages': len(latencies),
+        'products': sum(counts),
+        'seconds': elapsed,
+        'pages_per_second': len(latencies) / elapsed,
+        'products_per_second': sum(counts) / elapsed,
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'max_rss_mb': _max_rss_mb(),
+        'statuses': statuses
+    }
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def _max_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus (indisponible sous Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def format_report(report: Dict) -> str:
+    rss = f"{report['max_rss_mb']:.1f} Mo" if report['max_rss_mb'] is not None else "n/d"
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(report['statuses'].items()))
+    return '\n'.join([
+        f"Pages:        {report['pages']} en {report['seconds']:.2f}s ({report['pages_per_second']:.1f} pages/s)",
+        f"Produits:     {report['products']} ({report['products_per_second']:.1f} produits/s)",
+        f"Latence page: p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms",
+        f"Mémoire:      RSS max {rss}",
+        f"Réponses:     {statuses}"
+    ])
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Test de charge du scraper contre un site factice")
+    parser.add_argument('--url', help="Site factice déjà lancé (sinon lancé pour le test)")
+    parser.add_argument('--queries', type=int, default=20, help="Requêtes parcourues")
+    parser.add_argument('--concurrency', type=int, default=8, help="Requêtes simultanées")
+    parser.add_argument('--prefetch', type=int, default=3, help="Pages téléchargées en parallèle par requête")
+    parser.add_argument('--stream', action='store_true', help="Consomme les lots via Scraper.stream")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    def run(base_url: str) -> Dict:
+        return asyncio.run(run_load_test(base_url, args.queries, args.pages,
+                                         args.concurrency, args.prefetch, args.stream))
+
+    if args.url:
+        report = run(args.url.rstrip('/'))
+    else:
+        with StubSite(config_from_args(args)) as site:
+            report = run(site.base_url)
+    print(format_report(report))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# Site e-commerce factice pour mesurer le scraper hors ligne: pages de résultats générées
+# (sélecteurs 'amazon' de Scraper.sites_config), latence, erreurs 500 et 429 configurables.
+#
+#     python benchmarks/stub_site.py --port 8900 --latency 0.05 --error-rate 0.01
+import argparse
+import json
+import multiprocessing
+import random
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+from generators import make_search_page
+
+@dataclass
+class StubSiteConfig:
+    latency: float = 0.02            # secondes avant chaque réponse
+    jitter: float = 0.0              # latence supplémentaire aléatoire (0 à jitter secondes)
+    error_rate: float = 0.0          # part des réponses 500
+    rate_limit_rate: float = 0.0     # part des réponses 429 (avec Retry-After)
+    products_per_page: int = 48
+    pages: int = 5                   # pages par requête; au-delà, page sans produit
+    anomaly_rate: float = 0.01       # part des prix divisés par 10
+    seed: int = 42
+
+class StubSiteHandler(BaseHTTPRequestHandler):
+    """Répond à /s?k=<requête>&page=<n>; /_stats renvoie les réponses servies par statut."""
+
+    config: StubSiteConfig
+    stats: Dict[str, int]
+    lock: threading.Lock
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/_stats':
+            with self.lock:
+                body = json.dumps(self.stats).encode('utf-8')
+            self._send(200, body, 'application/json')
+            return
+        if parts.path != '/s':
+            self._send(404, b'')
+            return
+
+        params = parse_qs(parts.query)
+        query = params.get('k', [''])[0]
+        page = int(params.get('page', ['1'])[0])
+        config = self.config
+        time.sleep(config.latency + random.random() * config.jitter)
+
+        draw = random.random()
+        if draw < config.error_rate:
+            self._send(500, b'Erreur interne')
+        elif draw < config.error_rate + config.rate_limit_rate:
+            self._send(429, b'Trop de requetes', headers={'Retry-After': '1'})
+        else:
+            self._send(200, _page(query, page, config.products_per_page, config.pages,
+                                  config.anomaly_rate, config.seed))
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html; charset=utf-8',
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.lock:
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+    def log_message(self, format, *args):
+        pass
+
+@lru_cache(maxsize=4096)
+def _page(query: str, page: int, products_per_page: int, pages: int,
+          anomaly_rate: float, seed: int) -> bytes:
+    """Page générée une fois par (requête, numéro): le serveur ne doit pas être le goulot."""
+    if page > pages:
+        return make_search_page(0).encode('utf-8')
+    # Produits propres à chaque requête et à chaque page (frontière de collecte)
+    offset = (zlib.crc32(query.encode('utf-8')) * pages + page - 1) * products_per_page
+    return make_search_page(products_per_page, seed=seed + page, offset=offset,
+                            anomaly_rate=anomaly_rate).encode('utf-8')
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Plusieurs centaines de connexions simultanées possibles pendant un test de charge
+    request_queue_size = 1024
+
+def make_server(config: StubSiteConfig, port: int = 0) -> StubServer:
+    """Crée le serveur (port 0: choisi par le système)."""
+    handler = type('Handler', (StubSiteHandler,), {
+        'config': config, 'stats': {}, 'lock': threading.Lock()})
+    return StubServer(('127.0.0.1', port), handler)
+
+def _serve(config: StubSiteConfig, port: int, ready) -> None:
+    server = make_server(config, port)
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+class StubSite:
+    """Lance le site factice dans un processus séparé (il ne partage ni CPU ni GIL avec le scraper)."""
+
+    def __init__(self, config: Optional[StubSiteConfig] = None, port: int = 0):
+        self.config = config or StubSiteConfig()
+        self.port = port
+        self.process: Optional[multiprocessing.Process] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> 'StubSite':
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(target=_serve, args=(self.config, self.port, sender),
+                                               daemon=True)
+        self.process.start()
+        self.port = receiver.recv()
+        return self
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def __enter__(self) -> 'StubSite':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options du site factice, partagées avec loadtest.py."""
+    defaults = StubSiteConfig()
+    parser.add_argument('--latency', type=float, default=defaults.latency, help="Latence (secondes)")
+    parser.add_argument('--jitter', type=float, default=defaults.jitter,
+                        help="Latence aléatoire supplémentaire (secondes)")
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate, help="Part des 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=defaults.rate_limit_rate,
+                        help="Part des 429")
+    parser.add_argument('--products-per-page', type=int, default=defaults.products_per_page)
+    parser.add_argument('--pages', type=int, default=defaults.pages, help="Pages par requête")
+    parser.add_argument('--anomaly-rate', type=float, default=defaults.anomaly_rate)
+
+def config_from_args(args: argparse.Namespace) -> StubSiteConfig:
+    return StubSiteConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          rate_limit_rate=args.rate_limit_rate,
+                          products_per_page=args.products_per_page, pages=args.pages,
+                          anomaly_rate=args.anomaly_rate)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Site e-commerce factice pour les tests de charge")
+    parser.add_argument('--port', type=int, default=8900)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    config = config_from_args(args)
+    server = make_server(config, args.port)
+    print(f"Site factice sur http://127.0.0.1:{server.server_address[1]} ({asdict(config)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import pytest
+from analyzer.price_analyzer import PriceAnalyzer
+from analyzer.product_matcher import ProductMatcher
+from analyzer.rules import RuleEngine
+from conftest import batch_sizes
+from generators import CATEGORIES, SITES, make_batch, make_products
+
+def many_rules() -> RuleEngine:
+    """Une quarantaine de règles par site et catégorie, plus les règles par défaut."""
+    rules = []
+    for site in SITES:
+        for category in CATEGORIES:
+            for threshold in (0.6, 0.75):
+                rules.append({
+                    'name': f"{site}_{category}_{threshold}", 'alert_type': 'price_drop',
+                    'sites': [site], 'categories': [category],
+                    'when': {'drop_ratio': {'>': threshold}, 'z_score': {'<': -1.0}}
+                })
+    rules.append({'name': 'prix_bas', 'alert_type': 'low_price', 'when': {'iqr_score': {'>': 1.5}},
+                  'confidence': {'feature': 'z_score', 'scale': 3}, 'difference': 'median_gap'})
+    rules.append({'name': 'forte_baisse', 'alert_type': 'price_drop', 'when': {'drop_ratio': {'>': 0.5}}})
+    return RuleEngine.from_config({'rules': rules})
+
+@pytest.mark.parametrize('size', batch_sizes())
+def test_analyze_prices(benchmark, size):
+    products = make_products(size)
+    alerts = benchmark.pedantic(lambda: PriceAnalyzer().analyze_prices(products), rounds=3)
+    assert alerts
+
+@pytest.mark.parametrize('size', batch_sizes())
+def test_analyze_batch(benchmark, size):
+    batch = make_batch(size)
+    alerts = benchmark.pedantic(lambda: PriceAnalyzer().analyze_batch(batch), rounds=3)
+    assert alerts
+
+@pytest.mark.parametrize('size', batch_sizes())
+def test_analyze_batch_with_matcher(benchmark, size):
+    batch = make_batch(size)
+    benchmark.pedantic(lambda: PriceAnalyzer(matcher=ProductMatcher()).analyze_batch(batch), rounds=3)
+
+@pytest.mark.parametrize('size', batch_sizes())
+def test_analyze_batch_many_rules(benchmark, size):
+    batch = make_batch(size)
+    rules = many_rules()
+    alerts = benchmark.pedantic(lambda: PriceAnalyzer(rules=rules).analyze_batch(batch), rounds=3)
+    assert alerts
@@ -0,0 +1,51 @@
+import random
+import string
+import pytest
+from scraper.category_matcher import CategoryMatcher, normalize_text
+
+KEYWORD_COUNT = 10_000
+CATEGORY_COUNT = 50
+
+@pytest.fixture(scope='module')
+def taxonomy():
+    rng = random.Random(42)
+    keywords = {
+        ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+        for _ in range(KEYWORD_COUNT)
+    }
+    taxonomy = {f'Catégorie {i}': [] for i in range(CATEGORY_COUNT)}
+    for i, keyword in enumerate(sorted(keywords)):
+        taxonomy[f'Catégorie {i % CATEGORY_COUNT}'].append(keyword)
+    return taxonomy
+
+@pytest.fixture(scope='module')
+def product_names(taxonomy):
+    rng = random.Random(7)
+    keywords = [k for words in taxonomy.values() for k in words]
+    names = []
+    for i in range(1000):
+        words = [''.join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(6)]
+        if i % 3 == 0:
+            words.insert(rng.randint(0, 6), rng.choice(keywords))
+        names.append(' '.join(words).title())
+    return names
+
+def test_build_automaton_10k_keywords(benchmark, taxonomy):
+    benchmark(CategoryMatcher, taxonomy)
+
+def test_classify_10k_keywords(benchmark, taxonomy, product_names):
+    matcher = CategoryMatcher(taxonomy, cache_size=0)
+    benchmark(lambda: [matcher.classify(name) for name in product_names])
+
+def test_classify_10k_keywords_naive_loop(benchmark, taxonomy, product_names):
+    """Référence: l'ancienne boucle catégories x mots-clés."""
+    normalized = {c: [normalize_text(k) for k in words] for c, words in taxonomy.items()}
+
+    def classify(name):
+        name = normalize_text(name)
+        for category, keywords in normalized.items():
+            if any(keyword in name for keyword in keywords):
+                return category
+        return 'Autre'
+
+    benchmark.pedantic(lambda: [classify(name) for name in product_names], rounds=3)
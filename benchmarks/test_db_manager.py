@@ -0,0 +1,41 @@
+import pytest
+from generators import make_batch, make_products
+
+@pytest.mark.parametrize('size', [1_000])
+def test_save_product_loop(benchmark, db_manager, size):
+    """Une connexion et trois requêtes par produit."""
+    products = make_products(size)
+    benchmark.pedantic(lambda: [db_manager.save_product(p) for p in products], rounds=3)
+
+@pytest.mark.parametrize('size', [1_000, 10_000, 100_000])
+def test_save_batch(benchmark, db_manager, size):
+    batch = make_batch(size)
+    saved = benchmark.pedantic(db_manager.save_batch, args=(batch,), rounds=3)
+    assert saved == size
+
+@pytest.mark.parametrize('size', [1_000])
+def test_get_price_history_loop(benchmark, db_manager, size):
+    """Une connexion et une requête par produit, sans cache."""
+    batch = make_batch(size)
+    db_manager.save_batch(batch)
+    db_manager.cache = None
+    urls = batch.urls()
+    benchmark.pedantic(lambda: [db_manager.get_price_history(url) for url in urls], rounds=3)
+
+@pytest.mark.parametrize('size', [1_000])
+def test_get_price_histories(benchmark, db_manager, size):
+    """Une seule requête pour tout le lot, sans cache."""
+    batch = make_batch(size)
+    db_manager.save_batch(batch)
+    db_manager.cache = None
+    histories = benchmark.pedantic(db_manager.get_price_histories, args=(batch.urls(),), rounds=3)
+    assert len(histories) == size
+
+@pytest.mark.parametrize('size', [1_000])
+def test_get_price_history_cached(benchmark, db_manager, size):
+    """Lectures répétées des mêmes produits (tableau de bord), servies par le cache."""
+    batch = make_batch(size)
+    db_manager.save_batch(batch)
+    urls = batch.urls()
+    db_manager.get_price_histories(urls)
+    benchmark.pedantic(lambda: [db_manager.get_price_history(url) for url in urls], rounds=3)
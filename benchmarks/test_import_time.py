@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+MODULES = [
+    'monitoring.metrics',
+    'scraper.scraper',
+    'analyzer.price_analyzer',
+    'database.db_manager',
+    'notifier.notification_manager',
+    'worker.worker',
+]
+
+def _import_in_fresh_interpreter(module: str) -> None:
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    subprocess.run([sys.executable, '-c', f'import {module}'], env=env, check=True)
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_time(benchmark, module):
+    # Inclut le démarrage de l'interpréteur, identique pour tous les modules
+    benchmark.pedantic(_import_in_fresh_interpreter, args=(module,), rounds=5)
@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from loadtest import run_load_test
+from stub_site import StubSite, StubSiteConfig
+
+@pytest.fixture(scope='module')
+def stub_site():
+    with StubSite(StubSiteConfig(latency=0.01, pages=3, products_per_page=20)) as site:
+        yield site
+
+def test_crawl_stub_site(benchmark, stub_site):
+    """Débit de bout en bout (téléchargement, parsing, frontière) contre le site factice."""
+    report = benchmark.pedantic(
+        lambda: asyncio.run(run_load_test(stub_site.base_url, queries=10, pages=3, concurrency=5)),
+        rounds=3)
+    assert report['pages'] == 30
+    assert report['products'] == 600
+    assert report['p50_ms'] <= report['p99_ms']
+
+def test_stream_stub_site(benchmark, stub_site):
+    """Débit du flux de lots (Scraper.stream) contre le site factice."""
+    report = benchmark.pedantic(
+        lambda: asyncio.run(run_load_test(stub_site.base_url, queries=10, pages=3, concurrency=5,
+                                          stream=True)),
+        rounds=3)
+    assert report['pages'] == 30
+    assert report['products'] == 600
+
+def test_errors_stop_crawl():
+    """Les erreurs du site factice interrompent le parcours sans faire échouer le test de charge."""
+    with StubSite(StubSiteConfig(latency=0.0, error_rate=1.0, pages=3)) as site:
+        report = asyncio.run(run_load_test(site.base_url, queries=4, pages=3, concurrency=2))
+
+    assert report['products'] == 0
+    assert report['statuses'] == {'500': report['pages']}
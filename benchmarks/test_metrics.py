@@ -0,0 +1,15 @@
+from monitoring.metrics import MetricsRegistry
+
+def _workload(registry, counter, histogram):
+    for _ in range(1000):
+        with registry.timer(histogram, site='amazon'):
+            counter.inc(site='amazon')
+
+def test_instrumentation_disabled(benchmark):
+    """Coût des points de mesure quand les métriques sont désactivées."""
+    registry = MetricsRegistry(enabled=False)
+    benchmark(_workload, registry, registry.counter('c'), registry.histogram('h'))
+
+def test_instrumentation_enabled(benchmark):
+    registry = MetricsRegistry(enabled=True)
+    benchmark(_workload, registry, registry.counter('c'), registry.histogram('h'))
@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import pytest
+from generators import make_products
+
+from analyzer.price_analyzer import PriceAlert
+
+try:
+    from notifier import notification_manager
+except ImportError as e:  # canaux optionnels absents ou incompatibles
+    pytest.skip(f"NotificationManager indisponible: {e}", allow_module_level=True)
+
+@pytest.fixture
+def alerts():
+    return [
+        PriceAlert(product=product, confidence=0.9, price_difference=10.0,
+                   timestamp=datetime(2024, 1, 1), alert_type='price_drop')
+        for product in make_products(100)
+    ]
+
+def test_format_alert_message(benchmark, alerts):
+    notifier = notification_manager.NotificationManager()
+    benchmark(lambda: [notifier._format_alert_message(alert) for alert in alerts])
+
+def test_send_notifications_email(benchmark, alerts, monkeypatch):
+    """Envoi par email avec un transport SMTP simulé (aucune connexion réseau)."""
+    for name in ('TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID', 'DISCORD_WEBHOOK_URL'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('EMAIL_SENDER', 'bench@example.com')
+    monkeypatch.setenv('EMAIL_PASSWORD', 'secret')
+    notifier = notification_manager.NotificationManager()
+    notifier.telegram_token = notifier.discord_webhook_url = None
+
+    with patch('smtplib.SMTP', return_value=MagicMock()):
+        benchmark(lambda: asyncio.run(notifier.send_notifications(alerts)))
@@ -0,0 +1,33 @@
+import os
+import pytest
+from bs4 import BeautifulSoup
+from scraper.archive import PageArchive
+from scraper.scraper import Scraper
+
+@pytest.fixture(scope='module')
+def scraper():
+    return Scraper()
+
+def test_parse_products(benchmark, scraper, search_page_html):
+    config = scraper.sites_config['amazon']
+    products = benchmark(
+        lambda: scraper._parse_products(BeautifulSoup(search_page_html, 'html.parser'), 'amazon', config))
+    assert len(products) == 48
+
+def test_parse_batch(benchmark, scraper, search_page_html):
+    config = scraper.sites_config['amazon']
+    batch = benchmark(
+        lambda: scraper._parse_batch(BeautifulSoup(search_page_html, 'html.parser'), 'amazon', config))
+    assert len(batch) == 48
+
+def test_content_hash(benchmark, scraper, search_page_html):
+    """Coût de la détection d'une page inchangée (comparé au parsing complet)."""
+    soup = BeautifulSoup(search_page_html, 'html.parser')
+    benchmark(scraper._content_hash, soup, scraper.sites_config['amazon'])
+
+@pytest.mark.skipif(not os.getenv('BENCH_ARCHIVE_DIR'),
+                    reason="BENCH_ARCHIVE_DIR doit pointer vers une archive de pages réelles")
+def test_replay_archive(benchmark, scraper):
+    """Re-parsing de pages réelles archivées par Scraper(archive=...)."""
+    archive = PageArchive(os.environ['BENCH_ARCHIVE_DIR'])
+    benchmark.pedantic(scraper.replay_archive, args=(archive,), rounds=1)
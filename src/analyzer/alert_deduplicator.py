@@ -0,0 +1,97 @@
+import math
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from monitoring.metrics import metrics
+
+if TYPE_CHECKING:
+    from analyzer.price_analyzer import PriceAlert
+    from database.db_manager import DatabaseManager
+
+ALERTS_SUPPRESSED = metrics.counter('alerts_suppressed_total', 'Alertes déjà signalées pendant leur période de silence')
+
+class AlertDeduplicator:
+    """Filtre les alertes déjà signalées pour le même produit, le même type et la même tranche de prix.
+
+    Une alerte est mémorisée pendant `cooldown` secondes sous une clé (url, type,
+    tranche de prix); les tranches sont logarithmiques (largeur `bucket_ratio`):
+    une baisse supplémentaire du prix change de tranche et est de nouveau signalée.
+    Seule l'empreinte de la clé et l'échéance sont conservées en mémoire.
+
+    L'état est propre au processus: warm() le recharge depuis la table alerts au
+    démarrage, mais des workers distribués ne voient pas les alertes signalées
+    ensuite par les autres et peuvent chacun signaler la même.
+    """
+
+    def __init__(self, cooldown: float = 6 * 3600, bucket_ratio: float = 0.05,
+                 clock: Callable[[], float] = time.time):
+        self.cooldown = cooldown
+        self.bucket_ratio = bucket_ratio
+        self.clock = clock
+        # Empreinte de la clé -> fin de la période de silence (secondes epoch)
+        self._expires: Dict[int, float] = {}
+        self._purge_at = 1024
+
+    def filter(self, alerts: List['PriceAlert'], record: bool = True) -> List['PriceAlert']:
+        """Renvoie les alertes nouvelles, et les mémorise si record; les doublons sont écartés.
+
+        Avec record=False, l'appelant mémorise les alertes avec remember() une fois
+        enregistrées: un nouvel essai après une erreur d'écriture n'est pas filtré.
+        """
+        now = self.clock()
+        fresh = []
+        seen = set()
+        for alert in alerts:
+            key = self._key(alert.product.url, alert.alert_type, alert.product.price)
+            if key in seen or self._expires.get(key, 0.0) > now:
+                ALERTS_SUPPRESSED.inc(alert_type=alert.alert_type)
+                continue
+            seen.add(key)
+            fresh.append(alert)
+
+        if record:
+            self._store(seen, now + self.cooldown)
+        return fresh
+
+    def remember(self, alerts: List['PriceAlert']) -> None:
+        """Mémorise des alertes signalées maintenant."""
+        self._store((self._key(alert.product.url, alert.alert_type, alert.product.price)
+                     for alert in alerts), self.clock() + self.cooldown)
+
+    def is_duplicate(self, alert: 'PriceAlert') -> bool:
+        """Indique si une alerte équivalente a déjà été signalée récemment (sans la mémoriser)."""
+        key = self._key(alert.product.url, alert.alert_type, alert.product.price)
+        return self._expires.get(key, 0.0) > self.clock()
+
+    def record(self, url: str, alert_type: str, price: float,
+               timestamp: Optional[datetime] = None) -> None:
+        """Mémorise une alerte signalée à `timestamp` (maintenant par défaut)."""
+        start = timestamp.timestamp() if timestamp else self.clock()
+        key = self._key(url, alert_type, price)
+        self._expires[key] = max(self._expires.get(key, 0.0), start + self.cooldown)
+
+    def warm(self, db: 'DatabaseManager') -> int:
+        """Recharge les alertes encore en période de silence depuis la table alerts."""
+        since = datetime.fromtimestamp(self.clock() - self.cooldown)
+        rows = db.get_alerts_since(since)
+        for row in rows:
+            self.record(row['url'], row['alert_type'], float(row['price']), row['timestamp'])
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def _key(self, url: str, alert_type: str, price: float) -> int:
+        bucket = math.floor(math.log(price) / math.log1p(self.bucket_ratio)) if price > 0 else 0
+        return hash((url, alert_type, bucket))
+
+    def _store(self, keys, expires: float) -> None:
+        for key in keys:
+            self._expires[key] = expires
+        if len(self._expires) >= self._purge_at:
+            self._purge(self.clock())
+
+    def _purge(self, now: float) -> None:
+        # Les entrées expirées sont retirées par lots, quand la table a doublé
+        self._expires = {key: expires for key, expires in self._expires.items() if expires > now}
+        self._purge_at = max(1024, 2 * len(self._expires))
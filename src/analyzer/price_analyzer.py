@@ -1,27 +1,52 @@
-from typing import List, Dict, Optional
+import os
+from typing import TYPE_CHECKING, List, Dict, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass
-from sklearn.ensemble import IsolationForest
+from dataclasses import dataclass, replace
 import numpy as np
-from scraper.scraper import Product
+from scraper.product import Product, ProductBatch
+from analyzer.price_history import PriceHistoryStore
+from analyzer.rules import BatchFeatures, RuleEngine
+from monitoring.metrics import metrics
 
-@dataclass
+if TYPE_CHECKING:
+    from analyzer.product_matcher import ProductMatcher
+
+ANALYZE_SECONDS = metrics.histogram('analyze_prices_seconds', "Durée de l'analyse d'un lot de produits")
+ALERTS_RAISED = metrics.counter('alerts_raised_total', 'Alertes de prix générées')
+
+# Détection sur l'historique: nombre minimal de prix connus, seuils du z-score robuste
+# (médiane/MAD) et de l'écart à l'EWMA; les deux doivent être franchis
+HISTORY_MIN_POINTS = 5
+HISTORY_MAD_THRESHOLD = 3.5
+HISTORY_EWMA_THRESHOLD = 3.0
+# Dispersion minimale (fraction de la médiane) pour les prix parfaitement stables
+HISTORY_MIN_SPREAD = 0.01
+
+# Écart minimal avec le prix médian du même article ailleurs (fraction de ce prix)
+CROSS_SITE_MIN_GAP = 0.5
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'alert_rules.json')
+
+@dataclass(frozen=True, slots=True)
 class PriceAlert:
     product: Product
     confidence: float
     price_difference: float
     timestamp: datetime
-    alert_type: str  # 'low_price' ou 'price_drop'
+    alert_type: str  # 'low_price', 'price_drop', 'cross_site' ou 'history_anomaly'
 
 class PriceAnalyzer:
-    def __init__(self):
-        self.model = IsolationForest(
-            contamination=0.1,
-            random_state=42
-        )
-        self.price_history: Dict[str, List[float]] = {}
+    def __init__(self, matcher: Optional['ProductMatcher'] = None,
+                 rules: Optional[RuleEngine] = None):
+        self.price_history = PriceHistoryStore()
         self.category_stats: Dict[str, Dict[str, float]] = {}
+        # Rapprochement optionnel des annonces d'un même article sur plusieurs sites
+        self.matcher = matcher
+        # Règles d'alerte déclaratives (alert_rules.json par défaut)
+        self.rules = rules if rules is not None else RuleEngine.from_file(
+            os.getenv('ALERT_RULES_PATH') or DEFAULT_RULES_PATH)
 
+    @metrics.timed(ANALYZE_SECONDS, mode='products')
     def analyze_prices(self, products: List[Product]) -> List[PriceAlert]:
         """Analyse les prix des produits pour détecter les anomalies."""
         alerts = []
@@ -29,14 +54,127 @@ class PriceAnalyzer:
         # Mise à jour des statistiques par catégorie
         self._update_category_stats(products)
 
+        # Chaque prix est comparé à l'historique du produit avant d'y être ajouté
+        urls = [product.url for product in products]
+        prices = np.array([product.price for product in products], dtype=np.float64)
+        history = self.price_history.stats(urls)
+        anomalies, confidences, differences = self._score_price_history(urls, prices, history)
+        matched, rule_confidences, rule_differences = self.rules.evaluate(
+            BatchFeatures.from_products(products, self.category_stats, history))
+
+        # Tout le lot est indexé d'abord: les annonces d'un même cycle se comparent entre elles
+        if self.matcher is not None:
+            for product in products:
+                self.matcher.add(product.name, product.url, product.site, product.price)
+
         # Analyse individuelle des produits
-        for product in products:
-            alert = self._analyze_product(product)
+        timestamp = datetime.now()
+        for i, product in enumerate(products):
+            alert = self._rule_alert(product, matched[i], rule_confidences[i],
+                                     rule_differences[i], timestamp)
+            if not alert:
+                alert = self._cross_site_alert(product, product.url, product.price, timestamp)
+            if not alert and anomalies[i]:
+                alert = PriceAlert(
+                    product=product,
+                    confidence=float(confidences[i]),
+                    price_difference=float(differences[i]),
+                    timestamp=timestamp,
+                    alert_type='history_anomaly'
+                )
             if alert:
                 alerts.append(alert)
+                ALERTS_RAISED.inc(alert_type=alert.alert_type)
 
+        self.price_history.update(urls, prices)
         return alerts
 
+    @metrics.timed(ANALYZE_SECONDS, mode='batch')
+    def analyze_batch(self, batch: ProductBatch) -> List[PriceAlert]:
+        """Analyse un lot colonnaire; seuls les produits en alerte sont matérialisés."""
+        if not len(batch):
+            return []
+
+        self._update_category_stats_batch(batch)
+
+        prices = batch.prices
+        urls = batch.urls()
+        history = self.price_history.stats(urls)
+        history_anomaly, history_confidences, history_differences = \
+            self._score_price_history(urls, prices, history)
+        matched, rule_confidences, rule_differences = self.rules.evaluate(
+            BatchFeatures.from_batch(batch, self.category_stats, history))
+
+        # Mêmes priorités que analyze_prices: règles, puis prix d'autres sites, puis historique
+        ruled = matched >= 0
+        history_anomaly &= ~ruled
+
+        alerts = []
+        timestamp = datetime.now()
+        candidates = ruled | history_anomaly
+        cross_site = np.zeros(len(batch), dtype=bool)
+        if self.matcher is not None:
+            for i in range(len(batch)):
+                self.matcher.add(batch.name(i), urls[i], batch.site(i), float(prices[i]))
+            # Le prix de référence n'est consulté que pour les lignes sans autre alerte
+            for i in np.flatnonzero(~ruled):
+                if self._cross_site_gap(urls[i], float(prices[i])) is not None:
+                    cross_site[i] = True
+            candidates |= cross_site
+
+        for i in np.flatnonzero(candidates):
+            if cross_site[i]:
+                alerts.append(self._cross_site_alert(
+                    batch.product(i), urls[i], float(prices[i]), timestamp))
+            elif ruled[i]:
+                alerts.append(self._rule_alert(batch.product(i), matched[i], rule_confidences[i],
+                                               rule_differences[i], timestamp))
+            else:
+                alerts.append(PriceAlert(
+                    product=batch.product(i),
+                    confidence=float(history_confidences[i]),
+                    price_difference=float(history_differences[i]),
+                    timestamp=timestamp,
+                    alert_type='history_anomaly'
+                ))
+
+        self.price_history.update(urls, prices)
+        for alert in alerts:
+            ALERTS_RAISED.inc(alert_type=alert.alert_type)
+        return alerts
+
+    def backtest(self, root: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 sites: Optional[Sequence[str]] = None, batch_size: int = 65536) -> List[PriceAlert]:
+        """Rejoue la détection sur l'historique exporté en Parquet (DatabaseManager.export_parquet).
+
+        Les prix d'une même exécution (horodatage, site) forment un lot analysé comme
+        lors de la collecte, dans l'ordre chronologique; les alertes portent la date
+        de l'exécution. L'état de l'analyseur évolue: utiliser un analyseur neuf.
+        """
+        from database.parquet_store import read_price_history
+
+        alerts: List[PriceAlert] = []
+        batch: Optional[ProductBatch] = None
+        run = None
+        for record_batch in read_price_history(root, start, end, sites, batch_size):
+            columns = record_batch.to_pydict()
+            for timestamp, site, url, name, category, price, original_price in zip(
+                    columns['timestamp'], columns['site'], columns['url'], columns['name'],
+                    columns['category'], columns['price'], columns['original_price']):
+                if (timestamp, site) != run:
+                    if batch is not None:
+                        alerts.extend(self._replay(batch))
+                    run = (timestamp, site)
+                    batch = ProductBatch(timestamp)
+                batch.append(name, price, original_price, url, site, category)
+        if batch is not None:
+            alerts.extend(self._replay(batch))
+        return alerts
+
+    def _replay(self, batch: ProductBatch) -> List[PriceAlert]:
+        """Analyse un lot historique; les alertes sont datées de l'exécution d'origine."""
+        return [replace(alert, timestamp=batch.timestamp) for alert in self.analyze_batch(batch)]
+
     def _update_category_stats(self, products: List[Product]) -> None:
         """Met à jour les statistiques de prix par catégorie."""
         category_prices: Dict[str, List[float]] = {}
@@ -49,65 +187,103 @@ class PriceAnalyzer:
 
         # Calcul des statistiques
         for category, prices in category_prices.items():
-            if len(prices) > 1:  # Vérifie qu'il y a assez de données
-                self.category_stats[category] = {
-                    'mean': np.mean(prices),
-                    'std': np.std(prices),
-                    'median': np.median(prices),
-                    'q1': np.percentile(prices, 25),
-                    'q3': np.percentile(prices, 75)
-                }
+            self._set_category_stats(category, prices)
+
+    def _update_category_stats_batch(self, batch: ProductBatch) -> None:
+        """Met à jour les statistiques par catégorie à partir d'un lot colonnaire."""
+        codes = batch.category_codes
+        prices = batch.prices
+        for code, category in enumerate(batch.categories):
+            self._set_category_stats(category, prices[codes == code])
+
+    def _set_category_stats(self, category: str, prices) -> None:
+        """Calcule les statistiques d'une catégorie."""
+        if len(prices) > 1:  # Vérifie qu'il y a assez de données
+            self.category_stats[category] = {
+                'mean': np.mean(prices),
+                'std': np.std(prices),
+                'median': np.median(prices),
+                'q1': np.percentile(prices, 25),
+                'q3': np.percentile(prices, 75)
+            }
 
     def _analyze_product(self, product: Product) -> Optional[PriceAlert]:
-        """Analyse un produit individuel pour détecter les anomalies de prix."""
-        if product.category not in self.category_stats:
+        """Applique les règles d'alerte à un produit individuel."""
+        matched, confidences, differences = self.rules.evaluate(BatchFeatures.from_products(
+            [product], self.category_stats, self.price_history.stats([product.url])))
+        return self._rule_alert(product, matched[0], confidences[0], differences[0], datetime.now())
+
+    def _rule_alert(self, product: Product, rule: int, confidence: float,
+                    price_difference: float, timestamp: datetime) -> Optional[PriceAlert]:
+        """Construit l'alerte de la règle retenue pour un produit (None si aucune)."""
+        if rule < 0:
             return None
+        return PriceAlert(
+            product=product,
+            confidence=float(confidence),
+            price_difference=float(price_difference),
+            timestamp=timestamp,
+            alert_type=self.rules.rules[rule].alert_type
+        )
 
-        stats = self.category_stats[product.category]
-        price = product.price
-
-        # Calcul du score d'anomalie
-        z_score = (price - stats['mean']) / stats['std'] if stats['std'] > 0 else 0
-        iqr = stats['q3'] - stats['q1']
-        price_difference = 0
-
-        # Détection des prix anormalement bas
-        if price < stats['q1'] - 1.5 * iqr:
-            confidence = min(abs(z_score) / 3, 1.0)  # Normalisation de la confiance
-            price_difference = stats['median'] - price
-            
-            return PriceAlert(
-                product=product,
-                confidence=confidence,
-                price_difference=price_difference,
-                timestamp=datetime.now(),
-                alert_type='low_price'
-            )
-
-        # Détection des baisses de prix significatives
-        if product.original_price and product.original_price > 0:
-            price_drop_ratio = (product.original_price - price) / product.original_price
-            if price_drop_ratio > 0.5:  # Baisse de plus de 50%
-                confidence = min(price_drop_ratio, 1.0)
-                price_difference = product.original_price - price
-                
-                return PriceAlert(
-                    product=product,
-                    confidence=confidence,
-                    price_difference=price_difference,
-                    timestamp=datetime.now(),
-                    alert_type='price_drop'
-                )
+    def _cross_site_alert(self, product: Product, url: str, price: float,
+                          timestamp: datetime) -> Optional[PriceAlert]:
+        """Compare le prix au prix médian du même article sous d'autres URLs."""
+        gap = self._cross_site_gap(url, price)
+        if gap is None:
+            return None
+        reference, ratio = gap
+        return PriceAlert(
+            product=product,
+            confidence=min(ratio, 1.0),
+            price_difference=reference - price,
+            timestamp=timestamp,
+            alert_type='cross_site'
+        )
 
-        return None
+    def _cross_site_gap(self, url: str, price: float):
+        """Renvoie (prix de référence, écart relatif) si le prix est anormalement bas, sinon None."""
+        if self.matcher is None:
+            return None
+        references = self.matcher.reference_prices(url)
+        if not references:
+            return None
+        reference = float(np.median(references))
+        if reference <= 0:
+            return None
+        ratio = (reference - price) / reference
+        if ratio < CROSS_SITE_MIN_GAP:
+            return None
+        return reference, ratio
 
     def _is_price_history_anomaly(self, product_id: str, price: float) -> bool:
         """Vérifie si le prix est une anomalie basée sur l'historique."""
-        if product_id not in self.price_history or len(self.price_history[product_id]) < 5:
-            return False
-
-        # Utilisation de Isolation Forest pour la détection d'anomalies
-        prices = np.array(self.price_history[product_id]).reshape(-1, 1)
-        self.model.fit(prices)
-        prediction = self.model.predict([[price]])
-        return prediction[0] == -1  # -1 indique une anomalie
\ No newline at end of file
+        anomalies, _, _ = self._score_price_history([product_id], np.array([price]))
+        return bool(anomalies[0])
+
+    def _score_price_history(self, urls: Sequence[str], prices: np.ndarray,
+                             stats: Optional[Dict[str, np.ndarray]] = None
+                             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Compare chaque prix à l'historique de son produit (médiane/MAD et bandes EWMA).
+
+        Renvoie, pour chaque produit, l'indicateur d'anomalie, la confiance et
+        l'écart à la médiane historique.
+        """
+        if stats is None:
+            stats = self.price_history.stats(urls)
+        median = stats['median']
+        floor = np.abs(median) * HISTORY_MIN_SPREAD
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1.4826 * MAD estime l'écart-type pour une distribution normale
+            robust_z = (prices - median) / np.maximum(1.4826 * stats['mad'], floor)
+            ewma_z = (prices - stats['ewma_mean']) / np.maximum(stats['ewma_std'], floor)
+
+        # Seuls les prix anormalement bas nous intéressent
+        anomalies = ((stats['count'] >= HISTORY_MIN_POINTS)
+                     & (robust_z <= -HISTORY_MAD_THRESHOLD)
+                     & (ewma_z <= -HISTORY_EWMA_THRESHOLD))
+        confidences = np.where(anomalies,
+                               np.minimum(np.abs(robust_z) / (2 * HISTORY_MAD_THRESHOLD), 1.0), 0.0)
+        differences = np.where(anomalies, median - prices, 0.0)
+        return anomalies, confidences, differences
\ No newline at end of file
@@ -0,0 +1,136 @@
+from typing import Dict, List, Sequence
+import numpy as np
+
+class PriceHistoryStore:
+    """Historique récent des prix par produit, stocké en colonnes.
+
+    Chaque produit occupe une ligne d'un tampon circulaire (les `window` derniers
+    prix) et garde une moyenne/variance mobiles exponentielles (EWMA) mises à jour
+    à chaque prix: le score d'un lot entier se calcule sans boucle par produit.
+    """
+
+    def __init__(self, window: int = 30, alpha: float = 0.2, capacity: int = 1024):
+        self.window = window
+        self.alpha = alpha
+        self._index: Dict[str, int] = {}
+        self._values = np.full((capacity, window), np.nan)
+        self._position = np.zeros(capacity, dtype=np.int64)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._ewma_mean = np.zeros(capacity)
+        self._ewma_var = np.zeros(capacity)
+
+    def update(self, urls: Sequence[str], prices: Sequence[float]) -> None:
+        """Ajoute le prix courant de chaque produit à son historique."""
+        rows = self._rows(urls, create=True)
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(np.unique(rows)) < len(rows):
+            # Un même produit plusieurs fois dans le lot: ses prix sont ajoutés dans l'ordre
+            for url, price in zip(urls, prices):
+                self.update([url], [price])
+            return
+
+        self._values[rows, self._position[rows]] = prices
+        self._position[rows] = (self._position[rows] + 1) % self.window
+
+        # EWMA incrémentale; le premier prix initialise la moyenne
+        first = self._count[rows] == 0
+        delta = prices - self._ewma_mean[rows]
+        mean = np.where(first, prices, self._ewma_mean[rows] + self.alpha * delta)
+        var = np.where(first, 0.0, (1 - self.alpha) * (self._ewma_var[rows] + self.alpha * delta ** 2))
+        self._ewma_mean[rows] = mean
+        self._ewma_var[rows] = var
+        self._count[rows] = np.minimum(self._count[rows] + 1, self.window)
+
+    def seed(self, url: str, prices: Sequence[float]) -> None:
+        """Charge un historique existant (du plus ancien au plus récent), par exemple depuis la base."""
+        for price in prices:
+            self.update([url], [price])
+
+    def stats(self, urls: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Médiane, MAD, EWMA et nombre de points de l'historique de chaque produit (NaN si inconnu)."""
+        rows = self._rows(urls)
+        known = rows >= 0
+        n = len(urls)
+        result = {
+            'count': np.zeros(n, dtype=np.int64),
+            'median': np.full(n, np.nan),
+            'mad': np.full(n, np.nan),
+            'ewma_mean': np.full(n, np.nan),
+            'ewma_std': np.full(n, np.nan)
+        }
+        if not known.any():
+            return result
+
+        known_rows = rows[known]
+        window = self._values[known_rows]
+        median = _nanmedian(window)
+        result['count'][known] = self._count[known_rows]
+        result['median'][known] = median
+        result['mad'][known] = _nanmedian(np.abs(window - median[:, None]))
+        result['ewma_mean'][known] = self._ewma_mean[known_rows]
+        result['ewma_std'][known] = np.sqrt(self._ewma_var[known_rows])
+        return result
+
+    def volatility(self, urls: Sequence[str]) -> np.ndarray:
+        """Coefficient de variation des prix récents de chaque produit (0 si inconnu)."""
+        rows = self._rows(urls)
+        result = np.zeros(len(urls))
+        known = rows >= 0
+        if known.any():
+            window = self._values[rows[known]]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[known] = np.nan_to_num(_nanstd(window) / _nanmean(window))
+        return result
+
+    def prices(self, url: str) -> List[float]:
+        """Prix récents d'un produit, du plus ancien au plus récent."""
+        row = self._index.get(url)
+        if row is None:
+            return []
+        ordered = np.roll(self._values[row], -self._position[row])
+        return [float(price) for price in ordered if not np.isnan(price)]
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _rows(self, urls: Sequence[str], create: bool = False) -> np.ndarray:
+        if create:
+            for url in urls:
+                if url not in self._index:
+                    self._index[url] = len(self._index)
+            self._grow(len(self._index))
+        return np.fromiter((self._index.get(url, -1) for url in urls), dtype=np.int64, count=len(urls))
+
+    def _grow(self, size: int) -> None:
+        capacity = len(self._count)
+        if size <= capacity:
+            return
+        new_capacity = max(size, capacity * 2)
+        extra = new_capacity - capacity
+        self._values = np.vstack([self._values, np.full((extra, self.window), np.nan)])
+        self._position = np.concatenate([self._position, np.zeros(extra, dtype=np.int64)])
+        self._count = np.concatenate([self._count, np.zeros(extra, dtype=np.int64)])
+        self._ewma_mean = np.concatenate([self._ewma_mean, np.zeros(extra)])
+        self._ewma_var = np.concatenate([self._ewma_var, np.zeros(extra)])
+
+def _nanmedian(values: np.ndarray) -> np.ndarray:
+    # Les lignes entièrement vides sont rares mais ne doivent pas lever d'avertissement
+    with np.errstate(all='ignore'):
+        filled = ~np.isnan(values).all(axis=1)
+        result = np.full(len(values), np.nan)
+        if filled.any():
+            result[filled] = np.nanmedian(values[filled], axis=1)
+        return result
+
+def _nanmean(values: np.ndarray) -> np.ndarray:
+    counts = (~np.isnan(values)).sum(axis=1)
+    return np.where(counts > 0, np.nansum(values, axis=1) / np.maximum(counts, 1), np.nan)
+
+def _nanstd(values: np.ndarray) -> np.ndarray:
+    mean = _nanmean(values)
+    counts = (~np.isnan(values)).sum(axis=1)
+    squared = np.nansum((values - mean[:, None]) ** 2, axis=1)
+    return np.where(counts > 0, np.sqrt(squared / np.maximum(counts, 1)), np.nan)
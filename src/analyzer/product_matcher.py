@@ -0,0 +1,139 @@
+import re
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+from scraper.category_matcher import normalize_text
+
+# Nombre premier de Mersenne 2^31 - 1: (a * x + b) tient dans 64 bits pour x < 2^32
+_PRIME = (1 << 31) - 1
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_NUMBERS = re.compile(r'\d+')
+
+class ProductMatcher:
+    """Regroupe les annonces d'un même article (sur un ou plusieurs sites) par MinHash/LSH.
+
+    Chaque nom est réduit à une signature MinHash de ses trigrammes de caractères.
+    Les signatures sont découpées en bandes indexées dans des tables de hachage:
+    les candidats d'une nouvelle annonce sont trouvés sans parcourir le catalogue,
+    puis confirmés par la similarité de Jaccard estimée. Les nombres du nom (modèle,
+    capacité...) font partie de la clé des bandes: 'Galaxy S23' et 'Galaxy S24' ne
+    sont jamais candidats l'un de l'autre.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.6,
+                 shingle_size: int = 3, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint64)
+        self._item_by_url: Dict[str, int] = {}
+        self._urls: List[str] = []
+        self._sites: List[str] = []
+        self._prices: List[float] = []
+        # Union-find: chaque groupe est représenté par son élément racine
+        self._parent: List[int] = []
+        self._members: Dict[int, List[int]] = {}
+
+    def add(self, name: str, url: str, site: str, price: float) -> int:
+        """Indexe une annonce (ou met à jour son prix) et renvoie l'identifiant de son article canonique."""
+        item = self._item_by_url.get(url)
+        if item is not None:
+            self._prices[item] = price
+            return self._find(item)
+
+        signature = self.signature(name)
+        keys = self._band_keys(signature, self._block(name))
+        item = len(self._urls)
+        self._item_by_url[url] = item
+        self._urls.append(url)
+        self._sites.append(site)
+        self._prices.append(price)
+        self._parent.append(item)
+        self._members[item] = [item]
+        if item >= len(self._signatures):
+            self._signatures = np.vstack([self._signatures, np.zeros_like(self._signatures)])
+        self._signatures[item] = signature
+
+        candidates = self._candidates(keys)
+        if candidates:
+            # Similarité de Jaccard estimée avec tous les candidats en une opération
+            similarity = (self._signatures[candidates] == signature).mean(axis=1)
+            for candidate in np.asarray(candidates)[similarity >= self.threshold]:
+                self._union(item, int(candidate))
+
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(item)
+        return self._find(item)
+
+    def canonical_id(self, url: str) -> Optional[int]:
+        """Identifiant de l'article canonique d'une annonce déjà indexée."""
+        item = self._item_by_url.get(url)
+        return None if item is None else self._find(item)
+
+    def matches(self, url: str) -> List[str]:
+        """URLs des autres annonces regroupées avec celle-ci."""
+        item = self._item_by_url.get(url)
+        if item is None:
+            return []
+        return [self._urls[other] for other in self._members[self._find(item)] if other != item]
+
+    def reference_prices(self, url: str) -> List[float]:
+        """Derniers prix connus du même article sous d'autres URLs (autres sites compris)."""
+        item = self._item_by_url.get(url)
+        if item is None:
+            return []
+        return [self._prices[other] for other in self._members[self._find(item)] if other != item]
+
+    def signature(self, name: str) -> np.ndarray:
+        """Signature MinHash du nom normalisé."""
+        text = _NON_ALNUM.sub(' ', normalize_text(name)).strip()
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def _block(self, name: str) -> bytes:
+        return ' '.join(sorted(set(_NUMBERS.findall(normalize_text(name))))).encode('ascii')
+
+    def _band_keys(self, signature: np.ndarray, block: bytes) -> List[bytes]:
+        return [block + b'|' + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+    def _candidates(self, keys: List[bytes]) -> List[int]:
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        return sorted(candidates)
+
+    def _find(self, item: int) -> int:
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # Compression de chemin
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def _union(self, first: int, second: int) -> None:
+        first, second = self._find(first), self._find(second)
+        if first == second:
+            return
+        # Le groupe le plus ancien garde son identifiant: les identifiants déjà renvoyés restent valides
+        if second < first:
+            first, second = second, first
+        self._parent[second] = first
+        self._members[first].extend(self._members.pop(second))
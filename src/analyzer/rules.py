@@ -0,0 +1,252 @@
+import json
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import numpy as np
+from scraper.product import Product, ProductBatch
+from monitoring.metrics import metrics
+
+RULE_MATCHES = metrics.counter('alert_rule_matches_total', "Produits retenus par chaque règle d'alerte")
+
+OPERATORS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne
+}
+
+# Lissage de la sélectivité observée de chaque condition (part des lignes retenues)
+SELECTIVITY_ALPHA = 0.2
+# Dispersion minimale des z-scores d'historique (fraction de la médiane), comme HISTORY_MIN_SPREAD
+HISTORY_SPREAD_FLOOR = 0.01
+
+class BatchFeatures:
+    """Colonnes dérivées d'un lot (écarts, z-scores...), calculées à la première utilisation.
+
+    Une colonne vaut NaN lorsque sa donnée manque (catégorie sans statistiques,
+    prix original absent, produit sans historique): toute comparaison est alors fausse.
+    """
+
+    def __init__(self, prices: np.ndarray, original_prices: np.ndarray,
+                 site_codes: np.ndarray, sites: List[str],
+                 category_codes: np.ndarray, categories: List[str],
+                 category_stats: Dict[str, Dict[str, float]], history_stats: Dict[str, np.ndarray]):
+        self.prices = prices
+        self.original_prices = original_prices
+        self.site_codes = site_codes
+        self.sites = sites
+        self.category_codes = category_codes
+        self.categories = categories
+        self.category_stats = category_stats
+        self.history_stats = history_stats
+        self._columns: Dict[str, np.ndarray] = {}
+        self._codes: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+
+    @classmethod
+    def from_batch(cls, batch: ProductBatch, category_stats: Dict[str, Dict[str, float]],
+                   history_stats: Dict[str, np.ndarray]) -> 'BatchFeatures':
+        """Colonnes d'un lot colonnaire (vues sans copie)."""
+        return cls(batch.prices, batch.original_prices, batch.site_codes, batch.sites,
+                   batch.category_codes, batch.categories, category_stats, history_stats)
+
+    @classmethod
+    def from_products(cls, products: Sequence[Product], category_stats: Dict[str, Dict[str, float]],
+                      history_stats: Dict[str, np.ndarray]) -> 'BatchFeatures':
+        """Colonnes d'une liste de produits (sans copier noms ni URLs)."""
+        n = len(products)
+        site_index: Dict[str, int] = {}
+        category_index: Dict[str, int] = {}
+        return cls(
+            np.fromiter((product.price for product in products), np.float64, n),
+            np.fromiter((np.nan if product.original_price is None else product.original_price
+                         for product in products), np.float64, n),
+            np.fromiter((site_index.setdefault(product.site, len(site_index))
+                         for product in products), np.uint32, n),
+            list(site_index),
+            np.fromiter((category_index.setdefault(product.category, len(category_index))
+                         for product in products), np.uint32, n),
+            list(category_index),
+            category_stats, history_stats
+        )
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = FEATURES[name](self)
+        return column
+
+    def __len__(self) -> int:
+        return len(self.site_codes)
+
+    def codes(self, kind: str, names: Tuple[str, ...]) -> np.ndarray:
+        """Codes du lot correspondant à des sites ou catégories (absents du lot ignorés)."""
+        key = (kind, names)
+        codes = self._codes.get(key)
+        if codes is None:
+            table = self.sites if kind == 'sites' else self.categories
+            codes = self._codes[key] = np.array(
+                [code for code, value in enumerate(table) if value in names], dtype=np.uint32)
+        return codes
+
+    def _category_column(self, stat: str) -> np.ndarray:
+        table = np.full(len(self.categories), np.nan)
+        for code, category in enumerate(self.categories):
+            stats = self.category_stats.get(category)
+            if stats:
+                table[code] = stats[stat]
+        return table[self.category_codes]
+
+def _z_score(f: BatchFeatures) -> np.ndarray:
+    std = f['category_std']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, (f['price'] - f['category_mean']) / std, 0.0)
+
+def _iqr_score(f: BatchFeatures) -> np.ndarray:
+    # Nombre d'écarts interquartiles sous Q1: prix < Q1 - k*IQR <=> iqr_score > k
+    q1 = f['category_q1']
+    iqr = f['category_q3'] - q1
+    below = q1 - f['price']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # IQR nul: seul le signe compte (NaN pour un prix égal à Q1 ou une catégorie inconnue)
+        return np.where(iqr > 0, below / iqr, np.where(iqr == 0, np.sign(below) * np.inf, np.nan))
+
+def _drop_ratio(f: BatchFeatures) -> np.ndarray:
+    original = f['original_price']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(original > 0, (original - f['price']) / original, np.nan)
+
+def _history_z(f: BatchFeatures, center: np.ndarray, spread: np.ndarray) -> np.ndarray:
+    floor = np.abs(f['history_median']) * HISTORY_SPREAD_FLOOR
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (f['price'] - center) / np.maximum(spread, floor)
+
+FEATURES: Dict[str, Callable[[BatchFeatures], np.ndarray]] = {
+    'price': lambda f: f.prices,
+    'original_price': lambda f: f.original_prices,
+    'discount': lambda f: f['original_price'] - f['price'],
+    'drop_ratio': _drop_ratio,
+    'category_mean': lambda f: f._category_column('mean'),
+    'category_std': lambda f: f._category_column('std'),
+    'category_median': lambda f: f._category_column('median'),
+    'category_q1': lambda f: f._category_column('q1'),
+    'category_q3': lambda f: f._category_column('q3'),
+    'z_score': _z_score,
+    'iqr_score': _iqr_score,
+    'median_gap': lambda f: f['category_median'] - f['price'],
+    'history_count': lambda f: f.history_stats['count'].astype(np.float64),
+    'history_median': lambda f: f.history_stats['median'],
+    'history_gap': lambda f: f['history_median'] - f['price'],
+    'history_z': lambda f: _history_z(f, f['history_median'], 1.4826 * f.history_stats['mad']),
+    'ewma_z': lambda f: _history_z(f, f.history_stats['ewma_mean'], f.history_stats['ewma_std'])
+}
+
+class Condition:
+    """Prédicat vectorisé d'une règle; sa sélectivité observée fixe son rang d'évaluation."""
+
+    def __init__(self, description: str, test: Callable[[BatchFeatures, np.ndarray], np.ndarray]):
+        self.description = description
+        self.test = test
+        self.selectivity = 0.5
+
+    def filter(self, features: BatchFeatures, rows: np.ndarray) -> np.ndarray:
+        """Renvoie les lignes (indices) qui satisfont la condition."""
+        kept = rows[self.test(features, rows)]
+        self.selectivity += SELECTIVITY_ALPHA * (len(kept) / len(rows) - self.selectivity)
+        return kept
+
+@dataclass
+class AlertRule:
+    name: str
+    alert_type: str
+    conditions: List[Condition]
+    confidence_feature: str
+    confidence_scale: float
+    difference_feature: str
+
+    def select(self, features: BatchFeatures, rows: np.ndarray) -> np.ndarray:
+        """Lignes satisfaisant toutes les conditions, les plus sélectives évaluées d'abord."""
+        for condition in sorted(self.conditions, key=lambda c: c.selectivity):
+            rows = condition.filter(features, rows)
+            if not len(rows):
+                break
+        return rows
+
+class RuleEngine:
+    """Règles d'alerte déclaratives, compilées une fois en prédicats vectorisés sur un lot.
+
+    Les règles sont essayées dans l'ordre de la configuration: une ligne retenue par
+    une règle n'est plus proposée aux suivantes. Dans une règle, les conditions sont
+    évaluées de la plus sélective à la moins sélective, chacune sur les seules lignes
+    encore candidates.
+    """
+
+    def __init__(self, rules: Sequence[AlertRule]):
+        self.rules = list(rules)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RuleEngine':
+        """Compile une configuration {"rules": [...]} (voir alert_rules.json)."""
+        return cls([_compile_rule(rule) for rule in config['rules']])
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RuleEngine':
+        """Charge les règles depuis un fichier JSON."""
+        with open(path, encoding='utf-8') as rules_file:
+            return cls.from_config(json.load(rules_file))
+
+    def evaluate(self, features: BatchFeatures) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Renvoie, par ligne, l'indice de la règle retenue (-1 sinon), la confiance et l'écart de prix."""
+        n = len(features)
+        matched = np.full(n, -1, dtype=np.int64)
+        confidences = np.zeros(n)
+        differences = np.zeros(n)
+        remaining = np.arange(n)
+        for index, rule in enumerate(self.rules):
+            if not len(remaining):
+                break
+            rows = rule.select(features, remaining)
+            if not len(rows):
+                continue
+            matched[rows] = index
+            confidences[rows] = np.minimum(
+                np.abs(features[rule.confidence_feature][rows]) / rule.confidence_scale, 1.0)
+            differences[rows] = features[rule.difference_feature][rows]
+            remaining = remaining[matched[remaining] < 0]
+            RULE_MATCHES.inc(len(rows), rule=rule.name)
+        return matched, confidences, differences
+
+def _compile_rule(config: Dict[str, Any]) -> AlertRule:
+    name = config['name']
+    conditions = []
+    for kind in ('sites', 'categories'):
+        if config.get(kind):
+            conditions.append(_scope_condition(kind, tuple(config[kind])))
+    for feature, comparisons in config.get('when', {}).items():
+        _check_feature(name, feature)
+        for symbol, value in comparisons.items():
+            if symbol not in OPERATORS:
+                raise ValueError(f"Règle {name}: opérateur inconnu {symbol}")
+            conditions.append(_feature_condition(feature, OPERATORS[symbol], symbol, float(value)))
+    if not conditions:
+        raise ValueError(f"Règle {name}: aucune condition")
+
+    confidence = config.get('confidence', {'feature': 'drop_ratio', 'scale': 1.0})
+    difference = config.get('difference', 'discount')
+    _check_feature(name, confidence['feature'])
+    _check_feature(name, difference)
+    return AlertRule(name=name, alert_type=config['alert_type'], conditions=conditions,
+                     confidence_feature=confidence['feature'],
+                     confidence_scale=float(confidence.get('scale', 1.0)),
+                     difference_feature=difference)
+
+def _check_feature(rule: str, feature: str) -> None:
+    if feature not in FEATURES:
+        raise ValueError(f"Règle {rule}: colonne inconnue {feature}")
+
+def _feature_condition(feature: str, compare: Callable, symbol: str, value: float) -> Condition:
+    return Condition(f"{feature} {symbol} {value}",
+                     lambda features, rows: compare(features[feature][rows], value))
+
+def _scope_condition(kind: str, names: Tuple[str, ...]) -> Condition:
+    column = 'site_codes' if kind == 'sites' else 'category_codes'
+    return Condition(f"{kind} in {names}",
+                     lambda features, rows: np.isin(getattr(features, column)[rows],
+                                                    features.codes(kind, names)))
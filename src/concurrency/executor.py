@@ -0,0 +1,99 @@
+import asyncio
+import functools
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from monitoring.metrics import metrics
+
+EXECUTOR_WAIT_SECONDS = metrics.histogram('blocking_wait_seconds', "Attente d'une place dans l'exécuteur bloquant")
+EXECUTOR_CALL_SECONDS = metrics.histogram('blocking_call_seconds', "Durée des appels bloquants exécutés en thread")
+EXECUTOR_TIMEOUTS = metrics.counter('blocking_timeouts_total', 'Appels bloquants abandonnés après le délai')
+
+# Valeur sentinelle: délai de l'exécuteur (None désactive le délai d'un appel)
+DEFAULT_TIMEOUT = object()
+
+class BlockingExecutor:
+    """Exécute du code bloquant (psycopg2, smtplib...) dans un pool de threads borné.
+
+    Au plus max_workers appels s'exécutent en même temps et max_queue attendent un
+    thread; au-delà, l'appelant patiente (contre-pression) sans bloquer la boucle
+    asyncio. Un appel qui dépasse son délai lève TimeoutError; son thread ne peut
+    pas être interrompu, sa place n'est donc libérée qu'à la fin réelle de l'appel.
+    """
+
+    def __init__(self, name: str = 'blocking', max_workers: int = 8, max_queue: int = 64,
+                 timeout: Optional[float] = 30.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Un sémaphore par boucle: asyncio.Semaphore est lié à la boucle qui l'utilise
+        self._slots: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+        self.pending = 0
+
+    async def run(self, func: Callable, *args, timeout: Any = DEFAULT_TIMEOUT, **kwargs) -> Any:
+        """Exécute func(*args, **kwargs) dans un thread et attend son résultat.
+
+        timeout=None attend la fin de l'appel sans limite: à réserver aux écritures
+        qui ne doivent pas être abandonnées puis retentées pendant qu'elles s'exécutent.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            EXECUTOR_TIMEOUTS.inc(executor=self.name)
+            raise
+
+        self.pending += 1
+        future = loop.run_in_executor(self._executor(), functools.partial(
+            self._call, func, args, kwargs, start))
+
+        def release(_):
+            self.pending -= 1
+            slots.release()
+        future.add_done_callback(release)
+
+        remaining = None if timeout is None else max(timeout - (time.perf_counter() - start), 0)
+        try:
+            # shield: un délai dépassé abandonne l'attente, pas le suivi de la fin du thread
+            return await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            EXECUTOR_TIMEOUTS.inc(executor=self.name)
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Arrête le pool (recréé au prochain appel)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix=self.name)
+        return self._pool
+
+    def _call(self, func: Callable, args: tuple, kwargs: dict, submitted: float) -> Any:
+        started = time.perf_counter()
+        EXECUTOR_WAIT_SECONDS.observe(started - submitted, executor=self.name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            EXECUTOR_CALL_SECONDS.observe(time.perf_counter() - started, executor=self.name)
+
+# Exécuteur partagé par la base de données et les notifications, configuré par l'environnement
+blocking = BlockingExecutor(
+    max_workers=int(os.getenv('BLOCKING_MAX_WORKERS', '8')),
+    max_queue=int(os.getenv('BLOCKING_MAX_QUEUE', '64')),
+    timeout=float(os.getenv('BLOCKING_TIMEOUT', '30')) or None
+)
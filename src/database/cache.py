@@ -0,0 +1,140 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Valeur sentinelle: None est une valeur valide en cache
+MISSING = object()
+
+class TTLCache:
+    """Cache en mémoire borné (LRU) dont les entrées expirent après ttl secondes."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Renvoie la valeur en cache, ou MISSING si elle est absente ou expirée."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires, value = entry
+            if expires <= self.clock():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SharedCache:
+    """Cache partagé entre processus via un serveur compatible Redis (GET/SETEX/DELETE).
+
+    Un cache local TTLCache est consulté en premier; une invalidation efface les
+    deux niveaux, mais les caches locaux des autres processus gardent leur copie
+    jusqu'à l'expiration de leur TTL.
+    """
+
+    def __init__(self, client, local: Optional[TTLCache] = None, ttl: float = 30.0,
+                 prefix: str = 'price_analyzer:'):
+        self.client = client
+        self.local = local or TTLCache(ttl=ttl)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        try:
+            payload = self.client.get(self.prefix + key)
+        except Exception as e:
+            print(f"Erreur lors de la lecture du cache partagé: {str(e)}")
+            return MISSING
+        if payload is None:
+            return MISSING
+        value = pickle.loads(payload)
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        try:
+            self.client.setex(self.prefix + key, max(int(self.ttl), 1), pickle.dumps(value))
+        except Exception as e:
+            print(f"Erreur lors de l'écriture du cache partagé: {str(e)}")
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self.local.delete(keys)
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except Exception as e:
+            print(f"Erreur lors de l'invalidation du cache partagé: {str(e)}")
+
+    def clear(self) -> None:
+        self.local.clear()
+
+def cache_from_env():
+    """Construit le cache de lecture configuré par DB_CACHE_TTL, DB_CACHE_SIZE et REDIS_URL.
+
+    DB_CACHE_TTL=0 désactive le cache (None).
+    """
+    ttl = float(os.getenv('DB_CACHE_TTL', '30'))
+    if ttl <= 0:
+        return None
+    local = TTLCache(maxsize=int(os.getenv('DB_CACHE_SIZE', '1024')), ttl=ttl)
+
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return local
+    try:
+        # Module optionnel, seulement nécessaire pour partager le cache entre processus
+        import redis
+        return SharedCache(redis.Redis.from_url(redis_url), local=local, ttl=ttl)
+    except Exception as e:
+        print(f"Erreur lors de la connexion au cache partagé, cache local utilisé: {str(e)}")
+        return local
+
+# Caches du processus, un par configuration (DB_CACHE_TTL, DB_CACHE_SIZE, REDIS_URL)
+_shared_caches: Dict[Tuple[str, str, Optional[str]], Any] = {}
+_shared_lock = threading.Lock()
+
+def shared_cache_from_env():
+    """Cache de lecture du processus pour la configuration de l'environnement.
+
+    Construit au premier appel par cache_from_env, puis partagé: une écriture d'un
+    DatabaseManager invalide les lectures de tous ceux du processus.
+    """
+    config = (os.getenv('DB_CACHE_TTL', '30'), os.getenv('DB_CACHE_SIZE', '1024'),
+              os.getenv('REDIS_URL'))
+    with _shared_lock:
+        if config not in _shared_caches:
+            _shared_caches[config] = cache_from_env()
+        return _shared_caches[config]
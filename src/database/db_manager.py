@@ -1,14 +1,55 @@
 import psycopg2
-from psycopg2.extras import DictCursor
-from typing import List, Dict, Optional
+from psycopg2.extras import DictCursor, execute_values
+from typing import TYPE_CHECKING, Iterable, List, Dict, Optional, Sequence
 from datetime import datetime
 import os
+import time
 from dotenv import load_dotenv
-from scraper.scraper import Product
-from analyzer.price_analyzer import PriceAlert
+from scraper.product import Product, ProductBatch
+from database.cache import MISSING, shared_cache_from_env
+from monitoring.metrics import metrics
+
+if TYPE_CHECKING:
+    from analyzer.price_analyzer import PriceAlert
+
+DB_SECONDS = metrics.histogram('db_operation_seconds', "Durée des opérations d'écriture en base")
+DB_ROWS_WRITTEN = metrics.counter('db_rows_written_total', 'Lignes écrites en base')
+DB_ERRORS = metrics.counter('db_errors_total', 'Erreurs de base de données')
+DB_CACHE_HITS = metrics.counter('db_cache_hits_total', 'Lectures servies par le cache')
+DB_CACHE_MISSES = metrics.counter('db_cache_misses_total', 'Lectures envoyées à la base')
+DB_ROWS_EXPORTED = metrics.counter('db_rows_exported_total', 'Lignes exportées en Parquet')
+
+RECENT_ALERTS_KEY = 'recent_alerts'
+
+# Requêtes d'export incrémental (colonnes dans l'ordre de parquet_store.EXPORT_COLUMNS)
+_EXPORT_SELECTS = {
+    'price_history': ("""
+    SELECT ph.id, ph.product_id, p.url, p.name, p.site, p.category, ph.price::float8,
+           ph.original_price::float8, ph.timestamp
+    FROM price_history ph
+    JOIN products p ON p.id = ph.product_id
+    """, 'ph'),
+    'alerts': ("""
+    SELECT a.id, a.product_id, p.url, p.name, p.site, p.category, a.alert_type, a.price::float8,
+           a.original_price::float8, a.confidence::float8, a.price_difference::float8, a.timestamp
+    FROM alerts a
+    JOIN products p ON p.id = a.product_id
+    """, 'a')
+}
+# Lignes au-delà du watermark, puis lignes des intervalles d'ids encore manquants (index sur id)
+EXPORT_QUERIES = {
+    table: f"""{select}WHERE {alias}.id > %s
+    UNION ALL{select}JOIN unnest(%s::bigint[], %s::bigint[]) AS gap(lo, hi)
+      ON {alias}.id BETWEEN gap.lo AND gap.hi
+    ORDER BY 1
+    """
+    for table, (select, alias) in _EXPORT_SELECTS.items()
+}
+# Durée pendant laquelle un id sauté est redemandé (au-delà: transaction annulée)
+EXPORT_GAP_SECONDS = 3600
 
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, cache=MISSING):
         load_dotenv()
         self.conn_params = {
             'dbname': os.getenv('DB_NAME', 'price_analyzer'),
@@ -17,6 +58,12 @@ class DatabaseManager:
             'host': os.getenv('DB_HOST', 'localhost'),
             'port': os.getenv('DB_PORT', '5432')
         }
+        self._runs_table_ready = False
+        # Cache de lecture (TTLCache ou SharedCache), invalidé à chaque écriture; par défaut
+        # celui du processus configuré par l'environnement, None ou False le désactive
+        if cache is MISSING:
+            cache = shared_cache_from_env()
+        self.cache = None if cache is False else cache
         self._init_database()
 
     def _init_database(self) -> None:
@@ -42,8 +89,11 @@ class DatabaseManager:
                         id SERIAL PRIMARY KEY,
                         product_id INTEGER REFERENCES products(id),
                         price DECIMAL(10,2) NOT NULL,
+                        original_price DECIMAL(10,2),
                         timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
+                    );
+                    -- Bases créées avant l'ajout du prix original
+                    ALTER TABLE price_history ADD COLUMN IF NOT EXISTS original_price DECIMAL(10,2)
                     """)
 
                     # Table des alertes
@@ -63,6 +113,7 @@ class DatabaseManager:
         except Exception as e:
             print(f"Erreur lors de l'initialisation de la base de données: {str(e)}")
 
+    @metrics.timed(DB_SECONDS, operation='save_product')
     def save_product(self, product: Product) -> Optional[int]:
         """Sauvegarde un produit dans la base de données."""
         try:
@@ -85,21 +136,138 @@ class DatabaseManager:
                         RETURNING id
                         """, (product.name, product.url, product.site, product.category))
                         product_id = cur.fetchone()[0]
+                        DB_ROWS_WRITTEN.inc(table='products')
 
                     # Enregistre le prix actuel
                     cur.execute("""
-                    INSERT INTO price_history (product_id, price)
-                    VALUES (%s, %s)
-                    """, (product_id, product.price))
+                    INSERT INTO price_history (product_id, price, original_price)
+                    VALUES (%s, %s, %s)
+                    """, (product_id, product.price, product.original_price))
 
                     conn.commit()
+                    DB_ROWS_WRITTEN.inc(table='price_history')
+                    self._invalidate([product.url])
                     return product_id
 
         except Exception as e:
+            DB_ERRORS.inc(operation='save_product')
             print(f"Erreur lors de la sauvegarde du produit: {str(e)}")
             return None
 
-    def save_alert(self, alert: PriceAlert) -> None:
+    @metrics.timed(DB_SECONDS, operation='save_batch')
+    def save_batch(self, batch: ProductBatch) -> int:
+        """Sauvegarde un lot colonnaire en deux requêtes groupées et renvoie le nombre de prix enregistrés."""
+        if not len(batch):
+            return 0
+
+        try:
+            with psycopg2.connect(**self.conn_params) as conn:
+                with conn.cursor() as cur:
+                    product_ids, written = self._write_batch(cur, batch)
+                    conn.commit()
+                    self._invalidate(product_ids)
+                    return written
+
+        except Exception as e:
+            DB_ERRORS.inc(operation='save_batch')
+            print(f"Erreur lors de la sauvegarde du lot de produits: {str(e)}")
+            return 0
+
+    @metrics.timed(DB_SECONDS, operation='save_results')
+    def save_results(self, run_key: str, batch: ProductBatch, alerts: List['PriceAlert']) -> Optional[bool]:
+        """Enregistre les prix et alertes d'une exécution en une transaction, une seule fois par run_key.
+
+        Un worker qui rejoue une exécution déjà enregistrée (reprise après expiration
+        de son bail, nouvel essai après une erreur réseau) n'écrit rien. Renvoie False
+        si l'exécution avait déjà été enregistrée, None en cas d'erreur.
+        """
+        try:
+            with psycopg2.connect(**self.conn_params) as conn:
+                with conn.cursor() as cur:
+                    self._ensure_runs_table(cur)
+                    cur.execute("""
+                    INSERT INTO processed_runs (run_key)
+                    VALUES (%s)
+                    ON CONFLICT (run_key) DO NOTHING
+                    RETURNING run_key
+                    """, (run_key,))
+                    if cur.fetchone() is None:
+                        conn.rollback()
+                        return False
+
+                    product_ids = {}
+                    if len(batch):
+                        product_ids, _ = self._write_batch(cur, batch)
+
+                    rows = [
+                        (product_ids[alert.product.url], alert.product.price, alert.product.original_price,
+                         alert.confidence, alert.price_difference, alert.alert_type)
+                        for alert in alerts if alert.product.url in product_ids
+                    ]
+                    if rows:
+                        execute_values(cur, """
+                        INSERT INTO alerts (
+                            product_id, price, original_price, confidence,
+                            price_difference, alert_type
+                        )
+                        VALUES %s
+                        """, rows, page_size=1000)
+                        DB_ROWS_WRITTEN.inc(len(rows), table='alerts')
+
+                    conn.commit()
+                    self._invalidate(product_ids, alerts=bool(rows))
+                    return True
+
+        except Exception as e:
+            DB_ERRORS.inc(operation='save_results')
+            # La transaction annulée a pu emporter la création de la table
+            self._runs_table_ready = False
+            print(f"Erreur lors de la sauvegarde des résultats de {run_key}: {str(e)}")
+            return None
+
+    def _write_batch(self, cur, batch: ProductBatch):
+        """Upsert des produits puis insertion des prix d'un lot; renvoie ({url: id}, nombre de prix)."""
+        # Une ligne par URL pour l'upsert (ON CONFLICT ne peut toucher une ligne deux fois)
+        rows = {}
+        for i in range(len(batch)):
+            rows[batch.url(i)] = (batch.name(i), batch.url(i), batch.site(i), batch.category(i))
+
+        returned = execute_values(cur, """
+        INSERT INTO products (name, url, site, category)
+        VALUES %s
+        ON CONFLICT (url) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id, url
+        """, list(rows.values()), page_size=1000, fetch=True)
+        product_ids = {url: product_id for product_id, url in returned}
+
+        prices = batch.prices
+        history = [
+            (product_ids[batch.url(i)], float(prices[i]), batch.original_price(i), batch.timestamp)
+            for i in range(len(batch))
+        ]
+        execute_values(cur, """
+        INSERT INTO price_history (product_id, price, original_price, timestamp)
+        VALUES %s
+        """, history, page_size=1000)
+
+        DB_ROWS_WRITTEN.inc(len(returned), table='products')
+        DB_ROWS_WRITTEN.inc(len(history), table='price_history')
+        return product_ids, len(history)
+
+    def _ensure_runs_table(self, cur) -> None:
+        """Crée à la demande la table des exécutions déjà enregistrées (mode worker)."""
+        if self._runs_table_ready:
+            return
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS processed_runs (
+            run_key VARCHAR(255) PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        self._runs_table_ready = True
+
+    @metrics.timed(DB_SECONDS, operation='save_alert')
+    def save_alert(self, alert: 'PriceAlert') -> None:
         """Sauvegarde une alerte dans la base de données."""
         try:
             product_id = self.save_product(alert.product)
@@ -123,12 +291,20 @@ class DatabaseManager:
                         alert.alert_type
                     ))
                     conn.commit()
+                    DB_ROWS_WRITTEN.inc(table='alerts')
+                    self._invalidate([], alerts=True)
 
         except Exception as e:
+            DB_ERRORS.inc(operation='save_alert')
             print(f"Erreur lors de la sauvegarde de l'alerte: {str(e)}")
 
     def get_price_history(self, product_url: str) -> List[Dict]:
         """Récupère l'historique des prix d'un produit."""
+        key = self._history_key(product_url)
+        cached = self._cache_get(key, 'price_history')
+        if cached is not MISSING:
+            return [dict(row) for row in cached]
+
         try:
             with psycopg2.connect(**self.conn_params) as conn:
                 with conn.cursor(cursor_factory=DictCursor) as cur:
@@ -139,14 +315,58 @@ class DatabaseManager:
                     WHERE p.url = %s
                     ORDER BY ph.timestamp DESC
                     """, (product_url,))
-                    return [dict(row) for row in cur.fetchall()]
+                    history = [dict(row) for row in cur.fetchall()]
 
         except Exception as e:
             print(f"Erreur lors de la récupération de l'historique des prix: {str(e)}")
             return []
 
+        self._cache_set(key, history)
+        return [dict(row) for row in history]
+
+    def get_price_histories(self, product_urls: Iterable[str]) -> Dict[str, List[Dict]]:
+        """Récupère l'historique des prix de plusieurs produits, en une requête pour ceux absents du cache."""
+        histories = {}
+        missing = []
+        for url in dict.fromkeys(product_urls):
+            cached = self._cache_get(self._history_key(url), 'price_history')
+            if cached is MISSING:
+                missing.append(url)
+            else:
+                histories[url] = [dict(row) for row in cached]
+        if not missing:
+            return histories
+
+        try:
+            with psycopg2.connect(**self.conn_params) as conn:
+                with conn.cursor(cursor_factory=DictCursor) as cur:
+                    cur.execute("""
+                    SELECT p.url, ph.price, ph.timestamp
+                    FROM price_history ph
+                    JOIN products p ON p.id = ph.product_id
+                    WHERE p.url = ANY(%s)
+                    ORDER BY p.url, ph.timestamp DESC
+                    """, (missing,))
+                    fetched = {url: [] for url in missing}
+                    for row in cur.fetchall():
+                        fetched[row['url']].append({'price': row['price'], 'timestamp': row['timestamp']})
+
+        except Exception as e:
+            print(f"Erreur lors de la récupération des historiques de prix: {str(e)}")
+            return histories
+
+        for url, history in fetched.items():
+            self._cache_set(self._history_key(url), history)
+            histories[url] = [dict(row) for row in history]
+        return histories
+
     def get_recent_alerts(self, limit: int = 10) -> List[Dict]:
         """Récupère les alertes récentes."""
+        # Une seule entrée en cache: la liste la plus longue demandée sert aussi les limites inférieures
+        cached = self._cache_get(RECENT_ALERTS_KEY, 'recent_alerts')
+        if cached is not MISSING and cached[0] >= limit:
+            return [dict(row) for row in cached[1][:limit]]
+
         try:
             with psycopg2.connect(**self.conn_params) as conn:
                 with conn.cursor(cursor_factory=DictCursor) as cur:
@@ -157,8 +377,107 @@ class DatabaseManager:
                     ORDER BY a.timestamp DESC
                     LIMIT %s
                     """, (limit,))
+                    alerts = [dict(row) for row in cur.fetchall()]
+
+        except Exception as e:
+            print(f"Erreur lors de la récupération des alertes: {str(e)}")
+            return []
+
+        self._cache_set(RECENT_ALERTS_KEY, (limit, alerts))
+        return [dict(row) for row in alerts]
+
+    def get_alerts_since(self, since: datetime) -> List[Dict]:
+        """Récupère les alertes enregistrées depuis une date (URL, type, prix, date)."""
+        try:
+            with psycopg2.connect(**self.conn_params) as conn:
+                with conn.cursor(cursor_factory=DictCursor) as cur:
+                    cur.execute("""
+                    SELECT p.url, a.alert_type, a.price, a.timestamp
+                    FROM alerts a
+                    JOIN products p ON p.id = a.product_id
+                    WHERE a.timestamp >= %s
+                    """, (since,))
                     return [dict(row) for row in cur.fetchall()]
 
         except Exception as e:
             print(f"Erreur lors de la récupération des alertes: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    @metrics.timed(DB_SECONDS, operation='export_parquet')
+    def export_parquet(self, root: str, tables: Sequence[str] = ('price_history', 'alerts'),
+                       batch_size: int = 50000) -> Dict[str, int]:
+        """Exporte les nouvelles lignes en Parquet partitionné par date et site; renvoie le nombre de lignes par table.
+
+        Les lignes au-delà du dernier id exporté (watermark) sont lues par un curseur
+        serveur, par paquets de batch_size: ni la base ni le processus ne matérialisent
+        la table. Le watermark n'avance qu'une fois le paquet écrit; les fichiers d'un
+        paquet interrompu avant cette étape sont supprimés à la reprise. Les ids sautés
+        sous le watermark (transaction encore en cours, ou annulée) sont redemandés
+        aux exports suivants pendant EXPORT_GAP_SECONDS: une ligne validée après une
+        ligne d'id supérieur est exportée au passage suivant, une seule fois.
+        """
+        from database.parquet_store import (advance_watermark, load_watermarks, partition_paths,
+                                            remove_parts, save_watermarks, watermark_state,
+                                            write_partitions)
+
+        watermarks = load_watermarks(root)
+        exported = {}
+        for table in tables:
+            exported[table] = 0
+            now = time.time()
+            last_id, gaps, pending = watermark_state(watermarks, table)
+            gaps = [gap for gap in gaps if now - gap[2] < EXPORT_GAP_SECONDS]
+            try:
+                # Paquet interrompu: sa reprise peut contenir d'autres lignes (ids sautés validés
+                # entre-temps) et donc d'autres fichiers; les siens feraient doublon
+                remove_parts(root, pending)
+                with psycopg2.connect(**self.conn_params) as conn:
+                    # Curseur nommé: les lignes restent côté serveur jusqu'à fetchmany
+                    with conn.cursor(name=f"export_{table}") as cur:
+                        cur.itersize = batch_size
+                        cur.execute(EXPORT_QUERIES[table], (last_id, [gap[0] for gap in gaps],
+                                                            [gap[1] for gap in gaps]))
+                        while True:
+                            rows = cur.fetchmany(batch_size)
+                            if not rows:
+                                break
+                            watermarks[table] = {'last_id': last_id, 'gaps': gaps,
+                                                 'pending': partition_paths(root, table, rows)}
+                            save_watermarks(root, watermarks)
+                            write_partitions(root, table, rows)
+                            last_id, gaps = advance_watermark(last_id, gaps, [row[0] for row in rows], now)
+                            watermarks[table] = {'last_id': last_id, 'gaps': gaps}
+                            save_watermarks(root, watermarks)
+                            exported[table] += len(rows)
+                            DB_ROWS_EXPORTED.inc(len(rows), table=table)
+
+            except Exception as e:
+                DB_ERRORS.inc(operation='export_parquet')
+                print(f"Erreur lors de l'export Parquet de {table}: {str(e)}")
+        return exported
+
+    def _history_key(self, product_url: str) -> str:
+        return f"history:{product_url}"
+
+    def _cache_get(self, key: str, query: str):
+        if self.cache is None:
+            return MISSING
+        value = self.cache.get(key)
+        if value is MISSING:
+            DB_CACHE_MISSES.inc(query=query)
+        else:
+            DB_CACHE_HITS.inc(query=query)
+        return value
+
+    def _cache_set(self, key: str, value) -> None:
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+    def _invalidate(self, product_urls: Iterable[str], alerts: bool = False) -> None:
+        """Invalide les historiques des produits modifiés (et les alertes récentes)."""
+        if self.cache is None:
+            return
+        keys = [self._history_key(url) for url in product_urls]
+        if alerts:
+            keys.append(RECENT_ALERTS_KEY)
+        self.cache.delete(keys)
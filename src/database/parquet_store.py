@@ -0,0 +1,228 @@
+import argparse
+import bisect
+import glob
+import json
+import os
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# pyarrow et duckdb sont optionnels: importés seulement par l'export et le backtest.
+# Disposition (partitionnement Hive, lisible par DuckDB, pyarrow, Spark...):
+#   <root>/<table>/date=AAAA-MM-JJ/site=<site>/part-<premier id du paquet>.parquet
+
+WATERMARK_FILE = '_watermark.json'
+
+# Colonnes de chaque table exportée, dans l'ordre des requêtes d'export (site: partition)
+EXPORT_COLUMNS = {
+    'price_history': ['id', 'product_id', 'url', 'name', 'site', 'category', 'price',
+                      'original_price', 'timestamp'],
+    'alerts': ['id', 'product_id', 'url', 'name', 'site', 'category', 'alert_type', 'price',
+               'original_price', 'confidence', 'price_difference', 'timestamp']
+}
+
+def load_watermarks(root: str) -> Dict[str, Any]:
+    """Watermark de chaque table exportée (voir watermark_state)."""
+    try:
+        with open(os.path.join(root, WATERMARK_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_watermarks(root: str, watermarks: Dict[str, Any]) -> None:
+    """Enregistre les watermarks (remplacement atomique du fichier)."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, WATERMARK_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f)
+    os.replace(path + '.tmp', path)
+
+def watermark_state(watermarks: Dict[str, Any], table: str) -> Tuple[int, List[list], List[str]]:
+    """Dernier id exporté d'une table (0 si jamais exportée), intervalles d'ids sautés
+    et fichiers du paquet en cours d'écriture.
+
+    Un intervalle [premier, dernier, date de détection] couvre des ids inférieurs au
+    watermark absents de l'export: transaction pas encore validée, ou annulée. Des
+    fichiers en cours restent listés si l'export a été interrompu avant que le
+    watermark n'avance: le paquet repris peut différer, ils sont à supprimer.
+    """
+    state = watermarks.get(table, 0)
+    if isinstance(state, int):
+        # Format des premiers exports: dernier id seul
+        return state, [], []
+    return state['last_id'], [list(gap) for gap in state['gaps']], list(state.get('pending', []))
+
+def advance_watermark(last_id: int, gaps: List[list], ids: Sequence[int],
+                      now: float) -> Tuple[int, List[list]]:
+    """Avance le watermark sur les ids exportés (triés): les ids sautés deviennent des
+    intervalles manquants, les ids manquants retrouvés en sont retirés."""
+    gaps = list(gaps)
+    found = []
+    for row_id in ids:
+        if row_id <= last_id:
+            found.append(row_id)
+            continue
+        if row_id > last_id + 1:
+            gaps.append([last_id + 1, row_id - 1, now])
+        last_id = row_id
+    if not found:
+        return last_id, gaps
+
+    remaining = []
+    for lo, hi, seen in gaps:
+        for row_id in found[bisect.bisect_left(found, lo):bisect.bisect_right(found, hi)]:
+            if row_id > lo:
+                remaining.append([lo, row_id - 1, seen])
+            lo = row_id + 1
+        if lo <= hi:
+            remaining.append([lo, hi, seen])
+    return last_id, remaining
+
+def write_partitions(root: str, table: str, rows: Sequence[tuple]) -> int:
+    """Écrit un paquet de lignes (triées par id) dans ses partitions date/site; renvoie le nombre de fichiers.
+
+    Les fichiers sont nommés d'après le premier id du paquet, jamais exporté auparavant:
+    ils ne remplacent pas ceux d'un autre paquet. Ceux d'un paquet interrompu sont
+    listés par partition_paths et supprimés avant sa reprise (remove_parts).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = EXPORT_COLUMNS[table]
+    site_index = columns.index('site')
+    schema = _schema(table)
+
+    partitions = _partitions(root, table, rows)
+    for path, partition in partitions.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = {name: [row[i] for row in partition]
+                for i, name in enumerate(columns) if i != site_index}
+        pq.write_table(pa.Table.from_pydict(data, schema=schema), path + '.tmp')
+        os.replace(path + '.tmp', path)
+    return len(partitions)
+
+def partition_paths(root: str, table: str, rows: Sequence[tuple]) -> List[str]:
+    """Fichiers qu'écrira write_partitions pour ce paquet (relatifs à root)."""
+    return sorted(os.path.relpath(path, root) for path in _partitions(root, table, rows))
+
+def remove_parts(root: str, paths: Sequence[str]) -> None:
+    """Supprime les fichiers d'un paquet dont l'export a été interrompu."""
+    for path in paths:
+        try:
+            os.remove(os.path.join(root, path))
+        except FileNotFoundError:
+            pass
+
+def _partitions(root: str, table: str, rows: Sequence[tuple]) -> Dict[str, List[tuple]]:
+    columns = EXPORT_COLUMNS[table]
+    site_index = columns.index('site')
+    timestamp_index = columns.index('timestamp')
+    partitions: Dict[str, List[tuple]] = {}
+    for row in rows:
+        path = os.path.join(root, table, f"date={row[timestamp_index].date().isoformat()}",
+                            f"site={row[site_index]}", f"part-{rows[0][0]:012d}.parquet")
+        partitions.setdefault(path, []).append(row)
+    return partitions
+
+def read_price_history(root: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       sites: Optional[Sequence[str]] = None,
+                       batch_size: int = 65536) -> Iterator['pa.RecordBatch']:
+    """Lit l'historique exporté par ordre chronologique
+    (timestamp, site, url, name, category, price, original_price).
+
+    DuckDB est utilisé s'il est installé (lecture parallèle, tri hors mémoire);
+    sinon pyarrow.dataset, qui charge la période demandée en mémoire. Les fichiers
+    exportés avant l'ajout du prix original le lisent comme nul.
+    """
+    directory = os.path.join(root, 'price_history')
+    if not glob.glob(os.path.join(directory, '**', '*.parquet'), recursive=True):
+        return
+
+    try:
+        import duckdb
+    except ImportError:
+        duckdb = None
+
+    if duckdb is not None:
+        conditions = []
+        params: list = [os.path.join(directory, '**', '*.parquet')]
+        if start is not None:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('timestamp < ?')
+            params.append(end)
+        if sites:
+            conditions.append('list_contains(?, site)')
+            params.append(list(sites))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        con = duckdb.connect()
+        try:
+            reader = con.execute(f"""
+            SELECT timestamp, site, url, name, category, price, original_price
+            FROM read_parquet(?, hive_partitioning = true, hive_types = {{'site': VARCHAR}},
+                              union_by_name = true)
+            {where}
+            ORDER BY timestamp, site, id
+            """, params).fetch_record_batch(batch_size)
+            yield from reader
+        finally:
+            con.close()
+        return
+
+    import pyarrow.dataset as ds
+    import pyarrow as pa
+    schema = _schema('price_history').append(pa.field('site', pa.string()))
+    dataset = ds.dataset(directory, format='parquet', partitioning='hive', schema=schema)
+    expression = None
+    for condition in (
+        ds.field('timestamp') >= start if start is not None else None,
+        ds.field('timestamp') < end if end is not None else None,
+        ds.field('site').isin(list(sites)) if sites else None
+    ):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+    table = dataset.to_table(columns=['timestamp', 'site', 'url', 'name', 'category', 'price',
+                                      'original_price', 'id'], filter=expression)
+    table = table.sort_by([('timestamp', 'ascending'), ('site', 'ascending'), ('id', 'ascending')])
+    yield from table.drop_columns(['id']).to_batches(max_chunksize=batch_size)
+
+def _schema(table: str) -> 'pa.Schema':
+    import pyarrow as pa
+
+    types = {
+        'id': pa.int64(), 'product_id': pa.int64(), 'url': pa.string(), 'name': pa.string(),
+        'category': pa.string(), 'alert_type': pa.string(), 'price': pa.float64(),
+        'original_price': pa.float64(), 'confidence': pa.float64(),
+        'price_difference': pa.float64(), 'timestamp': pa.timestamp('us')
+    }
+    return pa.schema([(name, types[name]) for name in EXPORT_COLUMNS[table] if name != 'site'])
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export Parquet de l'historique et backtest hors ligne")
+    parser.add_argument('root', help="Répertoire de l'export")
+    parser.add_argument('--backtest', action='store_true',
+                        help="Rejoue la détection sur l'export au lieu d'exporter")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="Début du backtest (AAAA-MM-JJ)")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="Fin du backtest (exclue)")
+    parser.add_argument('--site', action='append', dest='sites', help="Sites à rejouer")
+    args = parser.parse_args(argv)
+
+    if args.backtest:
+        from analyzer.price_analyzer import PriceAnalyzer
+        alerts = PriceAnalyzer().backtest(args.root, args.start, args.end, args.sites)
+        counts: Dict[str, int] = {}
+        for alert in alerts:
+            counts[alert.alert_type] = counts.get(alert.alert_type, 0) + 1
+        print(f"{len(alerts)} alertes: {counts}")
+        return
+
+    from database.db_manager import DatabaseManager
+    exported = DatabaseManager().export_parquet(args.root)
+    print(f"Lignes exportées: {exported}")
+
+if __name__ == '__main__':
+    main()
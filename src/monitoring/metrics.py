@@ -0,0 +1,228 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Un puits reçoit (nom, type, valeur, labels) à chaque mesure
+Sink = Callable[[str, str, float, Dict[str, str]], None]
+
+class Counter:
+    """Compteur monotone, éventuellement étiqueté."""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, description: str):
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self.values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry._emit(self.name, 'counter', amount, labels)
+
+    def value(self, **labels: str) -> float:
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+class Histogram:
+    """Histogramme cumulatif à seaux fixes (format Prometheus)."""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, description: str,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compteurs par seau..., total des observations, somme]
+        self.values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+        self.registry._emit(self.name, 'histogram', value, labels)
+
+    def count(self, **labels: str) -> int:
+        state = self.values.get(tuple(sorted(labels.items())))
+        return state[-2] if state else 0
+
+class _Timer:
+    """Mesure la durée d'un bloc dans un histogramme, et ouvre un span si le traçage est actif."""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self._span = None
+
+    def __enter__(self):
+        tracer = self.histogram.registry.tracer
+        if tracer is not None:
+            self._span = tracer.start_as_current_span(self.histogram.name, attributes=self.labels)
+            self._span.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+        if self._span is not None:
+            self._span.__exit__(exc_type, exc, tb)
+        return False
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    """Registre des métriques de l'application.
+
+    Désactivé par défaut: chaque mesure se réduit alors à un test de booléen.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.tracer = None
+        self.sinks: List[Sink] = []
+        self._metrics: Dict[str, object] = {}
+        self._server: Optional['ThreadingHTTPServer'] = None
+
+    def counter(self, name: str, description: str = '') -> Counter:
+        """Déclare (ou récupère) un compteur."""
+        if name not in self._metrics:
+            self._metrics[name] = Counter(self, name, description)
+        return self._metrics[name]
+
+    def histogram(self, name: str, description: str = '',
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Déclare (ou récupère) un histogramme."""
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(self, name, description, buckets)
+        return self._metrics[name]
+
+    def timer(self, histogram: Histogram, **labels: str):
+        """Context manager mesurant la durée d'un bloc."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(histogram, labels)
+
+    def timed(self, histogram: Histogram, **labels: str):
+        """Décorateur mesurant la durée d'une fonction, synchrone ou coroutine."""
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(histogram, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(histogram, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def enable(self, tracing: bool = False) -> None:
+        """Active la collecte, et les spans OpenTelemetry si demandé (module optionnel)."""
+        self.enabled = True
+        if tracing:
+            from opentelemetry import trace
+            self.tracer = trace.get_tracer('price_analyzer')
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.tracer = None
+
+    def add_sink(self, sink: Sink) -> None:
+        """Ajoute un puits recevant chaque mesure (StatsD, logs, tests...)."""
+        self.sinks.append(sink)
+
+    def reset(self) -> None:
+        """Remet toutes les valeurs à zéro."""
+        for metric in self._metrics.values():
+            metric.values.clear()
+
+    def render_prometheus(self) -> str:
+        """Exporte les métriques au format texte Prometheus."""
+        lines = []
+        for metric in self._metrics.values():
+            kind = 'counter' if isinstance(metric, Counter) else 'histogram'
+            if metric.description:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for key, value in list(metric.values.items()):
+                if kind == 'counter':
+                    lines.append(f"{metric.name}{_format_labels(key)} {value}")
+                    continue
+                for bound, count in zip(metric.buckets, value):
+                    lines.append(f"{metric.name}_bucket{_format_labels(key + (('le', str(bound)),))} {count}")
+                lines.append(f"{metric.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {value[-2]}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {value[-2]}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+    def start_http_server(self, port: int, host: str = '0.0.0.0') -> 'ThreadingHTTPServer':
+        """Expose /metrics pour Prometheus dans un thread de fond."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def _emit(self, name: str, kind: str, value: float, labels: Dict[str, str]) -> None:
+        for sink in self.sinks:
+            try:
+                sink(name, kind, value, labels)
+            except Exception as e:
+                print(f"Erreur lors de l'envoi d'une métrique: {str(e)}")
+
+def _format_labels(key: Tuple) -> str:
+    if not key:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in key
+    )
+    return '{' + pairs + '}'
+
+# Registre partagé par tous les composants, configuré par l'environnement
+metrics = MetricsRegistry(enabled=os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true'))
+if metrics.enabled and os.getenv('TRACING_ENABLED', '').lower() in ('1', 'true'):
+    metrics.enable(tracing=True)
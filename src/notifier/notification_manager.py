@@ -1,18 +1,30 @@
+import asyncio
 import smtplib
 import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 from datetime import datetime
 from dotenv import load_dotenv
-from telegram import Bot
-from discord import Webhook, AsyncWebhookAdapter
-import aiohttp
-from analyzer.price_analyzer import PriceAlert
+from monitoring.metrics import metrics
+from concurrency.executor import BlockingExecutor, blocking
+
+if TYPE_CHECKING:
+    from analyzer.price_analyzer import PriceAlert
+
+# Les clients Telegram et Discord (et aiohttp) ne sont importés qu'au premier envoi
+# sur un canal configuré: les processus sans notification ne paient pas leur import.
+
+NOTIFY_SECONDS = metrics.histogram('send_notifications_seconds', "Durée de l'envoi des notifications d'un lot d'alertes")
+NOTIFICATIONS_SENT = metrics.counter('notifications_sent_total', 'Notifications envoyées')
+NOTIFICATIONS_FAILED = metrics.counter('notifications_failed_total', "Notifications en échec")
 
 class NotificationManager:
-    def __init__(self):
+    def __init__(self, executor: Optional[BlockingExecutor] = None):
         load_dotenv()
+
+        # Exécuteur des appels bloquants (SMTP), partagé par défaut avec la base de données
+        self.executor = executor if executor is not None else blocking
         
         # Configuration email
         self.email_sender = os.getenv('EMAIL_SENDER')
@@ -27,14 +39,18 @@ class NotificationManager:
         # Configuration Discord
         self.discord_webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
 
-    async def send_notifications(self, alerts: List[PriceAlert]) -> None:
+    @metrics.timed(NOTIFY_SECONDS)
+    async def send_notifications(self, alerts: List['PriceAlert']) -> None:
         """Envoie les notifications pour toutes les alertes."""
         for alert in alerts:
-            await self._send_email_alert(alert)
-            await self._send_telegram_alert(alert)
-            await self._send_discord_alert(alert)
+            # Les canaux sont indépendants: l'email part en thread pendant les envois HTTP
+            await asyncio.gather(
+                self._send_email_alert(alert),
+                self._send_telegram_alert(alert),
+                self._send_discord_alert(alert)
+            )
 
-    async def _send_email_alert(self, alert: PriceAlert) -> None:
+    async def _send_email_alert(self, alert: 'PriceAlert') -> None:
         """Envoie une alerte par email."""
         if not all([self.email_sender, self.email_password]):
             return
@@ -48,20 +64,28 @@ class NotificationManager:
             body = self._format_alert_message(alert)
             msg.attach(MIMEText(body, 'plain'))
 
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_sender, self.email_password)
-                server.send_message(msg)
+            await self.executor.run(self._send_email, msg)
+            NOTIFICATIONS_SENT.inc(channel='email')
 
         except Exception as e:
+            NOTIFICATIONS_FAILED.inc(channel='email')
             print(f"Erreur lors de l'envoi de l'email: {str(e)}")
 
-    async def _send_telegram_alert(self, alert: PriceAlert) -> None:
+    def _send_email(self, msg: MIMEMultipart) -> None:
+        """Envoie un email via SMTP (bloquant, exécuté hors de la boucle asyncio)."""
+        # Délai de socket aligné sur l'exécuteur: le thread se libère quand l'appelant abandonne
+        with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.executor.timeout or 30) as server:
+            server.starttls()
+            server.login(self.email_sender, self.email_password)
+            server.send_message(msg)
+
+    async def _send_telegram_alert(self, alert: 'PriceAlert') -> None:
         """Envoie une alerte via Telegram."""
         if not all([self.telegram_token, self.telegram_chat_id]):
             return
 
         try:
+            from telegram import Bot
             bot = Bot(token=self.telegram_token)
             message = self._format_alert_message(alert)
             await bot.send_message(
@@ -69,26 +93,36 @@ class NotificationManager:
                 text=message,
                 parse_mode='Markdown'
             )
+            NOTIFICATIONS_SENT.inc(channel='telegram')
         except Exception as e:
+            NOTIFICATIONS_FAILED.inc(channel='telegram')
             print(f"Erreur lors de l'envoi sur Telegram: {str(e)}")
 
-    async def _send_discord_alert(self, alert: PriceAlert) -> None:
+    async def _send_discord_alert(self, alert: 'PriceAlert') -> None:
         """Envoie une alerte via Discord."""
         if not self.discord_webhook_url:
             return
 
         try:
+            import aiohttp
+            import discord
             async with aiohttp.ClientSession() as session:
-                webhook = Webhook.from_url(
-                    self.discord_webhook_url,
-                    adapter=AsyncWebhookAdapter(session)
-                )
+                if hasattr(discord, 'AsyncWebhookAdapter'):
+                    # discord.py 1.x
+                    webhook = discord.Webhook.from_url(
+                        self.discord_webhook_url,
+                        adapter=discord.AsyncWebhookAdapter(session)
+                    )
+                else:
+                    webhook = discord.Webhook.from_url(self.discord_webhook_url, session=session)
                 message = self._format_alert_message(alert)
                 await webhook.send(content=message)
+            NOTIFICATIONS_SENT.inc(channel='discord')
         except Exception as e:
+            NOTIFICATIONS_FAILED.inc(channel='discord')
             print(f"Erreur lors de l'envoi sur Discord: {str(e)}")
 
-    def _format_alert_message(self, alert: PriceAlert) -> str:
+    def _format_alert_message(self, alert: 'PriceAlert') -> str:
         """Formate le message d'alerte."""
         message = f"🔔 Alerte Prix Détectée!\n\n"
         message += f"Produit: {alert.product.name}\n"
@@ -0,0 +1,237 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from scraper.product import Product
+from monitoring.metrics import metrics
+
+if TYPE_CHECKING:
+    from scraper.scraper import Scraper
+    from analyzer.price_analyzer import PriceAlert, PriceAnalyzer
+    from analyzer.alert_deduplicator import AlertDeduplicator
+
+JOBS_RUN = metrics.counter('scheduler_jobs_total', 'Requêtes planifiées exécutées')
+JOBS_DEFERRED = metrics.counter('scheduler_jobs_deferred_total', 'Requêtes reportées faute de budget')
+
+# Poids des signaux dans l'urgence d'une requête (1 = requête parfaitement stable)
+ALERT_RATE_WEIGHT = 20.0
+VOLATILITY_WEIGHT = 10.0
+# Lissage exponentiel du taux d'alertes d'une exécution à l'autre
+ALERT_RATE_ALPHA = 0.3
+
+# Appelé après chaque exécution (sauvegarde, notifications...)
+ResultHandler = Callable[['ScrapeJob', List[Product], List['PriceAlert']], Awaitable[None]]
+
+@dataclass
+class ScrapeJob:
+    site: str
+    query: str
+    interval: float
+    next_run: float = 0.0
+    alert_rate: float = 0.0  # alertes par produit, lissé
+    volatility: float = 0.0  # coefficient de variation moyen des prix récents
+    runs: int = 0
+    urls: List[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.site, self.query)
+
+    @property
+    def priority(self) -> float:
+        """Urgence de la requête: plus elle est élevée, plus l'intervalle est court."""
+        return 1.0 + ALERT_RATE_WEIGHT * self.alert_rate + VOLATILITY_WEIGHT * self.volatility
+
+class SiteBudget:
+    """Seau à jetons limitant le nombre de requêtes par minute vers un site (0: site en pause)."""
+
+    def __init__(self, per_minute: float, burst: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if per_minute < 0:
+            raise ValueError(f"Budget négatif: {per_minute} requêtes par minute")
+        self.rate = per_minute / 60
+        # Site en pause: aucun jeton, pas même celui de départ
+        self.capacity = burst if self.rate > 0 else 0.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self._updated = clock()
+
+    def try_acquire(self) -> bool:
+        """Consomme un jeton s'il y en a un de disponible."""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def wait_time(self) -> float:
+        """Secondes avant qu'un jeton soit disponible (infini pour un site en pause)."""
+        if self.rate == 0:
+            return math.inf
+        self._refill()
+        return max(1 - self.tokens, 0) / self.rate
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+class ScrapeScheduler:
+    """Planifie en continu les requêtes (site, requête) par ordre d'échéance et d'urgence.
+
+    Après chaque exécution, l'intervalle d'une requête est recalculé à partir de son
+    taux d'alertes et de la volatilité des prix de ses produits (historique de
+    l'analyseur): une requête instable repasse jusqu'à toutes les min_interval
+    secondes, une requête stable s'espace jusqu'à max_interval. Une requête dont
+    le site a épuisé son budget est reportée au prochain jeton disponible.
+    """
+
+    def __init__(self, scraper: 'Scraper', analyzer: 'PriceAnalyzer',
+                 site_budgets: Optional[Dict[str, float]] = None,
+                 min_interval: float = 60.0, max_interval: float = 3600.0,
+                 concurrency: int = 4, on_results: Optional[ResultHandler] = None,
+                 deduplicator: Optional['AlertDeduplicator'] = None,
+                 clock: Callable[[], float] = time.monotonic, max_pages: int = 1):
+        self.scraper = scraper
+        # Pages de résultats par exécution (au-delà de 1: Scraper.crawl_site)
+        self.max_pages = max_pages
+        self.analyzer = analyzer
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.concurrency = concurrency
+        self.on_results = on_results
+        # Écarte les alertes déjà signalées par ce processus avant sauvegarde et notification
+        self.deduplicator = deduplicator
+        self.clock = clock
+        # Budget en requêtes par minute; un site absent n'est pas limité
+        self.budgets = {site: SiteBudget(per_minute, clock=clock)
+                        for site, per_minute in (site_budgets or {}).items()}
+        self.jobs: Dict[Tuple[str, str], ScrapeJob] = {}
+        # Tas de (échéance, -urgence, ordre d'insertion, clé); les entrées périmées sont ignorées au dépilement
+        self._queue: List[Tuple[float, float, int, Tuple[str, str]]] = []
+        self._order = itertools.count()
+
+    def add_job(self, site: str, query: str) -> ScrapeJob:
+        """Ajoute une requête, exécutée dès le prochain passage."""
+        key = (site, query)
+        if key in self.jobs:
+            return self.jobs[key]
+        job = ScrapeJob(site=site, query=query, interval=self.min_interval, next_run=self.clock())
+        self.jobs[key] = job
+        self._push(job)
+        return job
+
+    def remove_job(self, site: str, query: str) -> None:
+        """Retire une requête de la planification."""
+        self.jobs.pop((site, query), None)
+
+    def next_run(self) -> Optional[float]:
+        """Prochaine échéance de la file (None si elle est vide)."""
+        while self._queue and not self._is_current(self._queue[0]):
+            heapq.heappop(self._queue)
+        return self._queue[0][0] if self._queue else None
+
+    def due_jobs(self) -> List[ScrapeJob]:
+        """Dépile les requêtes arrivées à échéance dont le site a encore du budget."""
+        now = self.clock()
+        jobs = []
+        deferred = []
+        while self._queue and self._queue[0][0] <= now:
+            entry = heapq.heappop(self._queue)
+            if not self._is_current(entry):
+                continue
+            job = self.jobs[entry[3]]
+            budget = self.budgets.get(job.site)
+            if budget and not budget.try_acquire():
+                JOBS_DEFERRED.inc(site=job.site)
+                job.next_run = now + budget.wait_time()
+                deferred.append(job)
+                continue
+            jobs.append(job)
+        # Remis dans la file après le parcours, pour ne pas les redépiler dans la même boucle
+        for job in deferred:
+            self._push(job)
+        return jobs
+
+    async def run_job(self, job: ScrapeJob) -> List['PriceAlert']:
+        """Scrape une requête, analyse les prix et replanifie la requête."""
+        products = []
+        alerts = []
+        try:
+            if self.max_pages > 1:
+                products = await self.scraper.crawl_site(job.site, job.query, self.max_pages)
+            else:
+                products = await self.scraper.scrape_site(job.site, job.query)
+            alerts = self.analyzer.analyze_prices(products) if products else []
+            if self.deduplicator is not None:
+                alerts = self.deduplicator.filter(alerts, record=False)
+            JOBS_RUN.inc(site=job.site)
+            if self.on_results:
+                await self.on_results(job, products, alerts)
+            # Mémorisées une fois traitées: après un échec de on_results, le passage suivant les signale
+            if self.deduplicator is not None:
+                self.deduplicator.remember(alerts)
+        except Exception as e:
+            print(f"Erreur lors de l'exécution de la requête {job.query} sur {job.site}: {str(e)}")
+        finally:
+            self._reschedule(job, products, alerts)
+        return alerts
+
+    async def run_pending(self) -> List['PriceAlert']:
+        """Exécute toutes les requêtes arrivées à échéance et renvoie leurs alertes."""
+        slots = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._run_limited(job, slots) for job in self.due_jobs()))
+        return [alert for alerts in results for alert in alerts]
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Boucle principale: lance les requêtes à échéance jusqu'à ce que stop soit positionné."""
+        stop = stop or asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        while not stop.is_set():
+            for job in self.due_jobs():
+                task = asyncio.create_task(self._run_limited(job, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            # Une requête ajoutée pendant l'attente est prise en compte au plus tard après min_interval
+            next_run = self.next_run()
+            delay = self.min_interval if next_run is None else next_run - self.clock()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=min(max(delay, 0.01), self.min_interval))
+            except asyncio.TimeoutError:
+                pass
+
+        # Les requêtes en cours se terminent avant l'arrêt
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_limited(self, job: ScrapeJob, slots: asyncio.Semaphore) -> List['PriceAlert']:
+        async with slots:
+            return await self.run_job(job)
+
+    def _reschedule(self, job: ScrapeJob, products: List[Product], alerts: List['PriceAlert']) -> None:
+        job.runs += 1
+        rate = len(alerts) / len(products) if products else 0.0
+        job.alert_rate = rate if job.runs == 1 else (
+            (1 - ALERT_RATE_ALPHA) * job.alert_rate + ALERT_RATE_ALPHA * rate)
+        if products:
+            job.urls = [product.url for product in products]
+        if job.urls:
+            job.volatility = float(np.mean(self.analyzer.price_history.volatility(job.urls)))
+
+        job.interval = min(max(self.max_interval / job.priority, self.min_interval), self.max_interval)
+        job.next_run = self.clock() + job.interval
+        if job.key in self.jobs:
+            self._push(job)
+
+    def _push(self, job: ScrapeJob) -> None:
+        heapq.heappush(self._queue, (job.next_run, -job.priority, next(self._order), job.key))
+
+    def _is_current(self, entry: Tuple[float, float, int, Tuple[str, str]]) -> bool:
+        # Une requête retirée ou replanifiée laisse une entrée périmée dans le tas
+        job = self.jobs.get(entry[3])
+        return job is not None and job.next_run == entry[0]
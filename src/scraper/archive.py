@@ -0,0 +1,103 @@
+import json
+import os
+import zlib
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd indisponible: repli sur zlib
+    zstandard = None
+
+@dataclass
+class ArchiveEntry:
+    site: str
+    query: str
+    url: str
+    timestamp: datetime
+    offset: int
+    length: int
+    codec: str  # 'zstd' ou 'zlib'
+
+class PageArchive:
+    """Archive append-only des pages brutes, une trame compressée par page."""
+
+    DATA_FILE = 'pages.bin'
+    INDEX_FILE = 'index.jsonl'
+
+    def __init__(self, directory: str, level: int = 3):
+        self.directory = directory
+        self.data_path = os.path.join(directory, self.DATA_FILE)
+        self.index_path = os.path.join(directory, self.INDEX_FILE)
+        self.level = level
+        self.codec = 'zstd' if zstandard else 'zlib'
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, site: str, query: str, url: str, body: bytes,
+               timestamp: Optional[datetime] = None) -> ArchiveEntry:
+        """Ajoute une page à la fin de l'archive et l'indexe."""
+        frame = self._compress(body)
+        with open(self.data_path, 'ab') as data:
+            offset = data.tell()
+            data.write(frame)
+
+        entry = ArchiveEntry(
+            site=site,
+            query=query,
+            url=url,
+            timestamp=timestamp or datetime.now(),
+            offset=offset,
+            length=len(frame),
+            codec=self.codec
+        )
+        record = asdict(entry)
+        record['timestamp'] = entry.timestamp.isoformat()
+        # L'index n'est écrit qu'après la trame: une entrée indexée est toujours lisible
+        with open(self.index_path, 'a', encoding='utf-8') as index:
+            index.write(json.dumps(record) + '\n')
+        return entry
+
+    def entries(self, site: Optional[str] = None, query: Optional[str] = None,
+                since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> List[ArchiveEntry]:
+        """Liste les pages archivées, filtrées par site, requête et période."""
+        return [
+            entry for entry in self._iter_index()
+            if (site is None or entry.site == site)
+            and (query is None or entry.query == query)
+            and (since is None or entry.timestamp >= since)
+            and (until is None or entry.timestamp < until)
+        ]
+
+    def read(self, entry: ArchiveEntry) -> bytes:
+        """Relit et décompresse le corps d'une page archivée."""
+        return read_frame(self.data_path, entry.offset, entry.length, entry.codec)
+
+    def _iter_index(self) -> Iterator[ArchiveEntry]:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding='utf-8') as index:
+            for line in index:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+                yield ArchiveEntry(**record)
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(body)
+        return zlib.compress(body, self.level)
+
+def read_frame(data_path: str, offset: int, length: int, codec: str) -> bytes:
+    """Lit une trame de l'archive sans charger le reste du fichier."""
+    with open(data_path, 'rb') as data:
+        data.seek(offset)
+        frame = data.read(length)
+
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Le module zstandard est requis pour relire cette archive")
+        return zstandard.ZstdDecompressor().decompress(frame)
+    return zlib.decompress(frame)
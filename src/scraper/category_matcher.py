@@ -0,0 +1,91 @@
+import json
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List
+
+def normalize_text(text: str) -> str:
+    """Met en minuscules et retire les accents ('Vélo' -> 'velo')."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+class CategoryMatcher:
+    """Classifieur de catégories par mots-clés basé sur un automate d'Aho-Corasick.
+
+    L'automate est construit une fois par taxonomie: classer un nom coûte un seul
+    parcours de ses caractères, quel que soit le nombre de mots-clés. Comme avec
+    l'ancienne boucle, la première catégorie (dans l'ordre de la taxonomie) dont un
+    mot-clé apparaît dans le nom l'emporte.
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]], default: str = 'Autre',
+                 cache_size: int = 65536):
+        self.categories = list(taxonomy)
+        self.default = default
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Rang de la meilleure catégorie reconnue dans chaque état (len(categories) si aucune)
+        self._rank: List[int] = [len(self.categories)]
+
+        for rank, keywords in enumerate(taxonomy.values()):
+            for keyword in keywords:
+                self._add_keyword(normalize_text(keyword), rank)
+        self._build_failure_links()
+
+        # Les mêmes noms reviennent à chaque cycle de collecte
+        self._classify_cached = lru_cache(maxsize=cache_size)(self._classify)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'CategoryMatcher':
+        """Charge la taxonomie depuis un fichier JSON {catégorie: [mots-clés]}."""
+        with open(path, encoding='utf-8') as taxonomy_file:
+            return cls(json.load(taxonomy_file), **kwargs)
+
+    def classify(self, product_name: str) -> str:
+        """Renvoie la catégorie d'un produit à partir de son nom."""
+        return self._classify_cached(product_name)
+
+    def _classify(self, product_name: str) -> str:
+        goto, fail, rank = self._goto, self._fail, self._rank
+        best = len(self.categories)
+        state = 0
+        for char in normalize_text(product_name):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if rank[state] < best:
+                best = rank[state]
+                if best == 0:
+                    break
+
+        return self.categories[best] if best < len(self.categories) else self.default
+
+    def _add_keyword(self, keyword: str, rank: int) -> None:
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._rank.append(len(self.categories))
+            state = next_state
+        self._rank[state] = min(self._rank[state], rank)
+
+    def _build_failure_links(self) -> None:
+        # Parcours en largeur: le lien d'échec d'un état pointe vers un état moins profond
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Un mot-clé reconnu via le lien d'échec compte aussi
+                self._rank[next_state] = min(self._rank[next_state], self._rank[self._fail[next_state]])
+                queue.append(next_state)
@@ -0,0 +1,45 @@
+import hashlib
+from typing import TYPE_CHECKING, Iterable, List, Set
+
+if TYPE_CHECKING:
+    from scraper.product import ProductBatch
+
+class CrawlFrontier:
+    """Ensemble des URLs produits déjà collectées sur un site, stockées sous forme d'empreintes."""
+
+    def __init__(self):
+        # Empreinte de 64 bits par URL: bien plus compact que l'URL elle-même
+        self._seen: Set[int] = set()
+
+    def add(self, url: str) -> bool:
+        """Enregistre une URL et indique si elle était encore inconnue."""
+        key = self._fingerprint(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def filter_new(self, products: Iterable) -> List:
+        """Ne conserve que les produits dont l'URL n'a pas encore été vue."""
+        return [product for product in products if self.add(product.url)]
+
+    def filter_new_batch(self, batch: 'ProductBatch') -> 'ProductBatch':
+        """Version colonnaire de filter_new: lot des lignes dont l'URL n'a pas encore été vue."""
+        rows = [i for i in range(len(batch)) if self.add(batch.url(i))]
+        return batch if len(rows) == len(batch) else batch.select(rows)
+
+    def clear(self) -> None:
+        """Oublie toutes les URLs (début d'un nouveau cycle de collecte)."""
+        self._seen.clear()
+
+    def __contains__(self, url: str) -> bool:
+        return self._fingerprint(url) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    @staticmethod
+    def _fingerprint(url: str) -> int:
+        return int.from_bytes(
+            hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big'
+        )
@@ -0,0 +1,197 @@
+import math
+import sys
+from array import array
+from datetime import datetime
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    name: str
+    price: float
+    original_price: Optional[float]
+    url: str
+    site: str
+    category: str
+    timestamp: datetime
+
+class ProductBatch:
+    """Lot de produits stocké en colonnes, sans objet Python par produit.
+
+    Les prix sont dans des tableaux de flottants (NaN pour un prix original absent),
+    les noms et URLs dans un tampon de chaînes indexé par des offsets, et les
+    sites/catégories sous forme de codes vers une table de chaînes internées.
+
+    Les colonnes numpy (prices, site_codes...) sont des vues sans copie: un ajout
+    qui suit leur lecture recopie d'abord les tableaux, les vues déjà obtenues
+    restant un instantané du lot au moment de la lecture.
+    """
+
+    def __init__(self, timestamp: Optional[datetime] = None):
+        self.timestamp = timestamp or datetime.now()
+        self.sites: List[str] = []
+        self.categories: List[str] = []
+        self._site_index: Dict[str, int] = {}
+        self._category_index: Dict[str, int] = {}
+
+        self._prices = array('d')
+        self._original_prices = array('d')
+        self._site_codes = array('I')
+        self._category_codes = array('I')
+        # Nom et URL de la ligne i: buffer[offsets[2i]:offsets[2i+1]] et buffer[offsets[2i+1]:offsets[2i+2]]
+        self._offsets = array('q', [0])
+        self._parts: List[str] = []
+        self._buffer: Optional[str] = None
+        # Vrai tant que des vues numpy peuvent référencer les tableaux (redimensionnement interdit)
+        self._exported = False
+
+    @classmethod
+    def from_products(cls, products: Iterable[Product],
+                      timestamp: Optional[datetime] = None) -> 'ProductBatch':
+        """Construit un lot à partir d'objets Product."""
+        batch = cls(timestamp)
+        for product in products:
+            batch.append(product.name, product.price, product.original_price,
+                         product.url, product.site, product.category)
+        return batch
+
+    def append(self, name: str, price: float, original_price: Optional[float],
+               url: str, site: str, category: str) -> None:
+        """Ajoute une ligne au lot."""
+        if self._exported:
+            self._detach()
+        self._prices.append(price)
+        self._original_prices.append(math.nan if original_price is None else original_price)
+        self._site_codes.append(self._code(site, self.sites, self._site_index))
+        self._category_codes.append(self._code(category, self.categories, self._category_index))
+
+        end = self._offsets[-1]
+        self._offsets.append(end + len(name))
+        self._offsets.append(end + len(name) + len(url))
+        self._parts.append(name)
+        self._parts.append(url)
+        self._buffer = None
+
+    def extend(self, other: 'ProductBatch') -> None:
+        """Ajoute toutes les lignes d'un autre lot."""
+        for i in range(len(other)):
+            self.append(other.name(i), other._prices[i], other.original_price(i),
+                        other.url(i), other.site(i), other.category(i))
+
+    def select(self, rows: Iterable[int]) -> 'ProductBatch':
+        """Nouveau lot restreint à certaines lignes (même horodatage)."""
+        batch = ProductBatch(self.timestamp)
+        for i in rows:
+            batch.append(self.name(i), self._prices[i], self.original_price(i),
+                         self.url(i), self.site(i), self.category(i))
+        return batch
+
+    def copy(self, timestamp: Optional[datetime] = None) -> 'ProductBatch':
+        """Copie indépendante du lot, éventuellement avec un autre horodatage."""
+        batch = ProductBatch(timestamp or self.timestamp)
+        batch.sites = list(self.sites)
+        batch.categories = list(self.categories)
+        batch._site_index = dict(self._site_index)
+        batch._category_index = dict(self._category_index)
+        batch._prices = array('d', self._prices)
+        batch._original_prices = array('d', self._original_prices)
+        batch._site_codes = array('I', self._site_codes)
+        batch._category_codes = array('I', self._category_codes)
+        batch._offsets = array('q', self._offsets)
+        batch._buffer = self._text()
+        batch._parts = [batch._buffer]
+        return batch
+
+    @property
+    def prices(self) -> 'np.ndarray':
+        """Prix actuels (vue sans copie)."""
+        return self._view(self._prices, 'float64')
+
+    @property
+    def original_prices(self) -> 'np.ndarray':
+        """Prix originaux, NaN lorsqu'ils sont absents (vue sans copie)."""
+        return self._view(self._original_prices, 'float64')
+
+    @property
+    def site_codes(self) -> 'np.ndarray':
+        return self._view(self._site_codes, 'uint32')
+
+    @property
+    def category_codes(self) -> 'np.ndarray':
+        return self._view(self._category_codes, 'uint32')
+
+    def _view(self, column: array, dtype: str) -> 'np.ndarray':
+        # numpy n'est chargé qu'au premier accès aux colonnes
+        import numpy as np
+        self._exported = True
+        return np.frombuffer(column, dtype=dtype)
+
+    def _detach(self) -> None:
+        """Recopie les colonnes exportées: array.array ne peut grandir sous une vue."""
+        self._prices = array('d', self._prices)
+        self._original_prices = array('d', self._original_prices)
+        self._site_codes = array('I', self._site_codes)
+        self._category_codes = array('I', self._category_codes)
+        self._exported = False
+
+    def name(self, i: int) -> str:
+        return self._text()[self._offsets[2 * i]:self._offsets[2 * i + 1]]
+
+    def url(self, i: int) -> str:
+        return self._text()[self._offsets[2 * i + 1]:self._offsets[2 * i + 2]]
+
+    def site(self, i: int) -> str:
+        return self.sites[self._site_codes[i]]
+
+    def category(self, i: int) -> str:
+        return self.categories[self._category_codes[i]]
+
+    def original_price(self, i: int) -> Optional[float]:
+        value = self._original_prices[i]
+        return None if math.isnan(value) else value
+
+    def urls(self) -> List[str]:
+        """Liste des URLs, dans l'ordre des lignes."""
+        return [self.url(i) for i in range(len(self))]
+
+    def product(self, i: int) -> Product:
+        """Matérialise une ligne sous forme de Product (à réserver aux lignes utiles)."""
+        return Product(
+            name=self.name(i),
+            price=self._prices[i],
+            original_price=self.original_price(i),
+            url=self.url(i),
+            site=self.site(i),
+            category=self.category(i),
+            timestamp=self.timestamp
+        )
+
+    def to_products(self) -> List[Product]:
+        return [self.product(i) for i in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def __iter__(self) -> Iterator[Product]:
+        for i in range(len(self)):
+            yield self.product(i)
+
+    def _text(self) -> str:
+        # Le tampon n'est assemblé qu'à la première lecture qui suit des ajouts
+        if self._buffer is None:
+            self._buffer = ''.join(self._parts)
+            self._parts = [self._buffer]
+        return self._buffer
+
+    @staticmethod
+    def _code(value: str, table: List[str], index: Dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = len(table)
+            value = sys.intern(value)
+            table.append(value)
+            index[value] = code
+        return code
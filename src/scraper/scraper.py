@@ -1,21 +1,32 @@
+import asyncio
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from dataclasses import replace
 import httpx
 from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime
-from dataclasses import dataclass
-
-@dataclass
-class Product:
-    name: str
-    price: float
-    original_price: Optional[float]
-    url: str
-    site: str
-    category: str
-    timestamp: datetime
+from scraper.archive import PageArchive, read_frame
+from scraper.category_matcher import CategoryMatcher
+from scraper.frontier import CrawlFrontier
+from scraper.product import Product, ProductBatch
+from monitoring.metrics import metrics
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), 'categories.json')
+
+SCRAPE_SECONDS = metrics.histogram('scrape_site_seconds', "Durée du scraping d'une requête")
+PARSE_SECONDS = metrics.histogram('parse_products_seconds', "Durée du parsing d'une page")
+PAGES_FETCHED = metrics.counter('pages_fetched_total', 'Pages de résultats téléchargées')
+PAGE_CACHE_HITS = metrics.counter('page_cache_hits_total', 'Pages inchangées dont le parsing a été évité')
+PRODUCTS_PARSED = metrics.counter('products_parsed_total', 'Produits extraits des pages')
+SCRAPE_ERRORS = metrics.counter('scrape_errors_total', 'Erreurs de scraping')
 
 class Scraper:
-    def __init__(self):
+    def __init__(self, archive: Optional[PageArchive] = None,
+                 taxonomy_path: Optional[str] = None,
+                 page_cache_size: Optional[int] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -23,6 +34,7 @@ class Scraper:
             'amazon': {
                 'base_url': 'https://www.amazon.fr',
                 'search_url': 'https://www.amazon.fr/s?k={query}',
+                'page_url': 'https://www.amazon.fr/s?k={query}&page={page}',
                 'selectors': {
                     'products': '.s-result-item',
                     'name': '.a-text-normal',
@@ -33,6 +45,21 @@ class Scraper:
             # Ajouter d'autres sites ici
         }
 
+        # Cache par URL: ETag/Last-Modified, empreintes du contenu et produits extraits;
+        # borné (LRU) pour qu'un long parcours ne fasse pas grossir la mémoire
+        self.page_cache: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.page_cache_size = (page_cache_size if page_cache_size is not None
+                                else int(os.getenv('PAGE_CACHE_SIZE', '1024')))
+        self.cache_stats = {'requests': 0, 'hits': 0}
+
+        # Archive optionnelle des pages brutes, pour re-parser hors ligne
+        self.archive = archive
+
+        # Taxonomie des catégories, compilée une seule fois
+        self.taxonomy_path = (taxonomy_path or os.getenv('CATEGORY_TAXONOMY_PATH')
+                              or DEFAULT_TAXONOMY_PATH)
+        self.category_matcher = CategoryMatcher.from_file(self.taxonomy_path)
+
     async def scrape_site(self, site: str, query: str) -> List[Product]:
         """Scrape un site spécifique pour les produits."""
         products = []
@@ -41,21 +68,334 @@ class Scraper:
             return products
 
         try:
-            async with httpx.AsyncClient(headers=self.headers) as client:
-                url = config['search_url'].format(query=query)
-                response = await client.get(url)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    products.extend(self._parse_products(soup, site, config))
+            with metrics.timer(SCRAPE_SECONDS, site=site):
+                async with httpx.AsyncClient(headers=self.headers) as client:
+                    url = config['search_url'].format(query=query)
+                    products.extend(await self._fetch_products(client, url, site, config, query))
         except Exception as e:
+            SCRAPE_ERRORS.inc(site=site)
             print(f"Erreur lors du scraping de {site}: {str(e)}")
 
         return products
 
-    def _parse_products(self, soup: BeautifulSoup, site: str, config: Dict) -> List[Product]:
-        """Parse la page HTML pour extraire les produits."""
+    async def scrape_site_batch(self, site: str, query: str) -> ProductBatch:
+        """Scrape un site et renvoie les produits sous forme de lot colonnaire."""
+        config = self.sites_config.get(site)
+        if not config:
+            return ProductBatch()
+
+        try:
+            with metrics.timer(SCRAPE_SECONDS, site=site):
+                async with httpx.AsyncClient(headers=self.headers) as client:
+                    url = config['search_url'].format(query=query)
+                    return await self._fetch_products(client, url, site, config, query, as_batch=True)
+        except Exception as e:
+            SCRAPE_ERRORS.inc(site=site)
+            print(f"Erreur lors du scraping de {site}: {str(e)}")
+            return ProductBatch()
+
+    async def crawl_site(self, site: str, query: str, max_pages: int = 5, prefetch: int = 3,
+                         frontier: Optional[CrawlFrontier] = None) -> List[Product]:
+        """Parcourt les pages de résultats d'une requête tant qu'elles apportent de nouveaux produits.
+
+        Les doublons sont écartés par frontier: une frontière neuve par défaut, à partager
+        entre les requêtes d'un même cycle pour ne pas renvoyer deux fois un produit.
+        """
         products = []
+        config = self.sites_config.get(site)
+        if not config:
+            return products
+
+        frontier = frontier if frontier is not None else CrawlFrontier()
+        # URLs vues par cette requête: la frontière est partagée par toutes les requêtes
+        # du site et ne sert qu'à écarter les doublons, pas à décider de l'arrêt
+        seen: Set[str] = set()
+        try:
+            with metrics.timer(SCRAPE_SECONDS, site=site):
+                async with httpx.AsyncClient(headers=self.headers) as client:
+                    page = 1
+                    while page <= max_pages:
+                        # Les pages suivantes sont téléchargées en parallèle par fenêtre
+                        window = [
+                            n for n in range(page, min(page + prefetch, max_pages + 1))
+                            if self._page_url(config, query, n)
+                        ]
+                        if not window:
+                            break
+                        results = await asyncio.gather(*(
+                            self._fetch_products(client, self._page_url(config, query, n),
+                                                 site, config, query)
+                            for n in window
+                        ), return_exceptions=True)
+
+                        exhausted = False
+                        for result in results:
+                            if isinstance(result, Exception):
+                                SCRAPE_ERRORS.inc(site=site)
+                                print(f"Erreur lors du scraping de {site}: {str(result)}")
+                                exhausted = True
+                                break
+                            urls = {product.url for product in result}
+                            if urls <= seen:
+                                # Page vide ou déjà vue pour cette requête
+                                exhausted = True
+                                break
+                            seen |= urls
+                            products.extend(frontier.filter_new(result))
+                        if exhausted:
+                            break
+                        page += len(window)
+        except Exception as e:
+            SCRAPE_ERRORS.inc(site=site)
+            print(f"Erreur lors du scraping de {site}: {str(e)}")
+
+        return products
+
+    async def stream(self, requests: Iterable[Tuple[str, str]], max_pages: int = 1,
+                     concurrency: int = 4, buffer: int = 8,
+                     cache: bool = True) -> AsyncIterator[ProductBatch]:
+        """Produit le lot de chaque page de résultats dès qu'elle est parsée.
+
+        `concurrency` requêtes (site, requête) sont parcourues en même temps, page par
+        page tant qu'elles apportent de nouveaux produits. Au plus `buffer` lots attendent
+        le consommateur: au-delà, la collecte se suspend, si bien que la mémoire ne dépend
+        pas de la taille du parcours, hormis l'empreinte de 8 octets par URL gardée pour
+        écarter les doublons du flux (cache=False évite aussi de garder chaque page dans
+        page_cache). Chaque appel repart d'une frontière vide. Quitter la boucle arrête la collecte en cours; avec
+        contextlib.aclosing, l'arrêt est immédiat après un break. Les lots produits
+        n'appartiennent qu'au consommateur (jamais partagés avec page_cache).
+        """
+        # maxsize <= 0 rendrait la file illimitée, et sans worker rien ne serait produit
+        if buffer < 1:
+            raise ValueError(f"buffer doit être au moins 1 (reçu {buffer})")
+        if concurrency < 1:
+            raise ValueError(f"concurrency doit être au moins 1 (reçu {concurrency})")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        pending = iter(requests)
+        # Frontières propres à ce flux: un flux suivant revoit les prix mis à jour
+        frontiers: Dict[str, CrawlFrontier] = {}
+        finished = object()
+
+        async def worker(client: httpx.AsyncClient) -> None:
+            try:
+                # Itérateur partagé: chaque requête n'est prise que par un worker
+                for site, query in pending:
+                    frontier = frontiers.setdefault(site, CrawlFrontier())
+                    await self._stream_query(client, site, query, max_pages, cache, queue, frontier)
+            except Exception as e:
+                print(f"Erreur lors du parcours des requêtes: {str(e)}")
+            await queue.put(finished)
+
+        async with httpx.AsyncClient(headers=self.headers) as client:
+            workers = [asyncio.create_task(worker(client)) for _ in range(concurrency)]
+            try:
+                remaining = len(workers)
+                while remaining:
+                    item = await queue.get()
+                    if item is finished:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _stream_query(self, client: httpx.AsyncClient, site: str, query: str,
+                            max_pages: int, cache: bool, queue: asyncio.Queue,
+                            frontier: CrawlFrontier) -> None:
+        """Parcourt les pages d'une requête et place leurs nouveaux produits dans la file."""
+        config = self.sites_config.get(site)
+        if not config:
+            return
+
+        # Arrêt décidé sur les URLs de cette requête, comme dans crawl_site
+        seen: Set[str] = set()
+        try:
+            for page in range(1, max_pages + 1):
+                url = self._page_url(config, query, page)
+                if url is None:
+                    break
+                raw = await self._fetch_products(client, url, site, config, query,
+                                                 as_batch=True, store=cache)
+                urls = set(raw.urls())
+                if urls <= seen:
+                    # Page vide ou déjà vue pour cette requête
+                    break
+                seen |= urls
+                batch = frontier.filter_new_batch(raw)
+                if len(batch):
+                    await queue.put(batch)
+        except Exception as e:
+            SCRAPE_ERRORS.inc(site=site)
+            print(f"Erreur lors du scraping de {site}: {str(e)}")
+
+    def _page_url(self, config: Dict, query: str, page: int) -> Optional[str]:
+        """Construit l'URL d'une page de résultats (None si le site n'est pas paginé)."""
+        if page == 1:
+            return config['search_url'].format(query=query)
+        if 'page_url' not in config:
+            return None
+        return config['page_url'].format(query=query, page=page)
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Proportion des requêtes pour lesquelles le parsing a été évité."""
+        if not self.cache_stats['requests']:
+            return 0.0
+        return self.cache_stats['hits'] / self.cache_stats['requests']
+
+    async def _fetch_products(self, client: httpx.AsyncClient, url: str, site: str,
+                              config: Dict, query: str = '', as_batch: bool = False,
+                              store: bool = True):
+        """Télécharge une page de résultats en requête conditionnelle et ne la parse que si elle a changé."""
+        # Les listes de Product et les lots colonnaires sont mis en cache séparément
+        key = 'batch' if as_batch else 'products'
+        entry = self.page_cache.get(url)
+        cached = entry if entry and key in entry else None
+        if entry:
+            self.page_cache.move_to_end(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = await client.get(url, headers=headers)
+        self.cache_stats['requests'] += 1
+        PAGES_FETCHED.inc(site=site, status=str(response.status_code))
+
+        # 304: le serveur confirme que la page n'a pas changé
+        if response.status_code == 304 and cached:
+            self.cache_stats['hits'] += 1
+            PAGE_CACHE_HITS.inc(site=site)
+            return self._restamp(cached[key])
+        if response.status_code != 200:
+            if response.status_code == 429 or response.status_code >= 500:
+                # Limitation ou panne du site: à distinguer d'une page sans résultat
+                raise RuntimeError(f"statut HTTP {response.status_code} pour {url}")
+            return ProductBatch() if as_batch else []
+
+        # Corps identique octet pour octet: inutile de construire le DOM
+        body_hash = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        if cached and cached['body_hash'] == body_hash:
+            self.cache_stats['hits'] += 1
+            PAGE_CACHE_HITS.inc(site=site)
+            products = self._restamp(cached[key])
+            region_hash = cached['region_hash']
+        else:
+            if self.archive:
+                self.archive.append(site, query, url, response.content)
+            soup = BeautifulSoup(response.text, 'html.parser')
+            # Seule la zone des produits compte (jetons, publicités... varient à chaque requête)
+            region_hash = self._content_hash(soup, config)
+            if cached and cached['region_hash'] == region_hash:
+                self.cache_stats['hits'] += 1
+                PAGE_CACHE_HITS.inc(site=site)
+                products = self._restamp(cached[key])
+            elif as_batch:
+                products = self._parse_batch(soup, site, config)
+            else:
+                products = self._parse_products(soup, site, config)
+
+        if not store:
+            return products
+        fresh = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body_hash': body_hash,
+            'region_hash': region_hash,
+            # Copie: le lot renvoyé appartient à l'appelant, qui peut le compléter
+            key: products.copy() if as_batch else products
+        }
+        if entry and entry['region_hash'] == region_hash:
+            # Zone des produits inchangée: la représentation de l'autre mode reste valable
+            fresh = {**entry, **fresh}
+        self.page_cache[url] = fresh
+        self.page_cache.move_to_end(url)
+        while len(self.page_cache) > self.page_cache_size:
+            self.page_cache.popitem(last=False)
+        return products
+
+    @staticmethod
+    def _restamp(products):
+        """Produits réutilisés depuis le cache, datés de la collecte en cours."""
+        now = datetime.now()
+        if isinstance(products, ProductBatch):
+            return products.copy(timestamp=now)
+        return [replace(product, timestamp=now) for product in products]
+
+    def _content_hash(self, soup: BeautifulSoup, config: Dict) -> str:
+        """Calcule l'empreinte de la zone contenant la liste des produits."""
+        digest = hashlib.blake2b(digest_size=16)
+        for product_elem in soup.select(config['selectors']['products']):
+            digest.update(str(product_elem).encode('utf-8'))
+        return digest.hexdigest()
+
+    def replay_archive(self, archive: PageArchive, site: Optional[str] = None,
+                       query: Optional[str] = None, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None,
+                       workers: Optional[int] = None) -> List[Product]:
+        """Re-parse les pages archivées avec la configuration actuelle des sites."""
+        tasks = [
+            (archive.data_path, entry.offset, entry.length, entry.codec,
+             entry.site, self.sites_config[entry.site], entry.timestamp, self.taxonomy_path)
+            for entry in archive.entries(site=site, query=query, since=since, until=until)
+            if entry.site in self.sites_config
+        ]
+
+        products = []
+        if workers == 1 or len(tasks) < 2:
+            for task in tasks:
+                products.extend(_replay_page(task))
+            return products
+
+        # Le parsing HTML est lié au CPU: un processus par cœur
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(tasks) // ((workers or 4) * 4))
+            for page_products in executor.map(_replay_page, tasks, chunksize=chunksize):
+                products.extend(page_products)
+        return products
+
+    def _parse_products(self, soup: BeautifulSoup, site: str, config: Dict,
+                        timestamp: Optional[datetime] = None) -> List[Product]:
+        """Parse la page HTML pour extraire les produits."""
+        # Un seul horodatage pour toute la page
+        timestamp = timestamp or datetime.now()
+        with metrics.timer(PARSE_SECONDS, site=site):
+            products = [
+                Product(
+                    name=name,
+                    price=price,
+                    original_price=original_price,
+                    url=url,
+                    site=site,
+                    category=category,
+                    timestamp=timestamp
+                )
+                for name, price, original_price, url, site, category
+                in self._iter_product_fields(soup, site, config)
+            ]
+        PRODUCTS_PARSED.inc(len(products), site=site)
+        return products
+
+    def _parse_batch(self, soup: BeautifulSoup, site: str, config: Dict,
+                     timestamp: Optional[datetime] = None) -> ProductBatch:
+        """Parse la page HTML directement en lot colonnaire, sans objet par produit."""
+        batch = ProductBatch(timestamp)
+        with metrics.timer(PARSE_SECONDS, site=site):
+            for fields in self._iter_product_fields(soup, site, config):
+                batch.append(*fields)
+        PRODUCTS_PARSED.inc(len(batch), site=site)
+        return batch
+
+    def _iter_product_fields(self, soup: BeautifulSoup, site: str,
+                             config: Dict) -> Iterator[Tuple]:
+        """Extrait (nom, prix, prix original, url, site, catégorie) de chaque produit de la page."""
         selectors = config['selectors']
+        site = sys.intern(site)
 
         for product_elem in soup.select(selectors['products']):
             try:
@@ -78,35 +418,26 @@ class Scraper:
                         pass
 
                 url = config['base_url'] + product_elem.find('a')['href']
-                
-                products.append(Product(
-                    name=name,
-                    price=price,
-                    original_price=original_price,
-                    url=url,
-                    site=site,
-                    category=self._detect_category(name),
-                    timestamp=datetime.now()
-                ))
+                category = sys.intern(self._detect_category(name))
             except Exception as e:
                 print(f"Erreur lors du parsing d'un produit: {str(e)}")
                 continue
 
-        return products
+            yield name, price, original_price, url, site, category
 
     def _detect_category(self, product_name: str) -> str:
         """Détecte la catégorie du produit basée sur son nom."""
-        # TODO: Implémenter une détection plus sophistiquée
-        categories = {
-            'Électronique': ['smartphone', 'ordinateur', 'tablette', 'tv', 'console'],
-            'Mode': ['chaussures', 'vêtement', 'montre', 'sac'],
-            'Maison': ['meuble', 'cuisine', 'déco'],
-            'Sports': ['sport', 'fitness', 'vélo']
-        }
+        return self.category_matcher.classify(product_name)
 
-        product_name = product_name.lower()
-        for category, keywords in categories.items():
-            if any(keyword in product_name for keyword in keywords):
-                return category
+_replay_scrapers: Dict[str, Scraper] = {}
 
-        return "Autre"
\ No newline at end of file
+def _replay_page(task: Tuple) -> List[Product]:
+    """Décompresse et parse une page archivée (exécuté dans un processus de travail)."""
+    data_path, offset, length, codec, site, config, timestamp, taxonomy_path = task
+    # Un Scraper par processus et par taxonomie: elle n'est compilée qu'une fois
+    scraper = _replay_scrapers.get(taxonomy_path)
+    if scraper is None:
+        scraper = _replay_scrapers[taxonomy_path] = Scraper(taxonomy_path=taxonomy_path)
+    body = read_frame(data_path, offset, length, codec)
+    soup = BeautifulSoup(body, 'html.parser')
+    return scraper._parse_products(soup, site, config, timestamp=timestamp)
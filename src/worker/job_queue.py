@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List
+import psycopg2
+from monitoring.metrics import metrics
+
+JOBS_CLAIMED = metrics.counter('worker_jobs_claimed_total', 'Requêtes réclamées dans la file partagée')
+LEASES_LOST = metrics.counter('worker_leases_lost_total', 'Baux expirés avant la fin du traitement')
+
+@dataclass(frozen=True)
+class QueuedJob:
+    id: int
+    site: str
+    query: str
+    interval: float
+    scheduled_for: datetime  # échéance de l'essai réclamé (repoussée par fail)
+    attempts: int
+    run: int = 0  # exécutions terminées: seul complete() l'incrémente
+
+    @property
+    def run_key(self) -> str:
+        """Clé d'idempotence: identique pour tous les essais d'une même exécution.
+
+        fail() repousse next_run sans toucher à runs: un nouvel essai après une
+        écriture validée mais non confirmée retrouve la même clé et n'écrit rien.
+        """
+        return f"{self.id}:{self.run}"
+
+class JobQueue:
+    """File de requêtes (site, requête) partagée entre workers via une table Postgres.
+
+    Un worker réclame les requêtes à échéance avec SELECT ... FOR UPDATE SKIP LOCKED:
+    deux workers ne prennent jamais la même ligne et ne s'attendent pas. Chaque
+    réclamation pose un bail (lease_until) prolongé par des battements de cœur; une
+    requête dont le worker a disparu redevient disponible à l'expiration du bail.
+    """
+
+    def __init__(self, conn_params: Dict[str, str]):
+        self.conn_params = conn_params
+        self._table_ready = False
+
+    def enqueue(self, site: str, query: str, interval: float = 3600.0) -> None:
+        """Ajoute une requête à la file (sans effet si elle y est déjà)."""
+        self._execute("""
+        INSERT INTO scrape_jobs (site, query, interval_seconds)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (site, query) DO NOTHING
+        """, (site, query, interval))
+
+    def claim(self, worker_id: str, lease_seconds: float, limit: int = 1) -> List[QueuedJob]:
+        """Réclame jusqu'à limit requêtes à échéance et pose un bail à leur nom."""
+        rows = self._execute("""
+        UPDATE scrape_jobs AS j
+        SET locked_by = %s,
+            lease_until = NOW() + %s * INTERVAL '1 second',
+            attempts = j.attempts + 1
+        FROM (
+            SELECT id FROM scrape_jobs
+            WHERE next_run <= NOW() AND (lease_until IS NULL OR lease_until < NOW())
+            ORDER BY next_run
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        ) AS due
+        WHERE j.id = due.id
+        RETURNING j.id, j.site, j.query, j.interval_seconds, j.next_run, j.attempts, j.runs
+        """, (worker_id, lease_seconds, limit), fetch=True)
+        jobs = [QueuedJob(id=row[0], site=row[1], query=row[2], interval=float(row[3]),
+                          scheduled_for=row[4], attempts=row[5], run=row[6]) for row in rows or []]
+        JOBS_CLAIMED.inc(len(jobs))
+        return jobs
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+        """Prolonge le bail; renvoie False si la requête a été reprise par un autre worker."""
+        rows = self._execute("""
+        UPDATE scrape_jobs
+        SET lease_until = NOW() + %s * INTERVAL '1 second'
+        WHERE id = %s AND locked_by = %s
+        RETURNING id
+        """, (lease_seconds, job_id, worker_id), fetch=True)
+        if not rows:
+            LEASES_LOST.inc()
+            return False
+        return True
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        """Libère le bail et planifie l'échéance suivante."""
+        rows = self._execute("""
+        UPDATE scrape_jobs
+        SET locked_by = NULL, lease_until = NULL, attempts = 0, last_error = NULL,
+            runs = runs + 1, last_run = NOW(),
+            next_run = NOW() + interval_seconds * INTERVAL '1 second'
+        WHERE id = %s AND locked_by = %s
+        RETURNING id
+        """, (job_id, worker_id), fetch=True)
+        return bool(rows)
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_seconds: float = 60.0) -> bool:
+        """Libère le bail après une erreur; nouvel essai avec un délai doublé à chaque échec."""
+        rows = self._execute("""
+        UPDATE scrape_jobs
+        SET locked_by = NULL, lease_until = NULL, last_error = %s,
+            next_run = NOW() + LEAST(interval_seconds, %s * POWER(2, attempts - 1)) * INTERVAL '1 second'
+        WHERE id = %s AND locked_by = %s
+        RETURNING id
+        """, (error[:1000], retry_seconds, job_id, worker_id), fetch=True)
+        return bool(rows)
+
+    def _execute(self, sql: str, params: tuple, fetch: bool = False):
+        try:
+            with psycopg2.connect(**self.conn_params) as conn:
+                with conn.cursor() as cur:
+                    self._ensure_table(cur)
+                    cur.execute(sql, params)
+                    rows = cur.fetchall() if fetch else None
+                conn.commit()
+                return rows
+        except Exception as e:
+            self._table_ready = False
+            print(f"Erreur lors de l'accès à la file des requêtes: {str(e)}")
+            return [] if fetch else None
+
+    def _ensure_table(self, cur) -> None:
+        """Crée à la demande la table de la file (seuls les workers en ont besoin)."""
+        if self._table_ready:
+            return
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS scrape_jobs (
+            id SERIAL PRIMARY KEY,
+            site VARCHAR(100) NOT NULL,
+            query VARCHAR(255) NOT NULL,
+            interval_seconds DOUBLE PRECISION NOT NULL DEFAULT 3600,
+            next_run TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_by VARCHAR(255),
+            lease_until TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            runs INTEGER NOT NULL DEFAULT 0,
+            last_run TIMESTAMP,
+            last_error TEXT,
+            UNIQUE (site, query)
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS scrape_jobs_next_run ON scrape_jobs (next_run)")
+        self._table_ready = True
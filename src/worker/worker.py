@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import uuid
+from typing import TYPE_CHECKING, List, Optional
+from database.db_manager import DatabaseManager
+from worker.job_queue import JobQueue, QueuedJob
+from monitoring.metrics import metrics
+from concurrency.executor import BlockingExecutor, blocking
+from scraper.product import ProductBatch
+
+if TYPE_CHECKING:
+    from scraper.scraper import Scraper
+    from analyzer.price_analyzer import PriceAnalyzer
+    from analyzer.alert_deduplicator import AlertDeduplicator
+
+JOB_SECONDS = metrics.histogram('worker_job_seconds', "Durée du traitement d'une requête par un worker")
+JOBS_DONE = metrics.counter('worker_jobs_total', 'Requêtes traitées par les workers')
+
+class ScrapeWorker:
+    """Worker de collecte: réclame des requêtes dans la file partagée, les scrape,
+    analyse les prix et enregistre les résultats.
+
+    Plusieurs workers (processus ou machines) peuvent tourner sur la même base:
+    la file garantit qu'une requête n'est traitée que par un worker à la fois, et
+    save_results n'écrit qu'une fois les résultats d'une même exécution.
+    """
+
+    def __init__(self, queue: JobQueue, scraper: 'Scraper', analyzer: 'PriceAnalyzer',
+                 db: DatabaseManager, worker_id: Optional[str] = None,
+                 lease_seconds: float = 120.0, heartbeat_interval: float = 30.0,
+                 poll_interval: float = 5.0, concurrency: int = 2,
+                 deduplicator: Optional['AlertDeduplicator'] = None,
+                 executor: Optional[BlockingExecutor] = None,
+                 heartbeat_executor: Optional[BlockingExecutor] = None,
+                 max_pages: int = 1):
+        self.queue = queue
+        self.scraper = scraper
+        self.analyzer = analyzer
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.deduplicator = deduplicator
+        # Pages de résultats par requête (au-delà de 1: Scraper.crawl_site)
+        self.max_pages = max_pages
+        # Les appels psycopg2 passent par l'exécuteur borné partagé avec les notifications
+        self.executor = executor if executor is not None else blocking
+        # Battements de cœur à part: un exécuteur partagé saturé ne doit pas faire expirer les baux
+        self.heartbeat_executor = (heartbeat_executor if heartbeat_executor is not None
+                                   else BlockingExecutor(name='heartbeat', max_workers=concurrency,
+                                                         max_queue=concurrency, timeout=heartbeat_interval))
+
+    async def run_once(self) -> int:
+        """Réclame et traite un lot de requêtes; renvoie le nombre de requêtes réclamées."""
+        jobs = await self._queue_call(self.queue.claim, [], self.worker_id,
+                                      self.lease_seconds, self.concurrency)
+        await asyncio.gather(*(self.process(job) for job in jobs))
+        return len(jobs)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Traite les requêtes en continu jusqu'à ce que stop soit positionné."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            if await self.run_once():
+                continue
+            # File vide: on attend avant de réinterroger la base
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process(self, job: QueuedJob) -> bool:
+        """Traite une requête réclamée; renvoie True si ses résultats ont été enregistrés."""
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, lease_lost))
+        try:
+            with metrics.timer(JOB_SECONDS, site=job.site):
+                if self.max_pages > 1:
+                    batch = ProductBatch.from_products(
+                        await self.scraper.crawl_site(job.site, job.query, self.max_pages))
+                else:
+                    batch = await self.scraper.scrape_site_batch(job.site, job.query)
+                alerts = self.analyzer.analyze_batch(batch) if len(batch) else []
+                if self.deduplicator is not None:
+                    alerts = self.deduplicator.filter(alerts, record=False)
+
+                if lease_lost.is_set():
+                    # Un autre worker a repris la requête: c'est lui qui enregistre
+                    print(f"Bail perdu pour la requête {job.query} sur {job.site}")
+                    JOBS_DONE.inc(status='lease_lost')
+                    return False
+
+                # Sans délai: une écriture abandonnée continuerait dans son thread pendant le nouvel essai
+                saved = await self.executor.run(self.db.save_results, job.run_key, batch, alerts,
+                                                timeout=None)
+                if saved is None:
+                    raise RuntimeError("échec de l'enregistrement des résultats")
+                if self.deduplicator is not None:
+                    self.deduplicator.remember(alerts)
+                # Sans réponse: le bail expire et la reprise ne réécrit rien (même run_key)
+                await self._queue_call(self.queue.complete, False, job.id, self.worker_id)
+                JOBS_DONE.inc(status='saved' if saved else 'duplicate')
+                return saved
+
+        except Exception as e:
+            JOBS_DONE.inc(status='failed')
+            print(f"Erreur lors du traitement de la requête {job.query} sur {job.site}: {str(e)}")
+            await self._queue_call(self.queue.fail, False, job.id, self.worker_id, str(e))
+            return False
+
+        finally:
+            heartbeat.cancel()
+
+    async def _queue_call(self, func, default, *args):
+        """Appel à la file par l'exécuteur partagé; renvoie default si la base ne répond
+        pas à temps (le cycle suivant réessaie au lieu d'arrêter le worker)."""
+        try:
+            return await self.executor.run(func, *args)
+        except asyncio.TimeoutError:
+            print(f"Erreur lors de l'accès à la file des requêtes: délai dépassé ({getattr(func, '__name__', func)})")
+            return default
+
+    async def _heartbeat(self, job: QueuedJob, lease_lost: asyncio.Event) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                alive = await self.heartbeat_executor.run(self.queue.heartbeat, job.id, self.worker_id,
+                                                          self.lease_seconds)
+            except asyncio.TimeoutError:
+                # Base lente: le bail couvre plusieurs intervalles, on réessaie au suivant
+                continue
+            if not alive:
+                lease_lost.set()
+                return
+
+def _run_worker(concurrency: int, max_pages: int) -> None:
+    # Importés ici: --enqueue n'a besoin ni du scraper ni de l'analyseur
+    from scraper.scraper import Scraper
+    from analyzer.price_analyzer import PriceAnalyzer
+    from analyzer.alert_deduplicator import AlertDeduplicator
+
+    db = DatabaseManager()
+    deduplicator = AlertDeduplicator()
+    deduplicator.warm(db)
+    worker = ScrapeWorker(JobQueue(db.conn_params), Scraper(), PriceAnalyzer(), db,
+                          concurrency=concurrency, deduplicator=deduplicator, max_pages=max_pages)
+    print(f"Worker {worker.worker_id} démarré")
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Workers de collecte coordonnés par Postgres")
+    parser.add_argument('--processes', type=int, default=1, help="Nombre de workers locaux")
+    parser.add_argument('--concurrency', type=int, default=2, help="Requêtes simultanées par worker")
+    parser.add_argument('--max-pages', type=int, default=1,
+                        help="Pages de résultats parcourues par requête")
+    parser.add_argument('--enqueue', nargs='*', default=[], metavar='SITE:REQUÊTE',
+                        help="Ajoute des requêtes à la file puis quitte")
+    parser.add_argument('--interval', type=float, default=3600.0,
+                        help="Intervalle entre deux exécutions des requêtes ajoutées (secondes)")
+    args = parser.parse_args(argv)
+
+    if args.enqueue:
+        queue = JobQueue(DatabaseManager().conn_params)
+        for entry in args.enqueue:
+            site, _, query = entry.partition(':')
+            queue.enqueue(site, query, args.interval)
+        return
+
+    if args.processes == 1:
+        _run_worker(args.concurrency, args.max_pages)
+        return
+
+    processes = [multiprocessing.Process(target=_run_worker, args=(args.concurrency, args.max_pages))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == '__main__':
+    main()
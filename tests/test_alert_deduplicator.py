@@ -0,0 +1,83 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from src.scraper.scraper import Product
+from src.analyzer.price_analyzer import PriceAlert
+from src.analyzer.alert_deduplicator import AlertDeduplicator
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+def make_alert(price, url="https://example.com/test", alert_type='price_drop'):
+    product = Product(name="Test Product", price=price, original_price=199.99, url=url,
+                      site="amazon", category="Électronique", timestamp=datetime.now())
+    return PriceAlert(product=product, confidence=0.9, price_difference=199.99 - price,
+                      timestamp=datetime.now(), alert_type=alert_type)
+
+class TestAlertDeduplicator(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.deduplicator = AlertDeduplicator(cooldown=3600, clock=self.clock)
+
+    def test_same_alert_is_suppressed_during_cooldown(self):
+        """Teste qu'une alerte identique n'est signalée qu'une fois par période de silence."""
+        self.assertEqual(len(self.deduplicator.filter([make_alert(99.99)])), 1)
+        self.assertEqual(self.deduplicator.filter([make_alert(99.5)]), [])
+
+        self.clock.now += 3600
+        self.assertEqual(len(self.deduplicator.filter([make_alert(99.99)])), 1)
+
+    def test_new_price_bucket_or_type_is_reported(self):
+        """Teste qu'une nouvelle baisse de prix ou un autre type d'alerte est signalé."""
+        self.deduplicator.filter([make_alert(99.99)])
+
+        fresh = self.deduplicator.filter([
+            make_alert(49.99),
+            make_alert(99.99, alert_type='cross_site'),
+            make_alert(99.99, url="https://example.com/other")
+        ])
+        self.assertEqual(len(fresh), 3)
+
+    def test_duplicates_within_a_batch(self):
+        """Teste le filtrage des doublons d'un même lot."""
+        self.assertEqual(len(self.deduplicator.filter([make_alert(99.99), make_alert(99.99)])), 1)
+
+    def test_filter_without_record(self):
+        """Teste qu'une alerte non mémorisée reste signalable jusqu'à remember()."""
+        alerts = self.deduplicator.filter([make_alert(99.99)], record=False)
+        self.assertEqual(len(self.deduplicator.filter([make_alert(99.99)], record=False)), 1)
+
+        self.deduplicator.remember(alerts)
+        self.assertTrue(self.deduplicator.is_duplicate(make_alert(99.99)))
+
+    def test_warm_from_alerts_table(self):
+        """Teste le rechargement des alertes récentes depuis la base."""
+        db = MagicMock()
+        recent = datetime.fromtimestamp(self.clock.now - 600)
+        db.get_alerts_since.return_value = [
+            {'url': "https://example.com/test", 'alert_type': 'price_drop', 'price': 99.99, 'timestamp': recent}
+        ]
+
+        self.assertEqual(self.deduplicator.warm(db), 1)
+        self.assertTrue(self.deduplicator.is_duplicate(make_alert(99.99)))
+        self.assertEqual(db.get_alerts_since.call_args.args[0],
+                         datetime.fromtimestamp(self.clock.now - 3600))
+
+        # La période de silence court depuis la date de l'alerte enregistrée
+        self.clock.now += 3000
+        self.assertFalse(self.deduplicator.is_duplicate(make_alert(99.99)))
+
+    def test_expired_entries_are_purged(self):
+        """Teste que la mémoire ne conserve pas les alertes expirées."""
+        self.deduplicator.filter([make_alert(10.0, url=f"https://example.com/{i}") for i in range(1000)])
+        self.clock.now += 3600
+        self.deduplicator.filter([make_alert(10.0, url=f"https://example.com/new/{i}") for i in range(100)])
+
+        self.assertEqual(len(self.deduplicator), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from src.scraper.archive import PageArchive
+
+class TestPageArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = PageArchive(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_append_and_read(self):
+        """Teste l'ajout puis la relecture d'une page compressée."""
+        body = b'<html>' + b'<div class="s-result-item">produit</div>' * 100 + b'</html>'
+        entry = self.archive.append('amazon', 'tv', 'https://www.amazon.fr/s?k=tv', body)
+
+        self.assertEqual(self.archive.read(entry), body)
+        self.assertLess(entry.length, len(body))
+        self.assertTrue(os.path.exists(self.archive.index_path))
+
+    def test_entries_are_filtered(self):
+        """Teste le filtrage de l'index par site, requête et période."""
+        self.archive.append('amazon', 'tv', 'u1', b'a', timestamp=datetime(2024, 1, 1))
+        self.archive.append('amazon', 'velo', 'u2', b'b', timestamp=datetime(2024, 1, 2))
+        self.archive.append('cdiscount', 'tv', 'u3', b'c', timestamp=datetime(2024, 1, 3))
+
+        self.assertEqual(len(self.archive.entries()), 3)
+        self.assertEqual([e.url for e in self.archive.entries(site='amazon')], ['u1', 'u2'])
+        self.assertEqual([e.url for e in self.archive.entries(query='tv')], ['u1', 'u3'])
+        self.assertEqual(
+            [e.url for e in self.archive.entries(since=datetime(2024, 1, 2))],
+            ['u2', 'u3']
+        )
+
+    def test_archive_is_append_only(self):
+        """Teste que les trames existantes restent lisibles après de nouveaux ajouts."""
+        first = self.archive.append('amazon', 'tv', 'u1', b'premiere page')
+        PageArchive(self.tmpdir.name).append('amazon', 'tv', 'u1', b'seconde page')
+
+        entries = self.archive.entries()
+        self.assertEqual(entries[0].offset, first.offset)
+        self.assertEqual(self.archive.read(entries[0]), b'premiere page')
+        self.assertEqual(self.archive.read(entries[1]), b'seconde page')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+from src.database.cache import MISSING, SharedCache, TTLCache, cache_from_env, shared_cache_from_env
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeRedis:
+    """Serveur compatible Redis réduit à GET/SETEX/DELETE."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+class TestTTLCache(unittest.TestCase):
+    def test_expiration(self):
+        """Teste l'expiration des entrées après le TTL."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set('a', [1, 2])
+
+        self.assertEqual(cache.get('a'), [1, 2])
+        clock.now = 10
+        self.assertIs(cache.get('a'), MISSING)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        """Teste l'éviction de l'entrée la moins récemment utilisée."""
+        cache = TTLCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertIsNone(cache.delete(['a', 'inconnue']))
+        self.assertIs(cache.get('a'), MISSING)
+
+class TestSharedCache(unittest.TestCase):
+    def test_values_are_shared_between_processes(self):
+        """Teste qu'une valeur écrite par un processus est lue par un autre."""
+        server = FakeRedis()
+        writer = SharedCache(server)
+        reader = SharedCache(server)
+
+        writer.set('history:u', [{'price': 10.0}])
+        self.assertEqual(reader.get('history:u'), [{'price': 10.0}])
+
+        writer.delete(['history:u'])
+        self.assertIs(writer.get('history:u'), MISSING)
+        self.assertEqual(server.data, {})
+
+    def test_cache_from_env(self):
+        """Teste la configuration du cache par l'environnement."""
+        with patch.dict('os.environ', {'DB_CACHE_TTL': '0'}):
+            self.assertIsNone(cache_from_env())
+        with patch.dict('os.environ', {'DB_CACHE_TTL': '5', 'DB_CACHE_SIZE': '10'}):
+            cache = cache_from_env()
+            self.assertEqual((cache.ttl, cache.maxsize), (5.0, 10))
+
+    def test_shared_cache_from_env(self):
+        """Teste qu'un seul cache est construit par configuration dans le processus."""
+        with patch.dict('os.environ', {'DB_CACHE_TTL': '7', 'DB_CACHE_SIZE': '10'}):
+            cache = shared_cache_from_env()
+            self.assertIs(shared_cache_from_env(), cache)
+        with patch.dict('os.environ', {'DB_CACHE_TTL': '8', 'DB_CACHE_SIZE': '10'}):
+            self.assertEqual(shared_cache_from_env().ttl, 8.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from src.scraper.category_matcher import CategoryMatcher, normalize_text
+
+class TestCategoryMatcher(unittest.TestCase):
+    def setUp(self):
+        self.taxonomy = {
+            'Électronique': ['smartphone', 'tv', 'console'],
+            'Mode': ['chaussures', 'vêtement', 'sac'],
+            'Sports': ['sport', 'vélo']
+        }
+        self.matcher = CategoryMatcher(self.taxonomy)
+
+    def test_normalize_text(self):
+        """Teste la suppression des accents et la mise en minuscules."""
+        self.assertEqual(normalize_text('Vélo ÉLECTRIQUE'), 'velo electrique')
+
+    def test_classify_matches_naive_loop(self):
+        """Teste que l'automate donne le même résultat que la boucle sur les mots-clés."""
+        def naive(name):
+            name = normalize_text(name)
+            for category, keywords in self.taxonomy.items():
+                if any(normalize_text(keyword) in name for keyword in keywords):
+                    return category
+            return 'Autre'
+
+        names = [
+            'Chaussures de sport Nike',  # Mode précède Sports dans la taxonomie
+            'Sac de sport',
+            'Velo de route',
+            'Vêtements de SPORT',
+            'Support TV mural',
+            'Produit inconnu',
+            'smartphonesmartphone'
+        ]
+        for name in names:
+            self.assertEqual(self.matcher.classify(name), naive(name), name)
+
+    def test_overlapping_keywords(self):
+        """Teste la reconnaissance d'un mot-clé inclus dans un préfixe d'un autre."""
+        matcher = CategoryMatcher({'A': ['abcd'], 'B': ['bc']})
+        self.assertEqual(matcher.classify('xabcx'), 'B')
+        self.assertEqual(matcher.classify('xabcd'), 'A')
+
+    def test_from_file_and_cache(self):
+        """Teste le chargement depuis un fichier JSON et la mise en cache des noms."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'categories.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.taxonomy, f)
+            matcher = CategoryMatcher.from_file(path, default='Divers')
+
+        self.assertEqual(matcher.classify('Console portable'), 'Électronique')
+        self.assertEqual(matcher.classify('Console portable'), 'Électronique')
+        self.assertEqual(matcher.classify('Lampe'), 'Divers')
+        self.assertEqual(matcher._classify_cached.cache_info().hits, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,13 @@
+import importlib.util
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from datetime import datetime
-from src.database.db_manager import DatabaseManager
+from src.database.db_manager import EXPORT_GAP_SECONDS, DatabaseManager
+from src.database.parquet_store import save_watermarks
 from src.scraper.scraper import Product
+from src.scraper.product import ProductBatch
 from src.analyzer.price_analyzer import PriceAlert
 
 class TestDatabaseManager(unittest.TestCase):
@@ -18,6 +23,9 @@ class TestDatabaseManager(unittest.TestCase):
         self.env_patcher.start()
         
         self.db_manager = DatabaseManager()
+        # Cache partagé par le processus: vidé pour isoler les tests
+        if self.db_manager.cache is not None:
+            self.db_manager.cache.clear()
         self.sample_product = Product(
             name="Test Product",
             price=99.99,
@@ -143,6 +151,234 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertEqual(alerts[0]['price'], 99.99)
         self.assertEqual(alerts[0]['name'], 'Test Product')
 
+    @patch('src.database.db_manager.execute_values')
+    @patch('psycopg2.connect')
+    def test_save_batch(self, mock_connect, mock_execute_values):
+        """Teste la sauvegarde groupée d'un lot de produits."""
+        batch = ProductBatch()
+        batch.append("A", 10.0, 15.0, "https://example.com/a", "amazon", "Autre")
+        batch.append("B", 20.0, None, "https://example.com/b", "amazon", "Autre")
+        batch.append("A", 11.0, None, "https://example.com/a", "amazon", "Autre")
+        mock_execute_values.side_effect = [
+            [(1, "https://example.com/a"), (2, "https://example.com/b")],
+            None
+        ]
+
+        saved = self.db_manager.save_batch(batch)
+
+        self.assertEqual(saved, 3)
+        self.assertEqual(mock_execute_values.call_count, 2)
+        products_call, history_call = mock_execute_values.call_args_list
+        self.assertIn('ON CONFLICT (url)', products_call.args[1])
+        self.assertEqual(len(products_call.args[2]), 2)
+        self.assertIn('INSERT INTO price_history', history_call.args[1])
+        self.assertEqual([row[:3] for row in history_call.args[2]],
+                         [(1, 10.0, 15.0), (2, 20.0, None), (1, 11.0, None)])
+
+    @patch('src.database.db_manager.execute_values')
+    @patch('psycopg2.connect')
+    def test_save_results_is_idempotent(self, mock_connect, mock_execute_values):
+        """Teste qu'une exécution déjà enregistrée n'est pas réécrite."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        batch = ProductBatch()
+        batch.append("Test Product", 99.99, 199.99, "https://example.com/test", "amazon", "Électronique")
+        mock_execute_values.side_effect = [[(1, "https://example.com/test")], None, None]
+
+        mock_cursor.fetchone.return_value = ("7:2024-01-01",)
+        self.assertTrue(self.db_manager.save_results("7:2024-01-01", batch, [self.sample_alert]))
+        self.assertEqual(mock_execute_values.call_count, 3)
+        alerts_call = mock_execute_values.call_args_list[2]
+        self.assertIn('INSERT INTO alerts', alerts_call.args[1])
+        self.assertEqual(alerts_call.args[2][0][0], 1)
+
+        mock_cursor.fetchone.return_value = None
+        self.assertFalse(self.db_manager.save_results("7:2024-01-01", batch, [self.sample_alert]))
+        self.assertEqual(mock_execute_values.call_count, 3)
+
+    @patch('psycopg2.connect')
+    def test_price_history_cache(self, mock_connect):
+        """Teste le cache de lecture de l'historique et son invalidation à l'écriture."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [{'price': 99.99, 'timestamp': datetime.now()}]
+
+        first = self.db_manager.get_price_history(self.sample_product.url)
+        first[0]['price'] = 0
+        second = self.db_manager.get_price_history(self.sample_product.url)
+        self.assertEqual(second[0]['price'], 99.99)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+        mock_cursor.fetchone.return_value = (1,)
+        self.db_manager.save_product(self.sample_product)
+        mock_cursor.execute.reset_mock()
+        self.db_manager.get_price_history(self.sample_product.url)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+    @patch('psycopg2.connect')
+    def test_recent_alerts_cache(self, mock_connect):
+        """Teste que les alertes en cache servent les limites inférieures et sont invalidées par save_alert."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [{'id': i} for i in range(10)]
+
+        self.db_manager.get_recent_alerts(limit=10)
+        self.assertEqual(len(self.db_manager.get_recent_alerts(limit=5)), 5)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+        mock_cursor.fetchone.return_value = (1,)
+        self.db_manager.save_alert(self.sample_alert)
+        mock_cursor.execute.reset_mock()
+        self.db_manager.get_recent_alerts(limit=5)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+    @patch('src.database.db_manager.execute_values')
+    @patch('psycopg2.connect')
+    def test_default_cache_is_shared(self, mock_connect, mock_execute_values):
+        """Teste qu'une écriture d'une instance invalide le cache de lecture des autres instances."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [{'price': 99.99, 'timestamp': datetime.now()}]
+        mock_execute_values.side_effect = [[(1, self.sample_product.url)], None]
+        reader = DatabaseManager()
+        self.assertIs(reader.cache, self.db_manager.cache)
+
+        reader.get_price_history(self.sample_product.url)
+        self.db_manager.save_batch(ProductBatch.from_products([self.sample_product]))
+        mock_cursor.execute.reset_mock()
+        reader.get_price_history(self.sample_product.url)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+    @patch('psycopg2.connect')
+    def test_cache_can_be_disabled(self, mock_connect):
+        """Teste que cache=None ou cache=False désactive le cache malgré l'environnement."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [{'price': 99.99, 'timestamp': datetime.now()}]
+
+        with patch.dict('os.environ', {'DB_CACHE_TTL': '30'}):
+            self.assertIsNotNone(DatabaseManager().cache)
+            for disabled in (None, False):
+                db_manager = DatabaseManager(cache=disabled)
+                self.assertIsNone(db_manager.cache)
+
+        mock_cursor.execute.reset_mock()
+        db_manager.get_price_history(self.sample_product.url)
+        db_manager.get_price_history(self.sample_product.url)
+        self.assertEqual(mock_cursor.execute.call_count, 2)
+
+    @patch('psycopg2.connect')
+    def test_get_price_histories(self, mock_connect):
+        """Teste la récupération groupée de plusieurs historiques en une requête."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        now = datetime.now()
+        mock_cursor.fetchall.return_value = [
+            {'url': 'https://example.com/a', 'price': 10.0, 'timestamp': now},
+            {'url': 'https://example.com/a', 'price': 12.0, 'timestamp': now},
+            {'url': 'https://example.com/b', 'price': 20.0, 'timestamp': now}
+        ]
+
+        urls = ['https://example.com/a', 'https://example.com/b', 'https://example.com/c']
+        histories = self.db_manager.get_price_histories(urls)
+
+        self.assertEqual([len(histories[url]) for url in urls], [2, 1, 0])
+        sql, params = mock_cursor.execute.call_args.args
+        self.assertIn('ANY(%s)', sql)
+        self.assertEqual(params, (urls,))
+
+        # Tout est désormais en cache, y compris l'historique vide
+        self.db_manager.get_price_histories(urls)
+        self.assertEqual(self.db_manager.get_price_history('https://example.com/b')[0]['price'], 20.0)
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow n'est pas installé")
+    @patch('psycopg2.connect')
+    def test_export_parquet_is_incremental(self, mock_connect):
+        """Teste l'export par curseur serveur à partir du dernier id exporté."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        day = datetime(2024, 1, 1, 10)
+        mock_cursor.fetchmany.side_effect = [
+            [(1, 1, "https://example.com/a", "A", "amazon", "Électronique", 10.0, 15.0, day),
+             (2, 2, "https://example.com/b", "B", "fnac", "Électronique", 20.0, None, day)],
+            # L'id 3 n'est pas encore validé quand l'id 4 l'est
+            [(4, 1, "https://example.com/a", "A", "amazon", "Électronique", 11.0, None, day)],
+            [],
+            [(3, 2, "https://example.com/b", "B", "fnac", "Électronique", 19.0, None, day)],
+            [],
+            []
+        ]
+
+        with tempfile.TemporaryDirectory() as root:
+            exported = self.db_manager.export_parquet(root, tables=['price_history'], batch_size=2)
+            self.assertEqual(exported, {'price_history': 3})
+            mock_connect.return_value.__enter__.return_value.cursor.assert_called_with(
+                name='export_price_history')
+            self.assertEqual(mock_cursor.execute.call_args.args[1], (0, [], []))
+
+            # Le second export reprend après le dernier id écrit et redemande l'id sauté
+            self.assertEqual(self.db_manager.export_parquet(root, tables=['price_history']),
+                             {'price_history': 1})
+            self.assertEqual(mock_cursor.execute.call_args.args[1], (4, [3], [3]))
+
+            # Une fois exporté, l'id n'est plus redemandé
+            self.db_manager.export_parquet(root, tables=['price_history'])
+            self.assertEqual(mock_cursor.execute.call_args.args[1], (4, [], []))
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow n'est pas installé")
+    @patch('psycopg2.connect')
+    def test_export_parquet_replay_has_no_duplicates(self, mock_connect):
+        """Teste qu'un paquet interrompu puis repris avec un id sauté entre-temps validé n'est pas exporté deux fois."""
+        import pyarrow.dataset as ds
+        from database import parquet_store
+
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        day = datetime(2024, 1, 1, 10)
+
+        def row(row_id, site):
+            return (row_id, row_id, f"https://example.com/{row_id}", "P", site, "Autre", 10.0, None, day)
+
+        mock_cursor.fetchmany.side_effect = [
+            [row(1, 'amazon'), row(3, 'amazon')], [],
+            # Export interrompu entre l'écriture des fichiers et l'avancée du watermark
+            [row(4, 'amazon'), row(5, 'fnac')],
+            # Reprise: l'id 2 a été validé entre-temps, les paquets sont découpés autrement
+            [row(2, 'fnac'), row(4, 'amazon')], [row(5, 'fnac')], []
+        ]
+        advance = parquet_store.advance_watermark
+        calls = []
+
+        def interrupted_advance(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OSError("export interrompu")
+            return advance(*args)
+
+        with tempfile.TemporaryDirectory() as root, \
+                patch.object(parquet_store, 'advance_watermark', side_effect=interrupted_advance):
+            self.db_manager.export_parquet(root, tables=['price_history'], batch_size=2)
+            self.db_manager.export_parquet(root, tables=['price_history'], batch_size=2)
+            self.db_manager.export_parquet(root, tables=['price_history'], batch_size=2)
+
+            ids = ds.dataset(f"{root}/price_history", format='parquet').to_table(columns=['id'])
+            self.assertEqual(sorted(ids.column('id').to_pylist()), [1, 2, 3, 4, 5])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow n'est pas installé")
+    @patch('psycopg2.connect')
+    def test_export_parquet_forgets_old_gaps(self, mock_connect):
+        """Teste qu'un id sauté depuis plus de EXPORT_GAP_SECONDS (transaction annulée) n'est plus redemandé."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchmany.return_value = []
+
+        with tempfile.TemporaryDirectory() as root:
+            save_watermarks(root, {'price_history': {'last_id': 9, 'gaps': [
+                [3, 4, time.time() - EXPORT_GAP_SECONDS - 1], [7, 7, time.time()]]}})
+            self.db_manager.export_parquet(root, tables=['price_history'])
+            self.assertEqual(mock_cursor.execute.call_args.args[1], (9, [7], [7]))
+
     @patch('psycopg2.connect')
     def test_error_handling(self, mock_connect):
         """Teste la gestion des erreurs de base de données."""
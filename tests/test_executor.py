@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+import unittest
+from src.concurrency.executor import BlockingExecutor
+
+class TestBlockingExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = BlockingExecutor(name='test', max_workers=2, max_queue=1, timeout=2.0)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_run_returns_result_and_propagates_errors(self):
+        """Teste le retour du résultat et la remontée des exceptions de l'appel bloquant."""
+        self.assertEqual(asyncio.run(self.executor.run(pow, 2, 10)), 1024)
+        self.assertEqual(asyncio.run(self.executor.run(int, '7', base=8)), 7)
+        with self.assertRaises(ValueError):
+            asyncio.run(self.executor.run(int, 'abc'))
+
+    def test_blocking_calls_overlap_with_event_loop(self):
+        """Teste que la boucle asyncio continue de tourner pendant un appel bloquant."""
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await self.executor.run(time.sleep, 0.1)
+            task.cancel()
+            return ticks
+
+        self.assertGreater(asyncio.run(scenario()), 3)
+
+    def test_queue_depth_is_bounded(self):
+        """Teste qu'au plus max_workers + max_queue appels sont en attente à la fois."""
+        release = threading.Event()
+        peak = 0
+
+        async def scenario():
+            nonlocal peak
+            tasks = [asyncio.create_task(self.executor.run(release.wait)) for _ in range(6)]
+            await asyncio.sleep(0.05)
+            peak = self.executor.pending
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        self.assertEqual(peak, 3)
+        self.assertEqual(self.executor.pending, 0)
+
+    def test_timeout_keeps_slot_until_thread_finishes(self):
+        """Teste le délai d'attente: l'appelant abandonne, la place reste occupée par le thread."""
+        release = threading.Event()
+
+        async def scenario():
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.executor.run(release.wait, timeout=0.05)
+            self.assertEqual(self.executor.pending, 1)
+            release.set()
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.executor.pending, 0)
+
+        asyncio.run(scenario())
+
+if __name__ == '__main__':
+    unittest.main()
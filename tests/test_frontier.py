@@ -0,0 +1,39 @@
+import unittest
+from datetime import datetime
+from src.scraper.frontier import CrawlFrontier
+from src.scraper.scraper import Product
+
+class TestCrawlFrontier(unittest.TestCase):
+    def setUp(self):
+        self.frontier = CrawlFrontier()
+
+    def test_add_deduplicates_urls(self):
+        """Teste qu'une URL n'est considérée comme nouvelle qu'une seule fois."""
+        self.assertTrue(self.frontier.add('https://www.amazon.fr/product/1'))
+        self.assertFalse(self.frontier.add('https://www.amazon.fr/product/1'))
+        self.assertTrue(self.frontier.add('https://www.amazon.fr/product/2'))
+        self.assertIn('https://www.amazon.fr/product/1', self.frontier)
+        self.assertEqual(len(self.frontier), 2)
+
+    def test_filter_new_products(self):
+        """Teste le filtrage des produits déjà collectés."""
+        products = [
+            Product(
+                name=f"Produit {i}",
+                price=10.0,
+                original_price=None,
+                url=f"https://example.com/{i % 2}",
+                site="amazon",
+                category="Autre",
+                timestamp=datetime.now()
+            ) for i in range(4)
+        ]
+
+        new_products = self.frontier.filter_new(products)
+        self.assertEqual([p.name for p in new_products], ['Produit 0', 'Produit 1'])
+
+        self.frontier.clear()
+        self.assertEqual(len(self.frontier), 0)
+
+if __name__ == '__main__':
+    unittest.main()
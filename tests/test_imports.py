@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Module -> dépendances lourdes qu'il ne doit pas charger à l'import
+LIGHT_IMPORTS = {
+    'monitoring.metrics': ['http.server', 'opentelemetry'],
+    'scraper.product': ['numpy'],
+    'database.db_manager': ['numpy', 'httpx', 'bs4', 'analyzer.price_analyzer'],
+    'notifier.notification_manager': ['telegram', 'discord', 'aiohttp', 'numpy'],
+    'worker.worker': ['numpy', 'httpx', 'bs4', 'telegram', 'discord'],
+}
+
+def loaded_modules(module: str):
+    """Importe un module dans un interpréteur neuf et renvoie les modules chargés."""
+    code = f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True,
+                            text=True, check=True).stdout
+    return set(json.loads(output))
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_dependencies_are_deferred(self):
+        """Teste que les dépendances lourdes ne sont pas chargées à l'import des modules légers."""
+        for module, heavy in LIGHT_IMPORTS.items():
+            with self.subTest(module=module):
+                modules = loaded_modules(module)
+                self.assertIn(module, modules)
+                self.assertEqual([name for name in heavy if name in modules], [])
+
+if __name__ == '__main__':
+    unittest.main()
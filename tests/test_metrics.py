@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+import urllib.request
+from bs4 import BeautifulSoup
+from src.monitoring.metrics import MetricsRegistry
+from src.scraper import scraper as scraper_module
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(enabled=True)
+        self.counter = self.registry.counter('pages_fetched_total', 'Pages téléchargées')
+        self.histogram = self.registry.histogram('parse_seconds', 'Durée', buckets=(0.1, 1.0))
+
+    def test_counter_and_histogram(self):
+        """Teste l'incrémentation des compteurs et la répartition dans les seaux."""
+        self.counter.inc(site='amazon')
+        self.counter.inc(2, site='amazon')
+        self.histogram.observe(0.05)
+        self.histogram.observe(0.5)
+
+        self.assertEqual(self.counter.value(site='amazon'), 3)
+        self.assertEqual(self.histogram.count(), 2)
+        self.assertIs(self.registry.counter('pages_fetched_total'), self.counter)
+
+    def test_disabled_registry_records_nothing(self):
+        """Teste qu'un registre désactivé ignore toutes les mesures."""
+        self.registry.disable()
+        self.counter.inc(site='amazon')
+        with self.registry.timer(self.histogram):
+            pass
+
+        self.assertEqual(self.counter.value(site='amazon'), 0)
+        self.assertEqual(self.histogram.count(), 0)
+
+    def test_render_prometheus(self):
+        """Teste l'export au format texte Prometheus."""
+        self.counter.inc(site='amazon')
+        self.histogram.observe(0.5, step='parse')
+
+        text = self.registry.render_prometheus()
+        self.assertIn('# TYPE pages_fetched_total counter', text)
+        self.assertIn('pages_fetched_total{site="amazon"} 1', text)
+        self.assertIn('parse_seconds_bucket{step="parse",le="0.1"} 0', text)
+        self.assertIn('parse_seconds_bucket{step="parse",le="1.0"} 1', text)
+        self.assertIn('parse_seconds_count{step="parse"} 1', text)
+
+    def test_timed_coroutine_and_sink(self):
+        """Teste le décorateur sur une coroutine et la transmission aux puits."""
+        received = []
+        self.registry.add_sink(lambda *args: received.append(args))
+
+        @self.registry.timed(self.histogram, operation='test')
+        async def work():
+            return 42
+
+        self.assertEqual(asyncio.run(work()), 42)
+        self.assertEqual(self.histogram.count(operation='test'), 1)
+        self.assertEqual(received[0][:2], ('parse_seconds', 'histogram'))
+
+    def test_http_endpoint(self):
+        """Teste l'exposition des métriques sur HTTP."""
+        self.counter.inc(site='amazon')
+        server = self.registry.start_http_server(0, host='127.0.0.1')
+        try:
+            port = server.server_address[1]
+            body = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('pages_fetched_total{site="amazon"} 1', body)
+
+    def test_scraper_instrumentation(self):
+        """Teste que le parsing alimente les métriques du registre partagé."""
+        registry = scraper_module.metrics
+        registry.enable()
+        registry.reset()
+        try:
+            scraper = scraper_module.Scraper()
+            html = '<div class="s-result-item"><h2 class="a-text-normal">TV</h2>' \
+                   '<span class="a-price-whole">99</span><a href="/p/1">x</a></div>'
+            scraper._parse_products(BeautifulSoup(html, 'html.parser'), 'amazon',
+                                    scraper.sites_config['amazon'])
+
+            self.assertEqual(scraper_module.PRODUCTS_PARSED.value(site='amazon'), 1)
+            self.assertEqual(scraper_module.PARSE_SECONDS.count(site='amazon'), 1)
+        finally:
+            registry.disable()
+            registry.reset()
+
+if __name__ == '__main__':
+    unittest.main()
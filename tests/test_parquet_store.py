@@ -0,0 +1,130 @@
+import glob
+import importlib.util
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from src.database.parquet_store import (advance_watermark, load_watermarks, partition_paths,
+                                        read_price_history, remove_parts, save_watermarks,
+                                        watermark_state, write_partitions)
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+HAS_DUCKDB = importlib.util.find_spec('duckdb') is not None
+
+def history_row(row_id, site, day, hour, price, original_price=None):
+    return (row_id, row_id, f"https://{site}.fr/p/{row_id % 3}", f"Produit {row_id % 3}", site,
+            "Électronique", price, original_price, datetime(2024, 1, day, hour))
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow n'est pas installé")
+class TestParquetStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.rows = [
+            history_row(1, 'amazon', 1, 10, 10.0),
+            history_row(2, 'fnac', 1, 10, 20.0, 25.0),
+            history_row(3, 'amazon', 2, 9, 30.0),
+            history_row(4, 'amazon', 1, 11, 40.0)
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partitions_by_date_and_site(self):
+        """Teste l'écriture d'un paquet dans une partition par date et par site."""
+        self.assertEqual(write_partitions(self.root, 'price_history', self.rows), 3)
+
+        files = sorted(os.path.relpath(path, self.root)
+                       for path in glob.glob(os.path.join(self.root, '**', '*.parquet'), recursive=True))
+        self.assertEqual(files, [
+            os.path.join('price_history', 'date=2024-01-01', 'site=amazon', 'part-000000000001.parquet'),
+            os.path.join('price_history', 'date=2024-01-01', 'site=fnac', 'part-000000000001.parquet'),
+            os.path.join('price_history', 'date=2024-01-02', 'site=amazon', 'part-000000000001.parquet')
+        ])
+
+        # Un paquet rejoué remplace ses fichiers
+        write_partitions(self.root, 'price_history', self.rows)
+        self.assertEqual(len(glob.glob(os.path.join(self.root, '**', '*.parquet'), recursive=True)), 3)
+
+    def test_interrupted_parts_are_removed(self):
+        """Teste que partition_paths annonce les fichiers écrits et que remove_parts les supprime."""
+        paths = partition_paths(self.root, 'price_history', self.rows)
+        write_partitions(self.root, 'price_history', self.rows)
+
+        self.assertEqual(sorted(os.path.relpath(path, self.root) for path in
+                                glob.glob(os.path.join(self.root, '**', '*.parquet'), recursive=True)), paths)
+        remove_parts(self.root, paths + [os.path.join('price_history', 'absent.parquet')])
+        self.assertEqual(glob.glob(os.path.join(self.root, '**', '*.parquet'), recursive=True), [])
+
+    def test_watermarks(self):
+        """Teste la persistance du dernier id exporté."""
+        self.assertEqual(load_watermarks(self.root), {})
+        save_watermarks(self.root, {'price_history': 4})
+        self.assertEqual(load_watermarks(self.root), {'price_history': 4})
+        # Ancien format (dernier id seul) et nouveau format avec intervalles manquants
+        self.assertEqual(watermark_state(load_watermarks(self.root), 'price_history'), (4, [], []))
+        self.assertEqual(watermark_state({'alerts': {'last_id': 9, 'gaps': [[5, 6, 1.0]]}}, 'alerts'),
+                         (9, [[5, 6, 1.0]], []))
+        self.assertEqual(watermark_state({}, 'alerts'), (0, [], []))
+
+    def test_advance_watermark_tracks_gaps(self):
+        """Teste le suivi des ids sautés sous le watermark et leur retrait une fois exportés."""
+        last_id, gaps = advance_watermark(0, [], [1, 2, 5, 9], now=100.0)
+        self.assertEqual((last_id, gaps), (9, [[3, 4, 100.0], [6, 8, 100.0]]))
+
+        # Les ids 3 et 7 sont validés plus tard: ils sortent des intervalles manquants
+        last_id, gaps = advance_watermark(last_id, gaps, [3, 7, 10, 12], now=200.0)
+        self.assertEqual((last_id, gaps), (12, [[4, 4, 100.0], [6, 6, 100.0], [8, 8, 100.0],
+                                                [11, 11, 200.0]]))
+
+    def _read(self, **kwargs):
+        rows = []
+        for record_batch in read_price_history(self.root, **kwargs):
+            columns = record_batch.to_pydict()
+            rows.extend(zip(columns['timestamp'], columns['site'], columns['price']))
+        return rows
+
+    def _read_original_prices(self):
+        prices = []
+        for record_batch in read_price_history(self.root):
+            prices.extend(record_batch.column('original_price').to_pylist())
+        return prices
+
+    def _check_reader(self):
+        write_partitions(self.root, 'price_history', self.rows)
+
+        self.assertEqual([price for _, _, price in self._read()], [10.0, 20.0, 40.0, 30.0])
+        self.assertEqual(self._read(start=datetime(2024, 1, 1, 11), sites=['amazon']),
+                         [(datetime(2024, 1, 1, 11), 'amazon', 40.0),
+                          (datetime(2024, 1, 2, 9), 'amazon', 30.0)])
+        self.assertEqual(self._read_original_prices(), [None, 25.0, None, None])
+
+        # Fichier exporté avant l'ajout du prix original: colonne lue comme nulle
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        directory = os.path.join(self.root, 'price_history', 'date=2024-01-03', 'site=amazon')
+        os.makedirs(directory)
+        old = pa.table({'id': pa.array([5], pa.int64()), 'product_id': pa.array([5], pa.int64()),
+                        'url': ["https://amazon.fr/p/2"], 'name': ["Produit 2"],
+                        'category': ["Électronique"], 'price': [50.0],
+                        'timestamp': pa.array([datetime(2024, 1, 3, 8)], pa.timestamp('us'))})
+        pq.write_table(old, os.path.join(directory, 'part-000000000005.parquet'))
+        self.assertEqual(self._read_original_prices(), [None, 25.0, None, None, None])
+
+    @unittest.skipUnless(HAS_DUCKDB, "duckdb n'est pas installé")
+    def test_read_with_duckdb(self):
+        """Teste la lecture chronologique et filtrée de l'historique avec DuckDB."""
+        self._check_reader()
+
+    def test_read_with_pyarrow(self):
+        """Teste la même lecture avec pyarrow seul."""
+        with patch.dict('sys.modules', {'duckdb': None}):
+            self._check_reader()
+
+    def test_read_empty_export(self):
+        """Teste la lecture d'un répertoire sans export."""
+        self.assertEqual(self._read(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,12 @@
+import importlib.util
+import tempfile
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.analyzer.price_analyzer import PriceAnalyzer, PriceAlert
+from src.analyzer.product_matcher import ProductMatcher
 from src.scraper.scraper import Product
+from src.scraper.product import ProductBatch
+from src.database.parquet_store import write_partitions
 
 class TestPriceAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -120,5 +125,128 @@ class TestPriceAnalyzer(unittest.TestCase):
         self.assertEqual(alert.alert_type, 'low_price')
         self.assertGreater(alert.confidence, 0)
 
+    def test_analyze_batch_matches_analyze_prices(self):
+        """Teste que l'analyse par lot produit les mêmes alertes que l'analyse produit par produit."""
+        products = self.sample_products + [
+            Product(
+                name=f"Product {i}",
+                price=100.0 + i * 10,
+                original_price=None,
+                url=f"https://example.com/product{i}",
+                site="amazon",
+                category="Test",
+                timestamp=datetime.now()
+            ) for i in range(10)
+        ] + [
+            Product(
+                name="Anomaly Product",
+                price=1.0,
+                original_price=None,
+                url="https://example.com/anomaly",
+                site="amazon",
+                category="Test",
+                timestamp=datetime.now()
+            )
+        ]
+
+        expected = PriceAnalyzer().analyze_prices(products)
+        alerts = self.analyzer.analyze_batch(ProductBatch.from_products(products))
+
+        self.assertEqual(
+            [(a.product.url, a.alert_type) for a in alerts],
+            [(a.product.url, a.alert_type) for a in expected]
+        )
+        for alert, reference in zip(alerts, expected):
+            self.assertAlmostEqual(alert.confidence, reference.confidence)
+            self.assertAlmostEqual(alert.price_difference, reference.price_difference)
+
+    def _history_product(self, price):
+        return Product(
+            name="Casque Audio",
+            price=price,
+            original_price=None,
+            url="https://example.com/casque",
+            site="amazon",
+            category="Audio",
+            timestamp=datetime.now()
+        )
+
+    def test_price_history_anomaly(self):
+        """Teste la détection d'un prix anormal par rapport à l'historique du produit."""
+        for price in [149.99, 151.0, 148.5, 150.0, 149.0, 152.0]:
+            alerts = self.analyzer.analyze_prices([self._history_product(price)])
+            self.assertEqual(alerts, [])
+
+        self.assertEqual(len(self.analyzer.price_history.prices("https://example.com/casque")), 6)
+        self.assertFalse(self.analyzer._is_price_history_anomaly("https://example.com/casque", 147.0))
+        self.assertTrue(self.analyzer._is_price_history_anomaly("https://example.com/casque", 14.99))
+
+        alerts = self.analyzer.analyze_prices([self._history_product(14.99)])
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(alerts[0].alert_type, 'history_anomaly')
+        self.assertAlmostEqual(alerts[0].price_difference, 149.995 - 14.99)
+        self.assertGreater(alerts[0].confidence, 0.5)
+
+    def test_price_history_anomaly_in_batch(self):
+        """Teste la même détection sur un lot colonnaire."""
+        self.analyzer.price_history.seed("https://example.com/casque", [150.0, 150.0, 150.0, 150.0, 150.0])
+
+        alerts = self.analyzer.analyze_batch(ProductBatch.from_products([self._history_product(149.0)]))
+        self.assertEqual(alerts, [])
+
+        alerts = self.analyzer.analyze_batch(ProductBatch.from_products([self._history_product(15.0)]))
+        self.assertEqual([a.alert_type for a in alerts], ['history_anomaly'])
+
+    def test_cross_site_detection(self):
+        """Teste la comparaison avec le prix du même article sur d'autres sites."""
+        analyzer = PriceAnalyzer(matcher=ProductMatcher())
+        products = [
+            Product(
+                name=name,
+                price=price,
+                original_price=None,
+                url=url,
+                site=site,
+                category=category,
+                timestamp=datetime.now()
+            ) for name, price, url, site, category in [
+                ("Samsung Galaxy S23 128Go Noir", 799.0, "https://amazon.fr/p/1", "amazon", "A"),
+                ("Samsung Galaxy S23 - 128 Go - Noir", 789.0, "https://fnac.com/p/1", "fnac", "B"),
+                ("Samsung Galaxy S23 128 Go Noir", 79.0, "https://cdiscount.com/p/1", "cdiscount", "C"),
+            ]
+        ]
+
+        alerts = analyzer.analyze_prices(products)
+        self.assertEqual([(a.product.site, a.alert_type) for a in alerts], [('cdiscount', 'cross_site')])
+        self.assertAlmostEqual(alerts[0].price_difference, 794.0 - 79.0)
+
+        batch_alerts = PriceAnalyzer(matcher=ProductMatcher()).analyze_batch(
+            ProductBatch.from_products(products))
+        self.assertEqual([(a.product.site, a.alert_type) for a in batch_alerts], [('cdiscount', 'cross_site')])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow n'est pas installé")
+    def test_backtest_replays_exported_history(self):
+        """Teste le rejeu de la détection sur un historique exporté en Parquet."""
+        start = datetime(2024, 1, 1, 8)
+        prices = [150.0, 151.0, 149.0, 150.5, 149.5, 150.0, 15.0]
+        rows = []
+        for run, price in enumerate(prices):
+            timestamp = start + timedelta(hours=run)
+            rows.append((2 * run + 1, 1, "https://example.com/casque", "Casque Audio", "amazon",
+                         "Audio", price, None, timestamp))
+            # Prix barré exporté avec le prix: la baisse annoncée est rejouée
+            rows.append((2 * run + 2, 2, "https://example.com/enceinte", "Enceinte", "amazon",
+                         "Audio", 80.0, 80.0 if run < 6 else 200.0, timestamp))
+
+        with tempfile.TemporaryDirectory() as root:
+            write_partitions(root, 'price_history', rows)
+            alerts = PriceAnalyzer().backtest(root)
+            self.assertEqual(PriceAnalyzer().backtest(root, end=start + timedelta(hours=6)), [])
+
+        self.assertEqual(sorted((a.product.url, a.alert_type) for a in alerts),
+                         [("https://example.com/casque", 'history_anomaly'),
+                          ("https://example.com/enceinte", 'price_drop')])
+        self.assertEqual({a.timestamp for a in alerts}, {start + timedelta(hours=6)})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from src.analyzer.price_history import PriceHistoryStore
+
+class TestPriceHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.store = PriceHistoryStore(window=4, alpha=0.5, capacity=2)
+
+    def test_ring_buffer(self):
+        """Teste la conservation des derniers prix dans l'ordre d'arrivée."""
+        for price in [10.0, 11.0, 12.0, 13.0, 14.0]:
+            self.store.update(['a'], [price])
+
+        self.assertEqual(self.store.prices('a'), [11.0, 12.0, 13.0, 14.0])
+        self.assertEqual(self.store.prices('inconnu'), [])
+        self.assertIn('a', self.store)
+
+    def test_stats_are_vectorized(self):
+        """Teste le calcul des statistiques de plusieurs produits en un appel."""
+        self.store.update(['a', 'b', 'c'], [10.0, 100.0, 5.0])
+        self.store.update(['a', 'b'], [20.0, 100.0])
+        self.store.update(['a', 'b'], [30.0, 100.0])
+
+        stats = self.store.stats(['a', 'b', 'c', 'inconnu'])
+        self.assertEqual(stats['count'].tolist(), [3, 3, 1, 0])
+        self.assertEqual(stats['median'][:3].tolist(), [20.0, 100.0, 5.0])
+        self.assertEqual(stats['mad'][:2].tolist(), [10.0, 0.0])
+        self.assertTrue(np.isnan(stats['median'][3]))
+        # EWMA (alpha=0.5): 10 -> 15 -> 22.5
+        self.assertAlmostEqual(stats['ewma_mean'][0], 22.5)
+        self.assertEqual(len(self.store), 3)
+
+    def test_duplicate_urls_in_one_update(self):
+        """Teste qu'un produit présent deux fois dans un lot reçoit ses deux prix."""
+        self.store.update(['a', 'a'], [10.0, 20.0])
+        self.assertEqual(self.store.prices('a'), [10.0, 20.0])
+
+    def test_volatility(self):
+        """Teste le coefficient de variation des prix récents."""
+        self.store.seed('stable', [50.0, 50.0, 50.0])
+        self.store.seed('volatile', [10.0, 30.0])
+
+        volatility = self.store.volatility(['stable', 'volatile', 'inconnu'])
+        self.assertEqual(volatility[0], 0.0)
+        self.assertAlmostEqual(volatility[1], 0.5)
+        self.assertEqual(volatility[2], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
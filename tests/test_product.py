@@ -0,0 +1,74 @@
+import dataclasses
+import math
+import unittest
+from datetime import datetime
+from src.scraper.product import ProductBatch
+
+class TestProductBatch(unittest.TestCase):
+    def setUp(self):
+        self.timestamp = datetime(2024, 1, 1, 12, 0)
+        self.batch = ProductBatch(self.timestamp)
+        self.batch.append("TV 4K", 499.99, 999.99, "https://example.com/tv", "amazon", "Électronique")
+        self.batch.append("Vélo", 199.0, None, "https://example.com/velo", "amazon", "Sports")
+        self.batch.append("Console", 299.0, None, "https://example.com/console", "cdiscount", "Électronique")
+
+    def test_product_is_frozen(self):
+        """Teste que Product est immuable et sans __dict__."""
+        product = self.batch.product(0)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            product.price = 1.0
+        self.assertFalse(hasattr(product, '__dict__'))
+
+    def test_columns(self):
+        """Teste le stockage en colonnes des prix, textes et codes."""
+        self.assertEqual(len(self.batch), 3)
+        self.assertEqual(self.batch.prices.tolist(), [499.99, 199.0, 299.0])
+        self.assertTrue(math.isnan(self.batch.original_prices[1]))
+        self.assertEqual(self.batch.categories, ["Électronique", "Sports"])
+        self.assertEqual(self.batch.category_codes.tolist(), [0, 1, 0])
+        self.assertEqual(self.batch.site_codes.tolist(), [0, 0, 1])
+        self.assertEqual(self.batch.name(1), "Vélo")
+        self.assertEqual(self.batch.url(2), "https://example.com/console")
+
+    def test_roundtrip_with_products(self):
+        """Teste la conversion entre lot colonnaire et objets Product."""
+        products = self.batch.to_products()
+        self.assertIsNone(products[1].original_price)
+        self.assertEqual(products[0].timestamp, self.timestamp)
+
+        rebuilt = ProductBatch.from_products(products, self.timestamp)
+        self.assertEqual(rebuilt.to_products(), products)
+
+        # Les ajouts après une lecture restent visibles
+        rebuilt.append("Sac", 49.0, 99.0, "https://example.com/sac", "amazon", "Mode")
+        self.assertEqual(rebuilt.name(3), "Sac")
+        self.assertEqual(rebuilt.url(0), "https://example.com/tv")
+
+    def test_append_after_reading_columns(self):
+        """Teste qu'un ajout reste possible pendant qu'une vue numpy des colonnes est utilisée."""
+        prices = self.batch.prices
+        codes = self.batch.site_codes
+
+        self.batch.append("Sac", 49.0, 99.0, "https://example.com/sac", "fnac", "Mode")
+        self.batch.extend(self.batch.select([0]))
+
+        # Les vues déjà obtenues restent un instantané valide du lot
+        self.assertEqual(prices.tolist(), [499.99, 199.0, 299.0])
+        self.assertEqual(codes.tolist(), [0, 0, 1])
+        self.assertEqual(self.batch.prices.tolist(), [499.99, 199.0, 299.0, 49.0, 499.99])
+        self.assertEqual(self.batch.site_codes.tolist(), [0, 0, 1, 2, 0])
+
+    def test_copy_is_independent(self):
+        """Teste qu'une copie (éventuellement redatée) ne partage rien avec le lot d'origine."""
+        later = datetime(2024, 1, 2)
+        copy = self.batch.copy(timestamp=later)
+        copy.append("Sac", 49.0, 99.0, "https://example.com/sac", "fnac", "Mode")
+
+        self.assertEqual(copy.timestamp, later)
+        self.assertEqual(copy.to_products()[:3], [dataclasses.replace(p, timestamp=later)
+                                                  for p in self.batch.to_products()])
+        self.assertEqual(len(self.batch), 3)
+        self.assertEqual(self.batch.sites, ["amazon", "cdiscount"])
+
+if __name__ == '__main__':
+    unittest.main()
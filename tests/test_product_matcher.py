@@ -0,0 +1,49 @@
+import unittest
+from src.analyzer.product_matcher import ProductMatcher
+
+class TestProductMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = ProductMatcher()
+
+    def test_groups_near_duplicates_across_sites(self):
+        """Teste le regroupement d'un même article listé sur plusieurs sites."""
+        first = self.matcher.add("Samsung Galaxy S23 128Go Noir", "https://amazon.fr/p/1", "amazon", 799.0)
+        second = self.matcher.add("Samsung Galaxy S23 - 128 Go - Noir", "https://cdiscount.com/p/9", "cdiscount", 789.0)
+        other = self.matcher.add("Apple iPhone 15 Pro 256Go Titane", "https://amazon.fr/p/2", "amazon", 1299.0)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.matcher.matches("https://amazon.fr/p/1"), ["https://cdiscount.com/p/9"])
+        self.assertEqual(self.matcher.reference_prices("https://cdiscount.com/p/9"), [799.0])
+        self.assertEqual(self.matcher.reference_prices("https://amazon.fr/p/2"), [])
+
+    def test_same_url_updates_price(self):
+        """Teste qu'une annonce déjà indexée ne crée pas de doublon mais met à jour son prix."""
+        self.matcher.add("Vélo de route carbone Ultegra", "https://amazon.fr/p/3", "amazon", 1999.0)
+        self.matcher.add("Velo de route carbone Ultegra", "https://fnac.com/p/3", "fnac", 1899.0)
+        self.matcher.add("Vélo de route carbone Ultegra", "https://amazon.fr/p/3", "amazon", 199.0)
+
+        self.assertEqual(len(self.matcher), 2)
+        self.assertEqual(self.matcher.reference_prices("https://fnac.com/p/3"), [199.0])
+        self.assertIsNone(self.matcher.canonical_id("https://inconnu"))
+
+    def test_different_model_numbers_are_not_grouped(self):
+        """Teste que des noms proches mais de modèles différents restent séparés."""
+        self.matcher.add("Samsung Galaxy S23 128Go Noir", "https://amazon.fr/p/1", "amazon", 799.0)
+        self.matcher.add("Samsung Galaxy S24 128Go Noir", "https://amazon.fr/p/4", "amazon", 899.0)
+
+        self.assertNotEqual(self.matcher.canonical_id("https://amazon.fr/p/1"),
+                            self.matcher.canonical_id("https://amazon.fr/p/4"))
+
+    def test_transitive_groups_are_merged(self):
+        """Teste la fusion de groupes reliés par une annonce intermédiaire."""
+        matcher = ProductMatcher(threshold=0.5)
+        matcher.add("Console Nintendo Switch OLED blanche", "u1", "amazon", 319.0)
+        matcher.add("Nintendo Switch OLED blanche console", "u2", "fnac", 329.0)
+        matcher.add("Nintendo Switch OLED - blanche", "u3", "cdiscount", 309.0)
+
+        self.assertEqual(matcher.canonical_id("u1"), matcher.canonical_id("u3"))
+        self.assertEqual(sorted(matcher.reference_prices("u3")), [319.0, 329.0])
+
+if __name__ == '__main__':
+    unittest.main()
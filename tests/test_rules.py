@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+import numpy as np
+from src.analyzer.rules import BatchFeatures, RuleEngine
+from src.analyzer.price_analyzer import DEFAULT_RULES_PATH, PriceAnalyzer
+from src.analyzer.price_history import PriceHistoryStore
+from src.scraper.product import ProductBatch
+from src.scraper.scraper import Product
+
+def make_batch(rows):
+    batch = ProductBatch()
+    for i, (price, original_price, site, category) in enumerate(rows):
+        batch.append(f"Produit {i}", price, original_price, f"https://{site}.fr/p/{i}", site, category)
+    return batch
+
+def features(batch, category_stats=None):
+    history = PriceHistoryStore().stats(batch.urls())
+    return BatchFeatures.from_batch(batch, category_stats or {}, history)
+
+class TestRuleEngine(unittest.TestCase):
+    def setUp(self):
+        self.batch = make_batch([
+            (40.0, 100.0, 'amazon', 'Mode'),
+            (90.0, 100.0, 'amazon', 'Mode'),
+            (10.0, 100.0, 'fnac', 'Électronique'),
+            (50.0, None, 'fnac', 'Mode')
+        ])
+
+    def test_scoped_rules_in_priority_order(self):
+        """Teste les règles par site et catégorie, la première règle satisfaite l'emportant."""
+        engine = RuleEngine.from_config({'rules': [
+            {'name': 'fnac_casse', 'alert_type': 'price_drop', 'sites': ['fnac'],
+             'when': {'drop_ratio': {'>': 0.8}}},
+            {'name': 'mode_soldes', 'alert_type': 'mode_sale', 'categories': ['Mode', 'Maison'],
+             'when': {'drop_ratio': {'>=': 0.5}, 'price': {'<': 60}},
+             'confidence': {'feature': 'drop_ratio', 'scale': 2}}
+        ]})
+
+        matched, confidences, differences = engine.evaluate(features(self.batch))
+
+        self.assertEqual(matched.tolist(), [1, -1, 0, -1])
+        self.assertAlmostEqual(confidences[0], 0.3)
+        self.assertAlmostEqual(confidences[2], 0.9)
+        self.assertEqual(differences.tolist(), [60.0, 0.0, 90.0, 0.0])
+
+    def test_missing_values_never_match(self):
+        """Teste qu'une donnée absente (prix original, catégorie inconnue) ne déclenche aucune règle."""
+        engine = RuleEngine.from_file(DEFAULT_RULES_PATH)
+        batch = make_batch([(50.0, None, 'fnac', 'Mode')])
+
+        matched, _, _ = engine.evaluate(features(batch))
+        self.assertEqual(matched.tolist(), [-1])
+
+    def test_selective_conditions_run_first(self):
+        """Teste que la condition la plus sélective, d'après les lots précédents, est évaluée en premier."""
+        engine = RuleEngine.from_config({'rules': [
+            {'name': 'combinee', 'alert_type': 'low_price',
+             'when': {'price': {'>': 0}, 'drop_ratio': {'>': 0.95}}}
+        ]})
+        rule = engine.rules[0]
+        batch = make_batch([(float(price), 100.0, 'amazon', 'Mode') for price in range(1, 101)])
+
+        for _ in range(5):
+            engine.evaluate(features(batch))
+
+        price, drop = rule.conditions
+        self.assertLess(drop.selectivity, 0.5)
+        self.assertGreater(price.selectivity, 0.5)
+        self.assertEqual(sorted(rule.conditions, key=lambda c: c.selectivity), [drop, price])
+        self.assertEqual(rule.select(features(batch), np.arange(len(batch))).tolist(), [0, 1, 2, 3])
+
+    def test_invalid_configuration(self):
+        """Teste le rejet d'une colonne ou d'un opérateur inconnu."""
+        with self.assertRaises(ValueError):
+            RuleEngine.from_config({'rules': [
+                {'name': 'x', 'alert_type': 'low_price', 'when': {'prix': {'<': 10}}}]})
+        with self.assertRaises(ValueError):
+            RuleEngine.from_config({'rules': [
+                {'name': 'x', 'alert_type': 'low_price', 'when': {'price': {'~': 10}}}]})
+
+    def test_analyzer_uses_configured_rules(self):
+        """Teste qu'un analyseur applique les règles fournies, en liste comme en lot."""
+        engine = RuleEngine.from_config({'rules': [
+            {'name': 'moins_de_20', 'alert_type': 'under_20', 'when': {'price': {'<': 20}},
+             'difference': 'discount'}
+        ]})
+        analyzer = PriceAnalyzer(rules=engine)
+
+        alerts = analyzer.analyze_batch(self.batch)
+        self.assertEqual([(a.product.price, a.alert_type) for a in alerts], [(10.0, 'under_20')])
+
+        products = [Product(name="Câble", price=9.0, original_price=None, url="https://a.fr/c",
+                            site="amazon", category="Électronique", timestamp=datetime.now())]
+        self.assertEqual([a.alert_type for a in PriceAnalyzer(rules=engine).analyze_prices(products)],
+                         ['under_20'])
+
+    def test_rules_path_from_environment(self):
+        """Teste le chargement des règles depuis ALERT_RULES_PATH."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'rules': [{'name': 'r', 'alert_type': 't', 'when': {'price': {'<': 1}}}]}, f)
+            with patch.dict('os.environ', {'ALERT_RULES_PATH': path}):
+                analyzer = PriceAnalyzer()
+
+        self.assertEqual([rule.name for rule in analyzer.rules.rules], ['r'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import asyncio
+import math
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from src.scraper.scraper import Product
+from src.analyzer.price_analyzer import PriceAlert, PriceAnalyzer
+from src.analyzer.alert_deduplicator import AlertDeduplicator
+from src.scheduler.scheduler import ScrapeScheduler, SiteBudget
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_products(prices, prefix='p'):
+    return [
+        Product(name=f"Produit {i}", price=price, original_price=None,
+                url=f"https://amazon.fr/{prefix}/{i}", site='amazon',
+                category='Électronique', timestamp=datetime.now())
+        for i, price in enumerate(prices)
+    ]
+
+class TestScrapeScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scraper = MagicMock()
+        self.scraper.scrape_site = AsyncMock(return_value=[])
+        self.analyzer = PriceAnalyzer()
+        self.scheduler = ScrapeScheduler(self.scraper, self.analyzer, min_interval=60,
+                                         max_interval=3600, clock=self.clock)
+
+    def test_new_jobs_run_immediately(self):
+        """Teste qu'une requête ajoutée est exécutée au premier passage puis replanifiée."""
+        self.scheduler.add_job('amazon', 'tv')
+        self.scheduler.add_job('amazon', 'tv')
+
+        asyncio.run(self.scheduler.run_pending())
+
+        self.scraper.scrape_site.assert_awaited_once_with('amazon', 'tv')
+        job = self.scheduler.jobs[('amazon', 'tv')]
+        self.assertEqual(job.runs, 1)
+        # Requête sans produit ni alerte: intervalle maximal
+        self.assertEqual(job.next_run, self.clock.now + 3600)
+        self.assertEqual(self.scheduler.due_jobs(), [])
+
+    def test_multi_page_crawl(self):
+        """Teste qu'avec max_pages > 1 les requêtes parcourent plusieurs pages de résultats."""
+        self.scraper.crawl_site = AsyncMock(return_value=make_products([100.0, 200.0]))
+        self.scheduler.max_pages = 3
+        self.scheduler.add_job('amazon', 'tv')
+
+        asyncio.run(self.scheduler.run_pending())
+
+        self.scraper.crawl_site.assert_awaited_once_with('amazon', 'tv', 3)
+        self.scraper.scrape_site.assert_not_awaited()
+
+    def test_volatile_queries_run_more_often(self):
+        """Teste que la volatilité des prix raccourcit l'intervalle d'une requête."""
+        stable = make_products([100.0, 200.0], prefix='stable')
+        volatile = make_products([100.0, 200.0], prefix='volatile')
+        for product in stable:
+            self.analyzer.price_history.seed(product.url, [product.price] * 5)
+        for product in volatile:
+            self.analyzer.price_history.seed(product.url, [product.price * f for f in (0.5, 1.5, 0.7, 1.3, 1.0)])
+
+        self.scraper.scrape_site = AsyncMock(
+            side_effect=lambda site, query: stable if query == 'stable' else volatile)
+        self.scheduler.add_job('amazon', 'stable')
+        self.scheduler.add_job('amazon', 'volatile')
+        asyncio.run(self.scheduler.run_pending())
+
+        stable_job = self.scheduler.jobs[('amazon', 'stable')]
+        volatile_job = self.scheduler.jobs[('amazon', 'volatile')]
+        self.assertGreater(volatile_job.priority, stable_job.priority)
+        self.assertLess(volatile_job.interval, stable_job.interval)
+        self.assertGreaterEqual(volatile_job.interval, 60)
+
+    def test_site_budget_defers_jobs(self):
+        """Teste le report des requêtes d'un site dont le budget est épuisé."""
+        scheduler = ScrapeScheduler(self.scraper, self.analyzer, site_budgets={'amazon': 2},
+                                    clock=self.clock)
+        scheduler.add_job('amazon', 'tv')
+        scheduler.add_job('amazon', 'pc')
+
+        self.assertEqual(len(scheduler.due_jobs()), 1)
+        deferred = [job for job in scheduler.jobs.values() if job.runs == 0 and job.next_run > self.clock.now]
+        self.assertEqual(len(deferred), 1)
+        self.assertAlmostEqual(deferred[0].next_run, self.clock.now + 30)
+
+        self.clock.now += 30
+        self.assertEqual(scheduler.due_jobs(), deferred)
+
+    def test_paused_site_is_skipped(self):
+        """Teste qu'un budget nul met le site en pause sans bloquer les autres."""
+        scheduler = ScrapeScheduler(self.scraper, self.analyzer, site_budgets={'amazon': 0},
+                                    clock=self.clock)
+        scheduler.add_job('amazon', 'tv')
+        scheduler.add_job('fnac', 'tv')
+
+        self.assertEqual([job.site for job in scheduler.due_jobs()], ['fnac'])
+        self.assertEqual(scheduler.jobs[('amazon', 'tv')].next_run, math.inf)
+        self.clock.now += 86400
+        self.assertEqual(scheduler.due_jobs(), [])
+
+    def test_removed_job_is_not_run(self):
+        """Teste qu'une requête retirée n'est plus exécutée."""
+        self.scheduler.add_job('amazon', 'tv')
+        self.scheduler.remove_job('amazon', 'tv')
+
+        self.assertEqual(self.scheduler.due_jobs(), [])
+        self.assertIsNone(self.scheduler.next_run())
+
+    def test_scrape_errors_keep_job_scheduled(self):
+        """Teste qu'une erreur de scraping ne retire pas la requête de la file."""
+        self.scraper.scrape_site = AsyncMock(side_effect=Exception("Erreur réseau"))
+        self.scheduler.add_job('amazon', 'tv')
+
+        self.assertEqual(asyncio.run(self.scheduler.run_pending()), [])
+        self.assertEqual(self.scheduler.next_run(), self.clock.now + 3600)
+
+    def test_run_loop_calls_result_handler(self):
+        """Teste la boucle continue et l'appel du gestionnaire de résultats."""
+        products = make_products([100.0])
+        self.scraper.scrape_site = AsyncMock(return_value=products)
+
+        async def scenario():
+            stop = asyncio.Event()
+
+            async def on_results(job, scraped, alerts):
+                self.assertEqual(scraped, products)
+                stop.set()
+
+            self.scheduler.on_results = on_results
+            self.scheduler.add_job('amazon', 'tv')
+            await asyncio.wait_for(self.scheduler.run(stop), timeout=5)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.scheduler.jobs[('amazon', 'tv')].runs, 1)
+
+    def test_alerts_are_remembered_after_results_handler(self):
+        """Teste qu'une alerte dont l'enregistrement a échoué est de nouveau proposée au passage suivant."""
+        products = make_products([100.0])
+        alert = PriceAlert(product=products[0], confidence=0.9, price_difference=50.0,
+                           timestamp=datetime.now(), alert_type='low_price')
+        self.scraper.scrape_site = AsyncMock(return_value=products)
+        analyzer = MagicMock()
+        analyzer.analyze_prices.return_value = [alert]
+        analyzer.price_history = self.analyzer.price_history
+        saved = []
+
+        async def on_results(job, scraped, alerts):
+            if not saved:
+                saved.append(None)
+                raise RuntimeError("base indisponible")
+            saved.extend(alerts)
+
+        scheduler = ScrapeScheduler(self.scraper, analyzer, on_results=on_results,
+                                    deduplicator=AlertDeduplicator(), clock=self.clock)
+        job = scheduler.add_job('amazon', 'tv')
+
+        asyncio.run(scheduler.run_job(job))
+        asyncio.run(scheduler.run_job(job))
+        asyncio.run(scheduler.run_job(job))
+
+        self.assertEqual(saved, [None, alert])
+
+class TestSiteBudget(unittest.TestCase):
+    def test_token_refill(self):
+        """Teste la recharge du seau à jetons."""
+        clock = FakeClock()
+        budget = SiteBudget(per_minute=6, clock=clock)
+
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+        self.assertAlmostEqual(budget.wait_time(), 10)
+        clock.now += 10
+        self.assertTrue(budget.try_acquire())
+
+    def test_invalid_budget(self):
+        """Teste le rejet d'un budget négatif."""
+        with self.assertRaises(ValueError):
+            SiteBudget(per_minute=-1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,14 @@
+import asyncio
+import contextlib
+import tempfile
 import unittest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+from dataclasses import replace
 from datetime import datetime
+import httpx
 from src.scraper.scraper import Scraper, Product
+from src.scraper.archive import PageArchive
+from src.scraper.frontier import CrawlFrontier
 
 class TestScraper(unittest.TestCase):
     def setUp(self):
@@ -111,5 +118,358 @@ class TestScraper(unittest.TestCase):
         # Vérifie que le produit avec prix invalide est ignoré
         self.assertEqual(len(products), 0)
 
+    def test_conditional_request_cache(self):
+        """Teste l'envoi de requêtes conditionnelles et l'absence de parsing sur un 304."""
+        url = 'https://www.amazon.fr/s?k=test'
+        client = AsyncMock()
+        client.get.side_effect = [
+            httpx.Response(200, text=self.sample_html, headers={'ETag': '"v1"'}),
+            httpx.Response(304)
+        ]
+        config = self.scraper.sites_config['amazon']
+
+        first = asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+        with patch.object(self.scraper, '_parse_products') as mock_parse:
+            second = asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+            mock_parse.assert_not_called()
+
+        self.assertEqual(len(first), 2)
+        # Mêmes produits, redatés de la collecte en cours
+        self.assertEqual([replace(p, timestamp=None) for p in second],
+                         [replace(p, timestamp=None) for p in first])
+        _, kwargs = client.get.call_args
+        self.assertEqual(kwargs['headers']['If-None-Match'], '"v1"')
+        self.assertEqual(self.scraper.cache_hit_rate, 0.5)
+
+    def test_unchanged_product_region_skips_parsing(self):
+        """Teste que seule la zone des produits est prise en compte pour détecter un changement."""
+        url = 'https://www.amazon.fr/s?k=test'
+        client = AsyncMock()
+        client.get.side_effect = [
+            httpx.Response(200, text='<p>token=1</p>' + self.sample_html),
+            httpx.Response(200, text='<p>token=2</p>' + self.sample_html),
+            httpx.Response(200, text=self.sample_html.replace('149', '129'))
+        ]
+        config = self.scraper.sites_config['amazon']
+
+        asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+        with patch.object(self.scraper, '_parse_products', return_value=[]) as mock_parse:
+            asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+            mock_parse.assert_not_called()
+            asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+            mock_parse.assert_called_once()
+
+        self.assertEqual(self.scraper.cache_stats, {'requests': 3, 'hits': 1})
+
+    def test_page_cache_is_bounded_and_restamped(self):
+        """Teste l'éviction LRU du cache de pages et la date des produits réutilisés."""
+        scraper = Scraper(page_cache_size=1)
+        config = scraper.sites_config['amazon']
+        client = AsyncMock()
+        client.get.side_effect = [
+            httpx.Response(200, text=self.sample_html, headers={'ETag': '"v1"'}),
+            httpx.Response(304),
+            httpx.Response(200, text=self.sample_html),
+        ]
+
+        first = asyncio.run(scraper._fetch_products(client, 'https://www.amazon.fr/s?k=a', 'amazon', config))
+        with patch('src.scraper.scraper.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2030, 1, 1)
+            again = asyncio.run(scraper._fetch_products(client, 'https://www.amazon.fr/s?k=a', 'amazon', config))
+
+        self.assertEqual(client.get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual([p.name for p in again], [p.name for p in first])
+        self.assertEqual({p.timestamp for p in again}, {datetime(2030, 1, 1)})
+        self.assertNotEqual(first[0].timestamp, datetime(2030, 1, 1))
+
+        asyncio.run(scraper._fetch_products(client, 'https://www.amazon.fr/s?k=b', 'amazon', config))
+        self.assertEqual(list(scraper.page_cache), ['https://www.amazon.fr/s?k=b'])
+
+    def test_page_cache_keeps_lists_and_batches(self):
+        """Teste qu'alterner listes et lots sur une page inchangée garde les deux en cache."""
+        url = 'https://www.amazon.fr/s?k=test'
+        config = self.scraper.sites_config['amazon']
+        client = AsyncMock()
+        client.get.side_effect = lambda url, headers=None: httpx.Response(
+            304 if headers else 200, text=self.sample_html, headers={'ETag': '"v1"'})
+
+        asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+        asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config, as_batch=True))
+        with patch.object(self.scraper, '_parse_products') as mock_parse, \
+                patch.object(self.scraper, '_parse_batch') as mock_parse_batch:
+            products = asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config))
+            batch = asyncio.run(self.scraper._fetch_products(client, url, 'amazon', config, as_batch=True))
+            mock_parse.assert_not_called()
+            mock_parse_batch.assert_not_called()
+
+        self.assertLessEqual({'products', 'batch'}, set(self.scraper.page_cache[url]))
+        self.assertEqual([p.name for p in products], [p.name for p in batch])
+        # Deux 304 sur les quatre requêtes
+        self.assertEqual(self.scraper.cache_stats, {'requests': 4, 'hits': 2})
+
+    def test_archive_and_replay(self):
+        """Teste l'archivage des pages téléchargées puis leur re-parsing hors ligne."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archive = PageArchive(tmpdir)
+            scraper = Scraper(archive=archive)
+            client = AsyncMock()
+            client.get.return_value = httpx.Response(200, text=self.sample_html)
+            config = scraper.sites_config['amazon']
+
+            asyncio.run(scraper._fetch_products(
+                client, 'https://www.amazon.fr/s?k=test', 'amazon', config, 'test'))
+            # Une page identique n'est pas archivée une seconde fois
+            asyncio.run(scraper._fetch_products(
+                client, 'https://www.amazon.fr/s?k=test', 'amazon', config, 'test'))
+
+            entries = archive.entries(site='amazon', query='test')
+            self.assertEqual(len(entries), 1)
+
+            products = scraper.replay_archive(archive, site='amazon', workers=1)
+            self.assertEqual([p.name for p in products], ['Test Product', 'Another Product'])
+            self.assertEqual(products[0].timestamp, entries[0].timestamp)
+
+    def _item(self, name, price, href):
+        return f"""
+        <div class="s-result-item">
+            <h2 class="a-text-normal">{name}</h2>
+            <span class="a-price-whole">{price}</span>
+            <a href="{href}">Link</a>
+        </div>
+        """
+
+    @patch('httpx.AsyncClient')
+    def test_crawl_site_pagination(self, mock_client):
+        """Teste le parcours de plusieurs pages et l'arrêt quand elles n'apportent plus rien."""
+        pages = {
+            'https://www.amazon.fr/s?k=tv': self._item('TV 1', 100, '/p/1') + self._item('TV 2', 200, '/p/2'),
+            'https://www.amazon.fr/s?k=tv&page=2': self._item('TV 3', 300, '/p/3'),
+            'https://www.amazon.fr/s?k=tv&page=3': self._item('TV 3', 300, '/p/3'),
+        }
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            200, text=pages.get(url, '')))
+        mock_client.return_value.__aenter__.return_value = client
+
+        products = asyncio.run(self.scraper.crawl_site('amazon', 'tv', max_pages=10, prefetch=2))
+
+        self.assertEqual([p.name for p in products], ['TV 1', 'TV 2', 'TV 3'])
+        # Les pages 1 à 4 ont été demandées, la page 3 ne contenant rien de nouveau
+        self.assertEqual(client.get.call_count, 4)
+
+        # Un nouveau parcours renvoie les produits (prix à jour); une frontière partagée
+        # entre les requêtes d'un cycle écarte ceux déjà renvoyés
+        self.assertEqual(len(asyncio.run(self.scraper.crawl_site('amazon', 'tv'))), 3)
+        frontier = CrawlFrontier()
+        self.assertEqual(len(asyncio.run(self.scraper.crawl_site('amazon', 'tv', frontier=frontier))), 3)
+        self.assertEqual(asyncio.run(self.scraper.crawl_site('amazon', 'tv', frontier=frontier)), [])
+
+    @patch('httpx.AsyncClient')
+    def test_crawl_continues_past_products_seen_by_another_query(self, mock_client):
+        """Teste qu'une requête parcourt ses pages même si la première ne liste que des produits déjà vus."""
+        pages = {
+            'https://www.amazon.fr/s?k=tv': self._item('TV 1', 100, '/p/1') + self._item('TV 2', 200, '/p/2'),
+            'https://www.amazon.fr/s?k=ecran': self._item('TV 1', 100, '/p/1') + self._item('TV 2', 200, '/p/2'),
+            'https://www.amazon.fr/s?k=ecran&page=2': self._item('Écran 3', 300, '/p/3'),
+        }
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            200, text=pages.get(url, '')))
+        mock_client.return_value.__aenter__.return_value = client
+
+        frontier = CrawlFrontier()
+        asyncio.run(self.scraper.crawl_site('amazon', 'tv', max_pages=1, frontier=frontier))
+        products = asyncio.run(self.scraper.crawl_site('amazon', 'ecran', max_pages=5, prefetch=1,
+                                                       frontier=frontier))
+
+        # Seul le produit inédit est renvoyé, et l'arrêt a lieu sur la page vide
+        self.assertEqual([p.name for p in products], ['Écran 3'])
+        self.assertEqual([call.args[0] for call in client.get.call_args_list][1:], [
+            'https://www.amazon.fr/s?k=ecran', 'https://www.amazon.fr/s?k=ecran&page=2',
+            'https://www.amazon.fr/s?k=ecran&page=3'])
+
+    @patch('httpx.AsyncClient')
+    def test_crawl_stops_on_error_status(self, mock_client):
+        """Teste qu'une page en erreur (429, 5xx) arrête le parcours en erreur, pas comme une page vide."""
+        pages = {
+            'https://www.amazon.fr/s?k=tv': (200, self._item('TV 1', 100, '/p/1')),
+            'https://www.amazon.fr/s?k=tv&page=2': (429, ''),
+            'https://www.amazon.fr/s?k=tv&page=3': (200, self._item('TV 3', 300, '/p/3')),
+        }
+
+        def respond(url, headers=None):
+            status, html = pages.get(url, (404, ''))
+            return httpx.Response(status, text=html)
+
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=respond)
+        mock_client.return_value.__aenter__.return_value = client
+
+        with patch('src.scraper.scraper.SCRAPE_ERRORS') as errors:
+            products = asyncio.run(self.scraper.crawl_site('amazon', 'tv', max_pages=5, prefetch=1))
+
+        self.assertEqual([p.name for p in products], ['TV 1'])
+        errors.inc.assert_called_once_with(site='amazon')
+        self.assertEqual(client.get.call_count, 2)
+
+    @patch('httpx.AsyncClient')
+    def test_stream_batches_per_page(self, mock_client):
+        """Teste le flux de lots par page pour plusieurs requêtes, sans doublon."""
+        pages = {
+            'https://www.amazon.fr/s?k=tv': self._item('TV 1', 100, '/p/1') + self._item('TV 2', 200, '/p/2'),
+            'https://www.amazon.fr/s?k=tv&page=2': self._item('TV 3', 300, '/p/3'),
+            'https://www.amazon.fr/s?k=radio': self._item('Radio', 50, '/p/4') + self._item('TV 1', 100, '/p/1'),
+        }
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            200, text=pages.get(url, '')))
+        mock_client.return_value.__aenter__.return_value = client
+
+        async def collect():
+            return [batch async for batch in self.scraper.stream(
+                [('amazon', 'tv'), ('amazon', 'radio'), ('inconnu', 'tv')],
+                max_pages=5, concurrency=1)]
+
+        batches = asyncio.run(collect())
+
+        self.assertEqual([[p.name for p in batch] for batch in batches], [['TV 1', 'TV 2'], ['TV 3'], ['Radio']])
+        # tv: pages 1 à 3 (la 3e est vide); radio: page 2 demandée après une page 1 utile
+        self.assertEqual(client.get.call_count, 5)
+
+    @patch('httpx.AsyncClient')
+    def test_stream_bounded_buffer_and_early_exit(self, mock_client):
+        """Teste que la collecte attend le consommateur et s'arrête quand il quitte la boucle."""
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            200, text=self._item(url, 10, '/p/' + url.rsplit('=', 1)[-1])))
+        mock_client.return_value.__aenter__.return_value = client
+
+        async def consume():
+            stream = self.scraper.stream([('amazon', 'tv')], max_pages=100, buffer=2, cache=False)
+            async with contextlib.aclosing(stream):
+                async for _ in stream:
+                    # Laisse le producteur avancer autant que la file le permet
+                    for _ in range(10):
+                        await asyncio.sleep(0)
+                    break
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        leftover = asyncio.run(consume())
+
+        # Un lot consommé, deux en file, un en attente de place
+        self.assertLessEqual(client.get.call_count, 4)
+        self.assertEqual(leftover, [])
+        self.assertEqual(self.scraper.page_cache, {})
+
+    @patch('httpx.AsyncClient')
+    def test_stream_continues_past_products_seen_by_another_query(self, mock_client):
+        """Teste que le flux d'une requête ne s'arrête pas sur une page déjà vue par une autre requête."""
+        pages = {
+            'https://www.amazon.fr/s?k=tv': self._item('TV 1', 100, '/p/1') + self._item('TV 2', 200, '/p/2'),
+            'https://www.amazon.fr/s?k=ecran': self._item('TV 1', 100, '/p/1') + self._item('TV 2', 200, '/p/2'),
+            'https://www.amazon.fr/s?k=ecran&page=2': self._item('Écran 3', 300, '/p/3'),
+        }
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            200, text=pages.get(url, '')))
+        mock_client.return_value.__aenter__.return_value = client
+
+        async def collect():
+            return [batch async for batch in self.scraper.stream(
+                [('amazon', 'tv'), ('amazon', 'ecran')], max_pages=5, concurrency=1)]
+
+        batches = asyncio.run(collect())
+
+        # La page 1 de « ecran » n'apporte rien de nouveau: aucun lot vide, mais la page 2 est lue
+        self.assertEqual([[p.name for p in batch] for batch in batches], [['TV 1', 'TV 2'], ['Écran 3']])
+        self.assertIn('https://www.amazon.fr/s?k=ecran&page=2',
+                      [call.args[0] for call in client.get.call_args_list])
+
+    @patch('httpx.AsyncClient')
+    def test_successive_streams_see_products_again(self, mock_client):
+        """Teste qu'un second flux sur le même Scraper renvoie à nouveau les produits (prix à jour)."""
+        prices = iter([100, 90])
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            200, text=self._item('TV 1', next(prices), '/p/1') if url.endswith('=tv') else ''))
+        mock_client.return_value.__aenter__.return_value = client
+
+        async def collect():
+            return [batch.prices.tolist() async for batch in self.scraper.stream([('amazon', 'tv')])]
+
+        self.assertEqual(asyncio.run(collect()), [[100.0]])
+        self.assertEqual(asyncio.run(collect()), [[90.0]])
+
+    def test_stream_rejects_invalid_bounds(self):
+        """Teste le refus d'une file non bornée (buffer < 1) ou d'un flux sans worker."""
+        async def first(**kwargs):
+            async for batch in self.scraper.stream([('amazon', 'tv')], **kwargs):
+                return batch
+
+        with self.assertRaises(ValueError):
+            asyncio.run(first(buffer=0))
+        with self.assertRaises(ValueError):
+            asyncio.run(first(concurrency=0))
+
+    @patch('httpx.AsyncClient')
+    def test_stream_batches_are_not_cached(self, mock_client):
+        """Teste que les lots produits ne sont jamais les objets de page_cache."""
+        url = 'https://www.amazon.fr/s?k=tv'
+        client = MagicMock()
+        client.get = AsyncMock(side_effect=lambda url, headers=None: httpx.Response(
+            304 if headers else 200, text=self._item('TV 1', 100, '/p/1'), headers={'ETag': '"v1"'}))
+        mock_client.return_value.__aenter__.return_value = client
+
+        async def collect():
+            return [batch async for batch in self.scraper.stream([('amazon', 'tv')])]
+
+        # Page parsée puis page confirmée par un 304: le consommateur peut compléter ses lots
+        for _ in range(2):
+            batch, = asyncio.run(collect())
+            self.assertIsNot(batch, self.scraper.page_cache[url]['batch'])
+            batch.append("Ajout", 1.0, None, "https://example.com/ajout", "amazon", "Autre")
+            self.assertEqual(len(self.scraper.page_cache[url]['batch']), 1)
+        self.assertEqual(self.scraper.cache_stats['hits'], 1)
+
+    @patch('httpx.AsyncClient')
+    def test_stream_cancellation(self, mock_client):
+        """Teste que l'annulation du consommateur annule les téléchargements en cours."""
+        started = []
+
+        async def slow_get(url, headers=None):
+            started.append(url)
+            await asyncio.sleep(10)
+
+        client = MagicMock()
+        client.get = slow_get
+        mock_client.return_value.__aenter__.return_value = client
+
+        async def cancel():
+            async def consume():
+                async for _ in self.scraper.stream([('amazon', 'tv'), ('amazon', 'radio')], concurrency=2):
+                    pass
+            task = asyncio.create_task(consume())
+            while len(started) < 2:
+                await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        self.assertEqual(asyncio.run(cancel()), [])
+
+    def test_parse_batch(self):
+        """Teste le parsing direct en lot colonnaire avec un horodatage unique."""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(self.sample_html, 'html.parser')
+
+        batch = self.scraper._parse_batch(soup, 'amazon', self.scraper.sites_config['amazon'])
+        products = self.scraper._parse_products(soup, 'amazon', self.scraper.sites_config['amazon'])
+
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.prices.tolist(), [99.0, 149.0])
+        self.assertEqual([batch.name(i) for i in range(2)], [p.name for p in products])
+        self.assertEqual(products[0].timestamp, products[1].timestamp)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,321 @@
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+import psycopg2
+from src.scraper.product import ProductBatch
+from src.analyzer.price_analyzer import PriceAnalyzer
+from src.worker.job_queue import JobQueue, QueuedJob
+from src.worker.worker import ScrapeWorker
+from src.concurrency.executor import BlockingExecutor
+from src.database.db_manager import DatabaseManager
+from src.analyzer.alert_deduplicator import AlertDeduplicator
+
+class InMemoryJobQueue:
+    """Double de JobQueue pour une requête: mêmes effets que le SQL sur runs et next_run."""
+
+    def __init__(self, job_id=7, site='amazon', query='tv', interval=3600.0):
+        self.job_id, self.site, self.query, self.interval = job_id, site, query, interval
+        self.next_run = datetime(2024, 1, 1)
+        self.attempts = 0
+        self.runs = 0
+        self.locked_by = None
+
+    def claim(self, worker_id, lease_seconds, limit=1):
+        if self.locked_by is not None:
+            return []
+        self.locked_by = worker_id
+        self.attempts += 1
+        return [QueuedJob(self.job_id, self.site, self.query, self.interval,
+                          self.next_run, self.attempts, self.runs)]
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        return self.locked_by == worker_id
+
+    def complete(self, job_id, worker_id):
+        self.locked_by = None
+        self.attempts = 0
+        self.runs += 1
+        self.next_run += timedelta(seconds=self.interval)
+        return True
+
+    def fail(self, job_id, worker_id, error, retry_seconds=60.0):
+        self.locked_by = None
+        self.next_run += timedelta(seconds=retry_seconds * 2 ** (self.attempts - 1))
+        return True
+
+class FakePostgres:
+    """Base simulée: les exécutions et les prix ne sont visibles qu'après COMMIT.
+
+    drop_after_commit simule une connexion perdue juste après un COMMIT réussi.
+    """
+
+    def __init__(self):
+        self.runs = set()
+        self.prices = []
+        self.drop_after_commit = 0
+
+    def connect(self, **params):
+        return FakeConnection(self)
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.runs = []
+        self.prices = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.db.runs.update(self.runs)
+        self.db.prices.extend(self.prices)
+        self.rollback()
+        if self.db.drop_after_commit:
+            self.db.drop_after_commit -= 1
+            raise psycopg2.OperationalError("connexion perdue après COMMIT")
+
+    def rollback(self):
+        self.runs, self.prices = [], []
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if 'INSERT INTO processed_runs' in sql:
+            run_key = params[0]
+            new = run_key not in self.conn.db.runs and run_key not in self.conn.runs
+            if new:
+                self.conn.runs.append(run_key)
+            self.row = (run_key,) if new else None
+
+    def fetchone(self):
+        return self.row
+
+def fake_write_batch(cur, batch):
+    cur.conn.prices.extend(batch.urls())
+    return {url: i for i, url in enumerate(batch.urls())}, len(batch)
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue({'dbname': 'test_db'})
+
+    @patch('psycopg2.connect')
+    def test_claim_skips_locked_rows(self, mock_connect):
+        """Teste la réclamation des requêtes à échéance sans attendre les lignes verrouillées."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        scheduled = datetime(2024, 1, 1, 12, 0)
+        mock_cursor.fetchall.return_value = [(7, 'amazon', 'tv', 3600.0, scheduled, 1, 4)]
+
+        jobs = self.queue.claim('worker-1', lease_seconds=120, limit=2)
+
+        self.assertEqual(jobs, [QueuedJob(7, 'amazon', 'tv', 3600.0, scheduled, 1, 4)])
+        self.assertEqual(jobs[0].run_key, '7:4')
+        sql, params = mock_cursor.execute.call_args.args
+        self.assertIn('FOR UPDATE SKIP LOCKED', sql)
+        self.assertEqual(params, ('worker-1', 120, 2))
+        # La table est créée à la première utilisation seulement
+        self.assertTrue(any('CREATE TABLE IF NOT EXISTS scrape_jobs' in str(call)
+                            for call in mock_cursor.execute.call_args_list))
+
+    @patch('psycopg2.connect')
+    def test_heartbeat_detects_lost_lease(self, mock_connect):
+        """Teste qu'un battement de cœur signale un bail repris par un autre worker."""
+        mock_cursor = MagicMock()
+        mock_connect.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = []
+
+        self.assertFalse(self.queue.heartbeat(7, 'worker-1', 120))
+
+    @patch('psycopg2.connect')
+    def test_database_errors(self, mock_connect):
+        """Teste la gestion des erreurs de connexion."""
+        mock_connect.side_effect = Exception("Erreur de connexion")
+
+        self.assertEqual(self.queue.claim('worker-1', 120), [])
+        self.assertFalse(self.queue.complete(7, 'worker-1'))
+
+class TestScrapeWorker(unittest.TestCase):
+    def setUp(self):
+        self.queue = MagicMock()
+        self.db = MagicMock()
+        self.db.save_results.return_value = True
+        self.scraper = MagicMock()
+        self.batch = ProductBatch()
+        self.batch.append("TV 4K", 499.0, None, "https://amazon.fr/p/1", "amazon", "Électronique")
+        self.scraper.scrape_site_batch = AsyncMock(return_value=self.batch)
+        self.worker = ScrapeWorker(self.queue, self.scraper, PriceAnalyzer(), self.db,
+                                   worker_id='worker-1', heartbeat_interval=0.01)
+        self.job = QueuedJob(7, 'amazon', 'tv', 3600.0, datetime(2024, 1, 1), 1)
+
+    def test_process_saves_and_completes(self):
+        """Teste l'enregistrement idempotent des résultats puis la libération du bail."""
+        self.assertTrue(asyncio.run(self.worker.process(self.job)))
+
+        run_key, batch, alerts = self.db.save_results.call_args.args
+        self.assertEqual(run_key, self.job.run_key)
+        self.assertIs(batch, self.batch)
+        self.queue.complete.assert_called_once_with(7, 'worker-1')
+        self.queue.fail.assert_not_called()
+
+    def test_multi_page_crawl(self):
+        """Teste qu'avec max_pages > 1 le worker enregistre les produits de toutes les pages."""
+        self.worker.max_pages = 3
+        self.scraper.crawl_site = AsyncMock(return_value=self.batch.to_products() * 2)
+
+        self.assertTrue(asyncio.run(self.worker.process(self.job)))
+
+        self.scraper.crawl_site.assert_awaited_once_with('amazon', 'tv', 3)
+        self.assertEqual(len(self.db.save_results.call_args.args[1]), 2)
+
+    def test_lost_lease_skips_write(self):
+        """Teste qu'un worker dont le bail a expiré n'écrit pas les résultats."""
+        self.queue.heartbeat.return_value = False
+
+        async def slow_scrape(site, query):
+            await asyncio.sleep(0.05)
+            return self.batch
+
+        self.scraper.scrape_site_batch = slow_scrape
+        self.assertFalse(asyncio.run(self.worker.process(self.job)))
+        self.db.save_results.assert_not_called()
+        self.queue.complete.assert_not_called()
+
+    def test_failed_write_releases_job_for_retry(self):
+        """Teste qu'une erreur d'écriture remet la requête en file."""
+        self.db.save_results.return_value = None
+
+        self.assertFalse(asyncio.run(self.worker.process(self.job)))
+        self.queue.complete.assert_not_called()
+        self.assertEqual(self.queue.fail.call_args.args[:2], (7, 'worker-1'))
+
+    def test_duplicate_alerts_are_not_saved_twice(self):
+        """Teste que les alertes déjà enregistrées sont filtrées au cycle suivant."""
+        self.worker.deduplicator = AlertDeduplicator()
+        self.worker.analyzer = MagicMock()
+        self.worker.analyzer.analyze_batch.side_effect = lambda batch: [
+            MagicMock(product=batch.product(0), alert_type='low_price')]
+
+        asyncio.run(self.worker.process(self.job))
+        asyncio.run(self.worker.process(self.job))
+
+        first, second = self.db.save_results.call_args_list
+        self.assertEqual(len(first.args[2]), 1)
+        self.assertEqual(second.args[2], [])
+
+    def test_slow_write_is_not_abandoned(self):
+        """Teste que l'enregistrement des résultats n'est pas soumis au délai de l'exécuteur."""
+        executor = BlockingExecutor(name='test', max_workers=2, max_queue=2, timeout=0.05)
+        self.worker.executor = executor
+
+        def slow_save(run_key, batch, alerts):
+            time.sleep(0.2)
+            return True
+
+        self.db.save_results.side_effect = slow_save
+        try:
+            self.assertTrue(asyncio.run(self.worker.process(self.job)))
+        finally:
+            executor.shutdown()
+        self.queue.fail.assert_not_called()
+        self.queue.complete.assert_called_once_with(7, 'worker-1')
+
+    def test_heartbeats_bypass_saturated_executor(self):
+        """Teste que les battements de cœur continuent quand l'exécuteur partagé est saturé."""
+        executor = BlockingExecutor(name='test', max_workers=1, max_queue=0, timeout=5.0)
+        self.worker.executor = executor
+        release = threading.Event()
+        self.queue.heartbeat.return_value = True
+
+        async def scenario():
+            # Un appel bloquant occupe la seule place de l'exécuteur partagé
+            busy = asyncio.create_task(executor.run(release.wait))
+            await asyncio.sleep(0.01)
+            heartbeat = asyncio.create_task(self.worker._heartbeat(self.job, asyncio.Event()))
+            await asyncio.sleep(0.1)
+            heartbeat.cancel()
+            release.set()
+            await busy
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        self.assertGreaterEqual(self.queue.heartbeat.call_count, 2)
+
+    def test_slow_claim_does_not_stop_worker(self):
+        """Teste qu'une réclamation qui dépasse le délai de l'exécuteur n'arrête pas run()."""
+        executor = BlockingExecutor(name='test', max_workers=2, max_queue=2, timeout=0.1)
+        self.worker.executor = executor
+        self.worker.poll_interval = 0.01
+        calls = []
+
+        def claim(worker_id, lease_seconds, limit):
+            calls.append(worker_id)
+            if len(calls) == 1:
+                time.sleep(0.3)
+                return []
+            return [self.job] if len(calls) == 2 else []
+
+        self.queue.claim.side_effect = claim
+
+        async def scenario():
+            stop = asyncio.Event()
+            task = asyncio.create_task(self.worker.run(stop))
+            while self.queue.complete.call_count == 0 and not task.done():
+                await asyncio.sleep(0.01)
+            stop.set()
+            await task
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        # Le cycle suivant a réclamé et traité la requête
+        self.queue.complete.assert_called_once_with(7, 'worker-1')
+
+    def test_retry_after_commit_does_not_write_twice(self):
+        """Teste qu'un nouvel essai après un COMMIT non confirmé (connexion perdue) n'écrit rien."""
+        postgres = FakePostgres()
+        queue = InMemoryJobQueue()
+        with patch('psycopg2.connect', side_effect=postgres.connect):
+            db = DatabaseManager(cache=None)
+            worker = ScrapeWorker(queue, self.scraper, PriceAnalyzer(), db, worker_id='worker-1')
+            postgres.drop_after_commit = 1
+            with patch.object(db, '_write_batch', side_effect=fake_write_batch):
+                # Premier essai: écriture validée mais erreur remontée, la requête est remise en file
+                self.assertEqual(asyncio.run(worker.run_once()), 1)
+                self.assertEqual((queue.runs, queue.locked_by), (0, None))
+                # Nouvel essai, à une autre échéance: même exécution, rien n'est réécrit
+                self.assertEqual(asyncio.run(worker.run_once()), 1)
+
+        self.assertEqual(postgres.prices, ["https://amazon.fr/p/1"])
+        self.assertEqual(postgres.runs, {'7:0'})
+        self.assertEqual(queue.runs, 1)
+
+    def test_run_once_claims_jobs(self):
+        """Teste la réclamation d'un lot de requêtes limité par la concurrence."""
+        self.queue.claim.return_value = [self.job]
+
+        self.assertEqual(asyncio.run(self.worker.run_once()), 1)
+        self.queue.claim.assert_called_once_with('worker-1', 120.0, 2)
+
+if __name__ == '__main__':
+    unittest.main()